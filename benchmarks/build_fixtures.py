@@ -0,0 +1,79 @@
+'''
+Program Description:
+
+Builds the fixtures of the mock Github API (mock_github_server.py) from
+the results recorded by the command line program in Results/.
+
+Each results CSV holds the top 'n' repos of an org (name, forks count)
+and the top 'm' contributors of each repo (login, commit count). The
+CSVs of an org are merged, keeping the longest contributors list seen
+for each repo.
+
+Output:
+benchmarks/fixtures/{org}.json
+{
+    "login": "microsoft",
+    "repos": [
+        {"name": "vscode", "forks_count": 14384, "contributors": [["bpasero", 8026], ...]},
+        ...
+    ]
+}
+
+Usage:
+python benchmarks/build_fixtures.py
+'''
+
+import os
+import re
+import csv
+import json
+import glob
+from collections import OrderedDict
+
+# Constants
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT_DIR, 'Results')
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+# Matches Results_{org}_{n}_forks_{m}_contributors.csv
+RESULTS_FILE_PATTERN = re.compile(r'^Results_(.+)_(\d+)_forks_(\d+)_contributors\.csv$')
+
+
+# Function to read the repos and contributors of every results CSV, by org
+def read_results(results_dir=RESULTS_DIR):
+    orgs = OrderedDict()
+    for path in sorted(glob.glob(os.path.join(results_dir, 'Results_*_contributors.csv'))):
+        match = RESULTS_FILE_PATTERN.match(os.path.basename(path))
+        if match is None:
+            continue
+        org = match.group(1).lower()
+        repos = orgs.setdefault(org, OrderedDict())
+        file_repos = OrderedDict()
+        with open(path) as results_file:
+            for row in csv.DictReader(results_file):
+                repo = file_repos.setdefault(row['Repo_Name'], {'forks_count': int(row['Repo_Forks_Count']), 'contributors': list()})
+                repo['contributors'].append([row['Contributor_Login_ID'], int(row['Contributor_Commit_Count'])])
+        # Longest contributors list seen for each repo
+        for repo_name, repo in file_repos.items():
+            if repo_name not in repos or len(repo['contributors']) > len(repos[repo_name]['contributors']):
+                repos[repo_name] = repo
+    return orgs
+
+
+# Function to write one fixture file per org
+def write_fixtures(orgs, fixtures_dir=FIXTURES_DIR):
+    if not os.path.exists(fixtures_dir):
+        os.makedirs(fixtures_dir)
+    for org, repos in orgs.items():
+        fixture = OrderedDict()
+        fixture['login'] = org
+        fixture['repos'] = list()
+        for repo_name, repo in sorted(repos.items(), key=lambda item: -item[1]['forks_count']):
+            fixture['repos'].append(OrderedDict([('name', repo_name), ('forks_count', repo['forks_count']), ('contributors', repo['contributors'])]))
+        with open(os.path.join(fixtures_dir, f'{org}.json'), mode='w') as fixture_file:
+            json.dump(fixture, fixture_file)
+        print(f"Fixture written for {org}: {len(fixture['repos'])} repos")
+    return
+
+
+if __name__ == "__main__":
+    write_fixtures(read_results())
@@ -0,0 +1,397 @@
+'''
+Program Description:
+
+Local stand-in for the Github API V3, used by the benchmarks
+(run_benchmarks.py) so that the fetch code can be timed offline and
+without using any real rate limit.
+
+It answers the requests made by TopContributors
+from the fixtures in benchmarks/fixtures (see build_fixtures.py):
+1. https://api.github.com/rate_limit
+2. https://api.github.com/orgs/{org_name}
+3. https://api.github.com/search/repositories?q=user:{org_name}+sort:forks&per_page={results_per_page}&page={page_num}
+(also with a forks:{low}..{high} qualifier, for the sharded search)
+4. https://api.github.com/repos/{org_name}/{repo_name}/contributors?&per_page={results_per_page}&page={page_num}
+5. https://api.github.com/orgs/{org_name}/repos?per_page={results_per_page}&page={page_num}
+6. https://api.github.com/repos/{org_name}/{repo_name}/stats/contributors
+7. POST https://api.github.com/graphql, the search of the repos of an org
+sorted by forks and the aliased repository lookups of graphql_backend.py
+
+Paginated responses carry the Link header (rel="next" / rel="last") and
+the search results stop at 1000 like the real API. Every response
+carries the X-RateLimit-* headers and an ETag (If-None-Match is answered
+with 304 Not Modified).
+
+Configurable behaviour (MockGithubConfig):
+latency - Seconds added to every response
+core_limit / search_limit - Requests allowed per rate limit window (for
+each token, like the quotas of the real API)
+reset_seconds - Length of the rate limit window
+secondary_every - Every Nth request is refused with a secondary rate
+limit error and a Retry-After header (0 to disable)
+retry_after - Retry-After seconds sent with the secondary rate limit errors
+pad_contributors - Repos with fewer recorded contributors are padded
+with generated ones up to this count, for many page scenarios
+too_large_repos - Names of the repos whose contributors endpoint answers
+403 "too large to list", like the very large repos on Github
+stats_pending_polls - Number of times the contributors statistics of a
+repo answer 202 (being computed) before they are ready
+pushed_repos - Names of the repos pushed to after the search index was
+last updated: the search and listing results still show the indexed
+push time, the GraphQL repository lookups show the later push
+
+The requests received are counted by resource, status code and token.
+
+Usage (standalone, the app is pointed at it with GITHUB_API_URL):
+python benchmarks/mock_github_server.py [port]
+GITHUB_API_URL=http://127.0.0.1:{port}/ python top_dev_org_contributors.py
+'''
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Constants
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+# Github API allows a max of 1000 results for the search API
+SEARCH_RESULTS_LIMIT = 1000
+DEFAULT_PER_PAGE = 30
+# Last push time of every repo in the search index, and of the pushed_repos once pushed to again
+INDEXED_PUSHED_AT = '2020-03-01T10:00:00Z'
+LATER_PUSHED_AT = '2020-03-02T10:00:00Z'
+
+
+# Class with the behaviour settings of the mock server
+class MockGithubConfig:
+
+    def __init__(self, latency=0.0, core_limit=5000, search_limit=30, reset_seconds=3600, secondary_every=0, retry_after=1, pad_contributors=0, too_large_repos=(), stats_pending_polls=2, pushed_repos=()):
+        self.latency = latency
+        self.core_limit = core_limit
+        self.search_limit = search_limit
+        self.reset_seconds = reset_seconds
+        self.secondary_every = secondary_every
+        self.retry_after = retry_after
+        self.pad_contributors = pad_contributors
+        self.too_large_repos = set(too_large_repos)
+        self.stats_pending_polls = stats_pending_polls
+        self.pushed_repos = set(pushed_repos)
+        return
+
+
+# Function to load the fixtures of every org, by lower case org name
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    fixtures = dict()
+    for file_name in sorted(os.listdir(fixtures_dir)):
+        if file_name.endswith('.json'):
+            with open(os.path.join(fixtures_dir, file_name)) as fixture_file:
+                fixture = json.load(fixture_file)
+            fixtures[fixture['login'].lower()] = fixture
+    return fixtures
+
+
+# Class that holds the fixtures, the settings and the counters of the mock server
+class MockGithubState:
+
+    def __init__(self, fixtures, config=None):
+        self.fixtures = fixtures
+        self.config = config if config is not None else MockGithubConfig()
+        self.lock = threading.Lock()
+        self.reset()
+        return
+
+    # Function to start a new rate limit window and clear the counters
+    def reset(self, config=None):
+        with self.lock:
+            if config is not None:
+                self.config = config
+            self.window_start = time.time()
+            # Requests counted per token (None without a token), like the per token quotas of Github
+            self.used = dict()
+            self.requests_count = 0
+            self.status_counts = dict()
+            self.resource_counts = dict()
+            self.token_counts = dict()
+            # Statistics requests received per repo
+            self.stats_polls = dict()
+        return
+
+    # Function to get the requests counted for a token in the current window
+    def get_used(self, token=None):
+        if token not in self.used:
+            self.used[token] = {'core': 0, 'search': 0, 'graphql': 0}
+        return self.used[token]
+
+    # Function to count a request sent with a token and get (limit, remaining, reset, refused_message) for its resource
+    def count_request(self, resource, token=None):
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= self.config.reset_seconds:
+                self.window_start = now
+                self.used = dict()
+            used = self.get_used(token)
+            self.requests_count += 1
+            self.resource_counts[resource] = self.resource_counts.get(resource, 0) + 1
+            self.token_counts[token] = self.token_counts.get(token, 0) + 1
+            limit = self.config.search_limit if resource == 'search' else self.config.core_limit
+            reset = int(self.window_start + self.config.reset_seconds)
+            refused_message = None
+            if resource != 'rate_limit':
+                if self.config.secondary_every and self.requests_count % self.config.secondary_every == 0:
+                    refused_message = 'You have exceeded a secondary rate limit. Please wait a few minutes before you try again.'
+                elif used[resource] >= limit:
+                    refused_message = 'API rate limit exceeded'
+                else:
+                    used[resource] += 1
+            remaining = limit - used.get(resource, 0)
+        return limit, remaining, reset, refused_message
+
+    # Function to count the status code of a response
+    def count_status(self, status_code):
+        with self.lock:
+            self.status_counts[status_code] = self.status_counts.get(status_code, 0) + 1
+        return
+
+    # Function to get the contributors of a repo, padded up to pad_contributors
+    def get_contributors(self, repo):
+        contributors = [{'login': login, 'contributions': contributions} for login, contributions in repo['contributors']]
+        commit_count = contributors[-1]['contributions'] if contributors else 1000
+        for index in range(len(contributors), self.config.pad_contributors):
+            commit_count = max(1, commit_count - 1)
+            contributors.append({'login': f"{repo['name']}-contributor-{index + 1}", 'contributions': commit_count})
+        return contributors
+
+    # Function to get the last push time of a repo, as indexed by the search or live
+    def pushed_at(self, repo, live=False):
+        if live and repo['name'] in self.config.pushed_repos:
+            return LATER_PUSHED_AT
+        return repo.get('pushed_at', INDEXED_PUSHED_AT)
+
+    # Function to count a statistics request of a repo and check if the statistics are ready
+    def stats_ready(self, repo_name):
+        with self.lock:
+            self.stats_polls[repo_name] = self.stats_polls.get(repo_name, 0) + 1
+            return self.stats_polls[repo_name] > self.config.stats_pending_polls
+
+
+# Class that answers the requests sent to the mock server
+class MockGithubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # Function to silence the default request logging
+    def log_message(self, format, *args):
+        return
+
+    # Function to get the token a request was sent with, None without a token
+    def get_token(self):
+        authorization = self.headers.get('Authorization', '')
+        if authorization.startswith('Token '):
+            return authorization[len('Token '):]
+        return None
+
+    # Function to send a JSON response with the rate limit, pagination and ETag headers
+    def send_json(self, status_code, data, resource, links=None):
+        state = self.server.state
+        limit, remaining, reset, refused_message = state.count_request(resource, self.get_token())
+        extra_headers = dict()
+        if refused_message is not None:
+            status_code = 403
+            data = {'message': refused_message, 'documentation_url': 'https://developer.github.com/v3/#rate-limiting'}
+            if 'secondary' in refused_message:
+                extra_headers['Retry-After'] = str(state.config.retry_after)
+            links = None
+
+        if state.config.latency > 0:
+            time.sleep(state.config.latency)
+
+        body = json.dumps(data).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if status_code == 200 and self.headers.get('If-None-Match') == etag:
+            status_code = 304
+            body = b''
+
+        state.count_status(status_code)
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        if resource != 'rate_limit':
+            self.send_header('X-RateLimit-Resource', resource)
+            self.send_header('X-RateLimit-Limit', str(limit))
+            self.send_header('X-RateLimit-Remaining', str(max(remaining, 0)))
+            self.send_header('X-RateLimit-Reset', str(reset))
+        for key, value in extra_headers.items():
+            self.send_header(key, value)
+        if links:
+            self.send_header('Link', ', '.join(f'<{url}>; rel="{rel}"' for rel, url in links.items()))
+        self.end_headers()
+        self.wfile.write(body)
+        return
+
+    # Function to get the Link header urls of a page of results
+    def page_links(self, page_num, last_page_num):
+        links = dict()
+        host = self.headers.get('Host')
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        if page_num < last_page_num:
+            query['page'] = str(page_num + 1)
+            links['next'] = f"http://{host}{parsed.path}?" + '&'.join(f'{key}={value}' for key, value in query.items())
+        if last_page_num > 1:
+            query['page'] = str(last_page_num)
+            links['last'] = f"http://{host}{parsed.path}?" + '&'.join(f'{key}={value}' for key, value in query.items())
+        return links
+
+    # Function to get one page of a list of results, with its Link header urls
+    def paginate(self, results, query, max_results=None):
+        per_page = min(int(query.get('per_page', DEFAULT_PER_PAGE)), 100)
+        page_num = int(query.get('page', 1))
+        available = len(results) if max_results is None else min(len(results), max_results)
+        last_page_num = max(1, -(-available // per_page))
+        start = (page_num - 1) * per_page
+        page = results[start:min(start + per_page, available)]
+        return page, self.page_links(page_num, last_page_num)
+
+    def do_GET(self):
+        state = self.server.state
+        parsed = urlparse(self.path)
+        path = parsed.path.strip('/').split('/')
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        # 1. Rate limit
+        if path == ['rate_limit']:
+            reset = int(state.window_start + state.config.reset_seconds)
+            with state.lock:
+                used = dict(state.get_used(self.get_token()))
+            core = {'limit': state.config.core_limit, 'remaining': state.config.core_limit - used['core'], 'reset': reset}
+            search = {'limit': state.config.search_limit, 'remaining': state.config.search_limit - used['search'], 'reset': reset}
+            return self.send_json(200, {'resources': {'core': core, 'search': search}, 'rate': core}, 'rate_limit')
+
+        # 2. Organization
+        if len(path) == 2 and path[0] == 'orgs':
+            fixture = state.fixtures.get(path[1].lower())
+            if fixture is None:
+                return self.send_json(404, {'message': 'Not Found'}, 'core')
+            return self.send_json(200, {'login': fixture['login'], 'name': fixture['login'].title(), 'public_repos': len(fixture['repos'])}, 'core')
+
+        # 5. Repositories of an org (listed by name like the real API lists them by creation, not by forks)
+        if len(path) == 3 and path[0] == 'orgs' and path[2] == 'repos':
+            fixture = state.fixtures.get(path[1].lower())
+            if fixture is None:
+                return self.send_json(404, {'message': 'Not Found'}, 'core')
+            repos = sorted(fixture['repos'], key=lambda repo: repo['name'])
+            page, links = self.paginate(repos, query)
+            items = [{'name': repo['name'], 'fork': False, 'forks_count': repo['forks_count'], 'pushed_at': state.pushed_at(repo)} for repo in page]
+            return self.send_json(200, items, 'core', links)
+
+        # 3. Search repositories of an org sorted by forks, optionally in a forks:{low}..{high} range
+        if path == ['search', 'repositories']:
+            org = ''
+            forks_low, forks_high = 0, float('inf')
+            for term in query.get('q', '').split():
+                if term.startswith('user:'):
+                    org = term[len('user:'):].lower()
+                elif term.startswith('forks:') and '..' in term:
+                    forks_low, forks_high = (int(bound) for bound in term[len('forks:'):].split('..'))
+            repos = state.fixtures[org]['repos'] if org in state.fixtures else list()
+            repos = [repo for repo in repos if forks_low <= repo['forks_count'] <= forks_high]
+            repos = sorted(repos, key=lambda repo: -repo['forks_count'])
+            per_page = min(int(query.get('per_page', DEFAULT_PER_PAGE)), 100)
+            if (int(query.get('page', 1)) - 1) * per_page >= SEARCH_RESULTS_LIMIT:
+                return self.send_json(422, {'message': 'Only the first 1000 search results are available'}, 'search')
+            page, links = self.paginate(repos, query, SEARCH_RESULTS_LIMIT)
+            items = [{'name': repo['name'], 'forks_count': repo['forks_count'], 'pushed_at': state.pushed_at(repo)} for repo in page]
+            return self.send_json(200, {'total_count': len(repos), 'incomplete_results': False, 'items': items}, 'search', links)
+
+        # 4. Contributors of a repo
+        if len(path) == 4 and path[0] == 'repos' and path[3] == 'contributors':
+            fixture = state.fixtures.get(path[1].lower())
+            repo = None
+            if fixture is not None:
+                repo = next((repo for repo in fixture['repos'] if repo['name'] == path[2]), None)
+            if repo is None:
+                return self.send_json(404, {'message': 'Not Found'}, 'core')
+            if repo['name'] in state.config.too_large_repos:
+                return self.send_json(403, {'message': 'The history or contributor list is too large to list contributors for this repository via the API.'}, 'core')
+            page, links = self.paginate(state.get_contributors(repo), query)
+            return self.send_json(200, page, 'core', links)
+
+        # 6. Contributors statistics of a repo (top 100 contributors, least active first), 202 while being computed
+        if len(path) == 5 and path[0] == 'repos' and path[3:] == ['stats', 'contributors']:
+            fixture = state.fixtures.get(path[1].lower())
+            repo = None
+            if fixture is not None:
+                repo = next((repo for repo in fixture['repos'] if repo['name'] == path[2]), None)
+            if repo is None:
+                return self.send_json(404, {'message': 'Not Found'}, 'core')
+            if not state.stats_ready(repo['name']):
+                return self.send_json(202, {}, 'core')
+            contributors = state.get_contributors(repo)[:100]
+            stats = [{'author': {'login': contributor['login']}, 'total': contributor['contributions'], 'weeks': []} for contributor in reversed(contributors)]
+            return self.send_json(200, stats, 'core')
+
+        return self.send_json(404, {'message': 'Not Found'}, 'core')
+
+    def do_POST(self):
+        state = self.server.state
+        path = urlparse(self.path).path.strip('/').split('/')
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if path != ['graphql']:
+            return self.send_json(404, {'message': 'Not Found'}, 'core')
+        variables = body.get('variables') or dict()
+
+        # 7. GraphQL search of the repositories of an org sorted by forks, the cursors are offsets
+        if 'search_query' in variables:
+            org = ''
+            for term in variables['search_query'].split():
+                if term.startswith('user:'):
+                    org = term[len('user:'):].lower()
+            repos = state.fixtures[org]['repos'] if org in state.fixtures else list()
+            repos = sorted(repos, key=lambda repo: -repo['forks_count'])
+            start = int(variables.get('after') or 0)
+            end = min(start + min(variables['first'], 100), len(repos), SEARCH_RESULTS_LIMIT)
+            nodes = [{'name': repo['name'], 'forkCount': repo['forks_count'], 'pushedAt': state.pushed_at(repo)} for repo in repos[start:end]]
+            page_info = {'hasNextPage': end < min(len(repos), SEARCH_RESULTS_LIMIT), 'endCursor': str(end)}
+            return self.send_json(200, {'data': {'search': {'repositoryCount': len(repos), 'pageInfo': page_info, 'nodes': nodes}}}, 'graphql')
+
+        # 7. GraphQL repository lookups, aliased repo_{index} for the variable name_{index}
+        fixture = state.fixtures.get(str(variables.get('owner')).lower())
+        repos = {repo['name']: repo for repo in fixture['repos']} if fixture is not None else dict()
+        data = dict()
+        for key, repo_name in variables.items():
+            if not key.startswith('name_'):
+                continue
+            repo = repos.get(repo_name)
+            data['repo_' + key[len('name_'):]] = None if repo is None else {'name': repo['name'], 'forkCount': repo['forks_count'], 'pushedAt': state.pushed_at(repo, live=True)}
+        return self.send_json(200, {'data': data}, 'graphql')
+
+
+# Function to start the mock server on a background thread, returns the server (server.state holds the counters)
+def start_server(config=None, port=0, fixtures_dir=FIXTURES_DIR):
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockGithubHandler)
+    server.daemon_threads = True
+    server.state = MockGithubState(load_fixtures(fixtures_dir), config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# Function to get the root url of a started server
+def server_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = start_server(port=port)
+    print(f"Mock Github API serving the fixtures of: {', '.join(server.state.fixtures)}")
+    print(f"GITHUB_API_URL={server_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,138 @@
+'''
+Program Description:
+
+Offline benchmarks of the Github fetch code, run against the local mock
+Github API (mock_github_server.py) so that a change to get_n_repos(),
+get_m_contributors() or get_all_contributors() can be timed without the
+network and without using any real rate limit.
+
+Each scenario checks the org, retrieves the top 'n' repos and the top
+'m' contributors of each repo with the TopContributors of the Django
+app, using a fresh session and rate limit scheduler (no response cache).
+
+Reported for each scenario (best wall time of the repeats):
+Wall time, requests received by the mock server, requests per second,
+the repos / contributors retrieved and the change against the stored
+baseline (benchmarks/baseline.json).
+
+Usage:
+python benchmarks/run_benchmarks.py [--repeat R] [--scenario NAME ...] [--save-baseline] [--max-regression FRACTION]
+
+The program exits with status 1 when a scenario is slower than its
+baseline by more than --max-regression (default 0.25) or retrieves
+different results.
+'''
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import contextlib
+from mock_github_server import MockGithubConfig, start_server, server_url
+
+# Constants
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+APP_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), 'github_stats_project')
+
+# Representative scenarios: (org, n, m) and mock server behaviour
+SCENARIOS = [
+    {'name': 'microsoft_101_17_sync', 'org': 'microsoft', 'n': 101, 'm': 17,
+     'config': {'latency': 0.02}},
+    {'name': 'microsoft_10_250_many_pages', 'org': 'microsoft', 'n': 10, 'm': 250,
+     'config': {'latency': 0.02, 'pad_contributors': 300}},
+    {'name': 'microsoft_20_8_secondary_limit', 'org': 'microsoft', 'n': 20, 'm': 8,
+     'config': {'latency': 0.02, 'secondary_every': 10, 'retry_after': 1}},
+    {'name': 'google_5_3_quota_reset', 'org': 'google', 'n': 5, 'm': 3,
+     'config': {'latency': 0.02, 'core_limit': 4, 'reset_seconds': 2}},
+]
+
+
+# Function to run the sync engine, returns (repos, contributors by repo rank)
+def run_sync(scenario):
+    from github_stats_app.github_session import GithubSession
+    from github_stats_app.github_rate_limit import RateLimitScheduler
+    from github_stats_app.top_dev_org_contributors import TopContributors
+
+    session = GithubSession(token='N/A', rate_limiter=RateLimitScheduler())
+    try:
+        obj = TopContributors(scenario['org'], scenario['n'], scenario['m'], session=session, backend='rest')
+        obj.check_org()
+        repos = obj.get_n_repos()
+        all_contributors = obj.get_all_contributors(repos)
+    finally:
+        session.close()
+    return repos, all_contributors
+
+
+# Function to run a scenario once against the mock server
+def run_scenario(server, scenario):
+    server.state.reset(MockGithubConfig(**scenario['config']))
+    start_time = time.perf_counter()
+    # The progress and retry messages of the fetch code are not shown
+    with contextlib.redirect_stdout(io.StringIO()):
+        repos, all_contributors = run_sync(scenario)
+    wall_time = time.perf_counter() - start_time
+
+    result = dict()
+    result['wall_time'] = round(wall_time, 3)
+    result['requests'] = server.state.requests_count
+    result['requests_per_second'] = round(server.state.requests_count / wall_time, 1)
+    result['repos'] = len(repos)
+    result['contributors'] = sum(len(contributors_data) for contributors_data in all_contributors.values())
+    result['status_counts'] = {str(status_code): count for status_code, count in sorted(server.state.status_counts.items())}
+    return result
+
+
+# Function to compare a result with its baseline, returns (change text, regressed)
+def compare(result, baseline, max_regression):
+    if baseline is None:
+        return 'no baseline', False
+    if (result['repos'], result['contributors']) != (baseline['repos'], baseline['contributors']):
+        return 'RESULTS CHANGED', True
+    change = (result['wall_time'] - baseline['wall_time']) / baseline['wall_time']
+    text = f"{change:+.1%} time, {result['requests'] - baseline['requests']:+d} requests"
+    return text, change > max_regression
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Offline benchmarks of the Github fetch code')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each scenario, the best wall time is kept')
+    parser.add_argument('--scenario', nargs='*', help='Names of the scenarios to run (default: all)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--max-regression', type=float, default=0.25, help='Slowdown against the baseline that fails the run')
+    args = parser.parse_args()
+
+    # The app is pointed at the mock server before its modules are imported
+    server = start_server()
+    os.environ['GITHUB_API_URL'] = server_url(server)
+    sys.path.append(APP_DIR)
+
+    baselines = dict()
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as baseline_file:
+            baselines = json.load(baseline_file)['scenarios']
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario['name'] in args.scenario]
+    results = dict()
+    regressed = False
+    print(f"{'Scenario':<32} {'Wall (s)':>9} {'Requests':>9} {'Req/s':>8} {'Repos':>6} {'Contribs':>9}  Change vs baseline")
+    for scenario in scenarios:
+        runs = [run_scenario(server, scenario) for run in range(max(1, args.repeat))]
+        result = min(runs, key=lambda run: run['wall_time'])
+        results[scenario['name']] = result
+        change, scenario_regressed = compare(result, baselines.get(scenario['name']), args.max_regression)
+        regressed = regressed or scenario_regressed
+        print(f"{scenario['name']:<32} {result['wall_time']:>9.3f} {result['requests']:>9} {result['requests_per_second']:>8.1f} {result['repos']:>6} {result['contributors']:>9}  {change}")
+    server.shutdown()
+
+    if args.save_baseline:
+        baselines.update(results)
+        with open(BASELINE_FILE, mode='w') as baseline_file:
+            json.dump({'python': sys.version.split()[0], 'scenarios': baselines}, baseline_file, indent=2, sort_keys=True)
+        print(f"\nBaseline written into file:\n{BASELINE_FILE}")
+    elif regressed:
+        print(f"\nERROR: Slower than the baseline by more than {args.max_regression:.0%} or results changed")
+        sys.exit(1)
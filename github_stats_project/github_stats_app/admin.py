@@ -1,3 +1,7 @@
 from django.contrib import admin
+from .models import Organization, Repository, ContributorStat
 
 # Register your models here.
+admin.site.register(Organization)
+admin.site.register(Repository)
+admin.site.register(ContributorStat)
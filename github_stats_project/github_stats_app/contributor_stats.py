@@ -0,0 +1,181 @@
+'''
+Module Description:
+
+Fallback for the repos whose contributors cannot be listed by the
+contributors endpoint. For very large repos
+/repos/{org}/{repo}/contributors answers 403 "The history or contributor
+list is too large to list contributors for this repository via the API",
+their top m contributors are taken from the contributors statistics
+instead.
+
+Github computes the statistics in the background: the endpoint answers
+202 Accepted until they are ready, then 200 with every contributor and
+their total commit count. The statistics only cover the top 100
+contributors of a repo.
+
+StatsPollSchedule plans the polling of all the affected repos at once.
+The first round of requests starts the computation for every repo, then
+the repos still answering 202 are polled again together, after
+GITHUB_STATS_POLL_DELAY seconds (default: 1) doubled after each round (at
+most 16 seconds), until GITHUB_STATS_MAX_WAIT seconds (default: 60) were
+spent waiting. The caller sends the requests of a round concurrently and
+adds the responses back until is_done().
+
+The statistics retrieved are kept in a per-process cache for
+GITHUB_STATS_CACHE_TTL seconds (default: 3600), so the computation of a
+repo is only waited on once whatever the m of the later queries. Across
+processes, the ETag cache of github_session.py revalidates the stored
+response instead.
+
+Request:
+https://api.github.com/repos/{org_name}/{repo_name}/stats/contributors
+Eg:
+https://api.github.com/repos/torvalds/linux/stats/contributors
+'''
+
+import os
+import json
+import time
+import threading
+from .result_types import ContributorResults
+
+# Constants
+STATS_POLL_DELAY = float(os.environ.get('GITHUB_STATS_POLL_DELAY', 1))
+STATS_MAX_POLL_DELAY = 16
+STATS_MAX_WAIT = float(os.environ.get('GITHUB_STATS_MAX_WAIT', 60))
+STATS_CACHE_TTL = int(os.environ.get('GITHUB_STATS_CACHE_TTL', 3600))
+# Github API only computes the statistics of the top 100 contributors
+STATS_CONTRIBUTORS_LIMIT = 100
+# Message of the contributors results of a repo too large for the contributors endpoint
+TOO_LARGE_MESSAGE = "Contributor list too large to list via the contributors endpoint"
+
+
+# Function to check if a response of the contributors endpoint is the 403 of a repo too large to list
+def is_too_large(response):
+    return response.status_code == 403 and 'too large' in response.text.lower()
+
+
+# Function to get the url of the contributors statistics of a repo
+def stats_contributors_url(base_url, org, repo_name):
+    return base_url + f"repos/{org}/{repo_name}/stats/contributors"
+
+
+# Function to get the (login_id, commit_count) of the contributors statistics, most commits first
+def parse_stats_contributors(json_data):
+    if not isinstance(json_data, list):
+        return list()
+    # Contributors whose account was deleted have no author
+    contributors = [(stat['author']['login'], stat['total']) for stat in json_data if stat.get('author')]
+    return sorted(contributors, key=lambda contributor: -contributor[1])
+
+
+# Class that keeps the contributors statistics retrieved for each repo
+class StatsCache:
+
+    def __init__(self, ttl=STATS_CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # {(org, repo_name): (fetched_at, [(login_id, commit_count), ...])}
+        self.entries = dict()
+        return
+
+    # Function to get the contributors statistics of a repo, None if not retrieved recently
+    def get(self, org, repo_name):
+        with self.lock:
+            entry = self.entries.get((org.lower(), repo_name))
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    # Function to store the contributors statistics of a repo
+    def set(self, org, repo_name, contributors):
+        with self.lock:
+            self.entries[(org.lower(), repo_name)] = (time.time(), contributors)
+        return
+
+
+# Class that plans the polling of the contributors statistics of several repos
+# The caller requests the pending repos and adds the responses back until is_done()
+class StatsPollSchedule:
+
+    def __init__(self, org, repo_names, cache=None, poll_delay=STATS_POLL_DELAY, max_wait=STATS_MAX_WAIT):
+        self.org = org
+        self.cache = cache if cache is not None else get_stats_cache()
+        self.poll_delay = poll_delay
+        self.max_wait = max_wait
+        # {repo_name: [(login_id, commit_count), ...]}
+        self.contributors = dict()
+        # {repo_name: message}
+        self.failed = dict()
+        for repo_name in repo_names:
+            cached_contributors = self.cache.get(org, repo_name)
+            if cached_contributors is not None:
+                self.contributors[repo_name] = cached_contributors
+        # Repos to request in the next round
+        self.pending = [repo_name for repo_name in dict.fromkeys(repo_names) if repo_name not in self.contributors]
+        self.rounds = 0
+        self.waited = 0.0
+        return
+
+    # Function to check if every repo was retrieved or given up
+    def is_done(self):
+        return len(self.pending) == 0
+
+    # Function to add the responses of a round of requests, in the order of the pending repos
+    def add_responses(self, responses):
+        still_pending = list()
+        for repo_name, response in zip(self.pending, responses):
+            # Statistics still being computed
+            if response.status_code == 202:
+                still_pending.append(repo_name)
+            # 204 for a repo without any commit
+            elif response.status_code in (200, 204):
+                contributors = parse_stats_contributors(json.loads(response.text)) if response.status_code == 200 else list()
+                self.contributors[repo_name] = contributors
+                self.cache.set(self.org, repo_name, contributors)
+            else:
+                print("Something wrong with Get Contributors Statistics Request")
+                print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+                self.failed[repo_name] = f"Unable to retrieve the contributors statistics (Status Code: {response.status_code})"
+        self.pending = still_pending
+        self.rounds += 1
+        return
+
+    # Function to get the seconds to wait before the next round, the pending repos are given up once max_wait is spent
+    def next_delay(self):
+        delay = min(self.poll_delay * 2 ** (self.rounds - 1), STATS_MAX_POLL_DELAY)
+        if self.waited + delay > self.max_wait:
+            for repo_name in self.pending:
+                self.failed[repo_name] = f"Contributors statistics still being computed by Github after {round(self.waited)} seconds, try again later"
+            self.pending = list()
+            return 0
+        self.waited += delay
+        return delay
+
+    # Function to get the top m contributors of a repo from its statistics
+    def results(self, repo_name, m):
+        contributors_data = ContributorResults()
+        if repo_name in self.failed:
+            contributors_data.add_message(self.failed[repo_name])
+            return contributors_data
+        contributors = self.contributors.get(repo_name, list())
+        for login_id, commit_count in contributors[:m]:
+            contributors_data.append(login_id, commit_count)
+        if m > STATS_CONTRIBUTORS_LIMIT and len(contributors) >= STATS_CONTRIBUTORS_LIMIT:
+            contributors_data.add_message(f"M={m} is too large for this repo. A Maximum of the top {STATS_CONTRIBUTORS_LIMIT} contributors can be retrieved using the API")
+        return contributors_data
+
+
+# Per-process statistics cache shared by all the queries
+_shared_stats_cache = None
+_shared_stats_cache_lock = threading.Lock()
+
+
+# Function to get (and lazily create) the per-process statistics cache
+def get_stats_cache():
+    global _shared_stats_cache
+    if _shared_stats_cache is None:
+        with _shared_stats_cache_lock:
+            if _shared_stats_cache is None:
+                _shared_stats_cache = StatsCache()
+    return _shared_stats_cache
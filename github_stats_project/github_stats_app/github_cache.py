@@ -0,0 +1,180 @@
+'''
+Module Description:
+
+Persistent conditional-request cache for Github API V3 responses.
+
+Every 200 response that carries an ETag or a Last-Modified header is
+stored in a SQLite file under a configurable directory. The next request
+for the same URL is sent with If-None-Match / If-Modified-Since and, when
+Github answers 304 Not Modified (which does not count against the rate
+limit), the stored body is served instead.
+
+The cache holds at most max_entries responses. The least recently used
+ones are evicted first. Hit and miss counters are kept per cache object.
+
+Configuration (environment variables):
+GITHUB_CACHE_DIR - Directory of the cache file
+(default: ~/.cache/github_stats, 'N/A' disables the cache)
+GITHUB_CACHE_MAX_ENTRIES - Max number of cached responses (default: 5000)
+'''
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from requests.structures import CaseInsensitiveDict
+
+# Constants
+CACHE_FILE_NAME = 'github_responses.sqlite3'
+if 'GITHUB_CACHE_DIR' in os.environ:
+    CACHE_DIR = os.environ['GITHUB_CACHE_DIR']
+else:
+    CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'github_stats')
+CACHE_MAX_ENTRIES = int(os.environ.get('GITHUB_CACHE_MAX_ENTRIES', 5000))
+# Requests that are never cached (the rate limit endpoint is free and always changing)
+UNCACHED_PATHS = ('rate_limit',)
+
+
+# Class that mimics the parts of a response used by the callers
+class CachedResponse:
+
+    def __init__(self, url, status_code, text, headers):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers
+        self.from_cache = True
+        return
+
+    def json(self):
+        return json.loads(self.text)
+
+
+# Class that stores Github API responses on disk and revalidates them with Github
+class ResponseCache:
+
+    def __init__(self, directory=CACHE_DIR, max_entries=CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.connection = sqlite3.connect(os.path.join(directory, CACHE_FILE_NAME), check_same_thread=False, timeout=30)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "body TEXT NOT NULL, headers TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.connection.commit()
+        return
+
+    # Function to check if responses of a url can be cached
+    def is_cacheable(self, url):
+        for path in UNCACHED_PATHS:
+            if path in url:
+                return False
+        return True
+
+    # Function to get the conditional headers to send for a url
+    def conditional_headers(self, url):
+        headers = dict()
+        if not self.is_cacheable(url):
+            return headers
+        with self.lock:
+            row = self.connection.execute("SELECT etag, last_modified FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is not None:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    # Function to serve a stored body on 304 and store new 200 responses
+    def handle_response(self, url, response):
+        if not self.is_cacheable(url):
+            return response
+
+        # Not modified so the stored body is still valid
+        if response.status_code == 304:
+            with self.lock:
+                row = self.connection.execute("SELECT body, headers FROM responses WHERE url = ?", (url,)).fetchone()
+                if row is not None:
+                    self.connection.execute("UPDATE responses SET last_used = ? WHERE url = ?", (time.time(), url))
+                    self.connection.commit()
+                    self.hits += 1
+            if row is None:
+                return response
+            body, stored_headers = row
+            headers = CaseInsensitiveDict(json.loads(stored_headers))
+            # Fresh headers (eg: rate limit info) take priority over the stored ones
+            headers.update(response.headers)
+            return CachedResponse(url, 200, body, headers)
+
+        with self.lock:
+            self.misses += 1
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.store(url, etag, last_modified, response.text, dict(response.headers))
+        return response
+
+    # Function to store a response and evict the least recently used ones
+    def store(self, url, etag, last_modified, body, headers):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, headers, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, json.dumps(headers), time.time())
+            )
+            entries_count = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if entries_count > self.max_entries:
+                extra_count = entries_count - self.max_entries
+                self.connection.execute(
+                    "DELETE FROM responses WHERE url IN (SELECT url FROM responses ORDER BY last_used ASC LIMIT ?)",
+                    (extra_count,)
+                )
+                self.evictions += extra_count
+            self.connection.commit()
+        return
+
+    # Function to remove every stored response
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+        return
+
+    # Function to get the hit and miss counters
+    def stats(self):
+        with self.lock:
+            entries_count = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries_count,
+        }
+
+
+# Per-process cache shared by all sessions
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+# Function to get (and lazily create) the per-process cache, None if disabled
+def get_response_cache():
+    global _shared_cache
+    if CACHE_DIR == 'N/A':
+        return None
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = ResponseCache()
+    return _shared_cache
@@ -0,0 +1,79 @@
+'''
+Module Description:
+
+Single-flight coalescing of identical concurrent Github API requests for
+the sessions of github_session.py.
+
+When several views ask for the same url at the same time (eg: two
+browser sessions POSTing /repos for the same org), only the first caller
+sends the request. The other callers wait on the same in-flight fetch
+and all get its response, instead of each sending a duplicate request
+against the rate limit. Once the fetch is over the url is sent again by
+the next caller (no caching here, see github_cache.py for that).
+
+The in-flight fetches are concurrent.futures.Future objects, so the
+callers can wait on them from any thread (views, jobs and worker pools).
+
+Only GET requests are coalesced. The key of a request is the url along
+with the token it is sent with.
+'''
+
+import threading
+from concurrent.futures import Future
+
+
+# Class that keeps the in-flight fetches by key
+class RequestCoalescer:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # {key: Future of the response}
+        self.in_flight = dict()
+        # Requests asked for and requests answered by a fetch already in flight
+        self.requests_count = 0
+        self.coalesced_count = 0
+        return
+
+    # Function to join the fetch of a key, returns (future, is_leader)
+    # The leader sends the request and hands its result to finish(), the other callers wait on the future
+    def join(self, key):
+        with self.lock:
+            self.requests_count += 1
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced_count += 1
+                return future, False
+            future = Future()
+            self.in_flight[key] = future
+        return future, True
+
+    # Function to hand the response (or the error) of a fetch to every caller waiting on it
+    def finish(self, key, future, response=None, error=None):
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(response)
+        return
+
+    # Function to get the number of requests asked for and coalesced
+    def stats(self):
+        with self.lock:
+            return {'requests': self.requests_count, 'coalesced': self.coalesced_count, 'in_flight': len(self.in_flight)}
+
+
+# Per-process coalescer shared by all sessions
+_shared_coalescer = None
+_shared_coalescer_lock = threading.Lock()
+
+
+# Function to get (and lazily create) the per-process coalescer
+def get_request_coalescer():
+    global _shared_coalescer
+    if _shared_coalescer is None:
+        with _shared_coalescer_lock:
+            if _shared_coalescer is None:
+                _shared_coalescer = RequestCoalescer()
+    return _shared_coalescer
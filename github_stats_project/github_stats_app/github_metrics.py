@@ -0,0 +1,234 @@
+'''
+Module Description:
+
+Metrics of the HTTP layer in github_session.py, the transport used by
+TopContributors and the CLI script.
+
+Per endpoint (rate_limit, orgs, search_repositories, repos_contributors,
+graphql, ...):
+github_requests_total{endpoint, status} - Requests sent, retries included
+github_request_duration_seconds{endpoint} - Histogram of the latency of the requests
+github_response_bytes_total{endpoint} - Bytes of response body received
+github_cache_hits_total{endpoint} - 304 Not Modified responses served from the ETag cache
+github_retries_total{endpoint} - Requests retried after a rate limit error
+github_coalesced_total{endpoint} - Requests answered by an identical request already in flight
+(endpoint="repos_job" / "prefetch_job" for the views joining a job already queued or running)
+
+Per rate limit resource (core, search, graphql):
+github_rate_limit_used_total{resource} - Requests counted against the quota (304 responses are free)
+github_rate_limit_remaining{resource} - Quota left as last seen in the X-RateLimit-Remaining header
+github_rate_limit_wait_seconds_total{resource} - Seconds requests were held back by the rate limit scheduler
+
+The Django app exposes them on /metrics in the Prometheus text format.
+The CLI times its phases (org check, repo search, contributors) with
+phase() and prints the breakdown at the end of a run.
+'''
+
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from .github_rate_limit import get_resource
+
+# Constants
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Function to get the endpoint name of a url (eg: repos_contributors for /repos/{org}/{repo}/contributors)
+def get_endpoint(url):
+    path = [part for part in urlparse(url).path.split('/') if part]
+    if len(path) == 0:
+        return 'root'
+    if path[0] == 'repos':
+        return '_'.join(['repos'] + path[3:])
+    if path[0] == 'orgs':
+        return '_'.join(['orgs'] + path[2:])
+    if path[0] == 'search' and len(path) > 1:
+        return f'search_{path[1]}'
+    if path[0] in ('rate_limit', 'graphql'):
+        return path[0]
+    return 'other'
+
+
+# Class that keeps the latency histogram of one endpoint
+class LatencyHistogram:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # Requests per bucket, the last one for the requests slower than every bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        return
+
+    # Function to add the latency of one request
+    def observe(self, seconds):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += seconds
+        self.count += 1
+        return
+
+    # Function to get the (upper bound, cumulative count) of every bucket, +Inf last
+    def cumulative(self):
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        total = 0
+        cumulative_counts = list()
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            cumulative_counts.append((bound, total))
+        return cumulative_counts
+
+
+# Class that holds the metrics of the HTTP layer
+class HttpMetrics:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+        return
+
+    # Function to clear every metric
+    def reset(self):
+        with self.lock:
+            # {(endpoint, status): count}
+            self.requests = dict()
+            # {endpoint: LatencyHistogram}
+            self.latencies = dict()
+            self.response_bytes = dict()
+            self.cache_hits = dict()
+            self.retries = dict()
+            self.coalesced = dict()
+            # {resource: value}
+            self.rate_used = dict()
+            self.rate_remaining = dict()
+            self.rate_wait_seconds = dict()
+            # Per-phase totals: {phase: {'seconds', 'requests', 'bytes', 'cache_hits'}}
+            self.phases = OrderedDict()
+        return
+
+    # Function to record one request sent and its response
+    def record_request(self, url, response, seconds):
+        endpoint = get_endpoint(url)
+        resource = get_resource(url)
+        body_size = len(response.content)
+        with self.lock:
+            key = (endpoint, response.status_code)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latencies.setdefault(endpoint, LatencyHistogram()).observe(seconds)
+            self.response_bytes[endpoint] = self.response_bytes.get(endpoint, 0) + body_size
+            if resource is not None and response.status_code != 304:
+                self.rate_used[resource] = self.rate_used.get(resource, 0) + 1
+            if 'X-RateLimit-Remaining' in response.headers:
+                resource = response.headers.get('X-RateLimit-Resource') or resource
+                try:
+                    self.rate_remaining[resource] = int(response.headers['X-RateLimit-Remaining'])
+                except ValueError:
+                    pass
+        return
+
+    # Function to record a response served from the ETag cache
+    def record_cache_hit(self, url):
+        endpoint = get_endpoint(url)
+        with self.lock:
+            self.cache_hits[endpoint] = self.cache_hits.get(endpoint, 0) + 1
+        return
+
+    # Function to record a request retried after a rate limit error
+    def record_retry(self, url):
+        endpoint = get_endpoint(url)
+        with self.lock:
+            self.retries[endpoint] = self.retries.get(endpoint, 0) + 1
+        return
+
+    # Function to record a request answered by an identical request already in flight
+    def record_coalesced(self, url, endpoint=None):
+        endpoint = endpoint if endpoint is not None else get_endpoint(url)
+        with self.lock:
+            self.coalesced[endpoint] = self.coalesced.get(endpoint, 0) + 1
+        return
+
+    # Function to record the seconds a request was held back by the rate limit scheduler
+    def record_wait(self, url, seconds):
+        resource = get_resource(url) or 'core'
+        with self.lock:
+            self.rate_wait_seconds[resource] = self.rate_wait_seconds.get(resource, 0.0) + seconds
+        return
+
+    # Function to get the (requests, bytes, cache hits) recorded so far
+    def totals(self):
+        with self.lock:
+            return sum(self.requests.values()), sum(self.response_bytes.values()), sum(self.cache_hits.values())
+
+    # Context manager that adds the time and requests of a block to a phase
+    @contextmanager
+    def phase(self, name):
+        start_time = time.perf_counter()
+        start_requests, start_bytes, start_cache_hits = self.totals()
+        try:
+            yield
+        finally:
+            end_requests, end_bytes, end_cache_hits = self.totals()
+            with self.lock:
+                phase_stats = self.phases.setdefault(name, {'seconds': 0.0, 'requests': 0, 'bytes': 0, 'cache_hits': 0})
+                phase_stats['seconds'] += time.perf_counter() - start_time
+                phase_stats['requests'] += end_requests - start_requests
+                phase_stats['bytes'] += end_bytes - start_bytes
+                phase_stats['cache_hits'] += end_cache_hits - start_cache_hits
+        return
+
+    # Function to get the metrics in the Prometheus text format
+    def render_prometheus(self):
+        lines = list()
+        with self.lock:
+            lines.append('# HELP github_requests_total Requests sent to the Github API, retries included.')
+            lines.append('# TYPE github_requests_total counter')
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'github_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+            lines.append('# HELP github_request_duration_seconds Latency of the requests sent to the Github API.')
+            lines.append('# TYPE github_request_duration_seconds histogram')
+            for endpoint, histogram in sorted(self.latencies.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(f'github_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'github_request_duration_seconds_sum{{endpoint="{endpoint}"}} {round(histogram.sum, 6)}')
+                lines.append(f'github_request_duration_seconds_count{{endpoint="{endpoint}"}} {histogram.count}')
+
+            counters = [
+                ('github_response_bytes_total', 'Bytes of response body received from the Github API.', 'endpoint', self.response_bytes),
+                ('github_cache_hits_total', 'Responses served from the ETag cache.', 'endpoint', self.cache_hits),
+                ('github_retries_total', 'Requests retried after a rate limit error.', 'endpoint', self.retries),
+                ('github_coalesced_total', 'Requests answered by an identical request already in flight.', 'endpoint', self.coalesced),
+                ('github_rate_limit_used_total', 'Requests counted against the rate limit quota.', 'resource', self.rate_used),
+                ('github_rate_limit_wait_seconds_total', 'Seconds requests were held back by the rate limit scheduler.', 'resource', self.rate_wait_seconds),
+            ]
+            for name, help_text, label, values in counters:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for key, value in sorted(values.items()):
+                    lines.append(f'{name}{{{label}="{key}"}} {round(value, 6)}')
+
+            lines.append('# HELP github_rate_limit_remaining Rate limit quota left as last seen in the response headers.')
+            lines.append('# TYPE github_rate_limit_remaining gauge')
+            for resource, remaining in sorted(self.rate_remaining.items()):
+                lines.append(f'github_rate_limit_remaining{{resource="{resource}"}} {remaining}')
+        return '\n'.join(lines) + '\n'
+
+
+# Per-process metrics shared by all sessions
+_shared_metrics = None
+_shared_metrics_lock = threading.Lock()
+
+
+# Function to get (and lazily create) the per-process metrics
+def get_metrics():
+    global _shared_metrics
+    if _shared_metrics is None:
+        with _shared_metrics_lock:
+            if _shared_metrics is None:
+                _shared_metrics = HttpMetrics()
+    return _shared_metrics
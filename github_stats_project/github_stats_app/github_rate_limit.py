@@ -0,0 +1,220 @@
+'''
+Module Description:
+
+Header-driven rate limit scheduler for the Github API V3.
+
+Github sends the rate limit state of the resource a request was counted
+against with every response:
+X-RateLimit-Resource - core, search, graphql, ...
+X-RateLimit-Limit - Max number of requests in the window
+X-RateLimit-Remaining - Requests left in the window
+X-RateLimit-Reset - Epoch seconds when the window resets
+Retry-After - Seconds to wait (sent with secondary rate limit errors)
+
+The scheduler keeps one bucket per resource (search and core are paced
+separately). Each bucket is a token bucket that smooths bursts so the
+secondary rate limits are not triggered, plus the primary quota seen in
+the headers: once the remaining quota is used up, requests wait for the
+reset instead of failing.
+
+403 / 429 replies caused by a rate limit are retried with a backoff
+(Retry-After, the reset time or an exponential delay) instead of ending
+the fetch loops with truncated results.
+
+With a token pool (token_pool.py) the buckets are scaled by the number
+of tokens and the primary quota is the one of the whole pool, so one
+used up token does not hold back requests the other tokens can send.
+
+Configuration (environment variables):
+GITHUB_RATE_LIMIT_MAX_WAIT - Max seconds a request may be held back
+(default: 120). Longer waits are not made and the request is sent as is.
+'''
+
+import os
+import time
+import threading
+from .token_pool import get_token_pool
+
+# Constants
+# Token bucket (burst size, requests per second) of each resource
+BUCKET_SETTINGS = {
+    'core': (100, 15.0),
+    'search': (10, 0.5),
+    'graphql': (20, 5.0),
+}
+MAX_WAIT_SECONDS = float(os.environ.get('GITHUB_RATE_LIMIT_MAX_WAIT', 120))
+MAX_RETRIES = 3
+# First backoff delay for secondary rate limit errors without Retry-After
+SECONDARY_BACKOFF_SECONDS = 5
+# Requests that are not counted against any resource
+UNLIMITED_PATHS = ('rate_limit',)
+
+
+# Function to get the resource a url is counted against
+def get_resource(url):
+    for path in UNLIMITED_PATHS:
+        if path in url:
+            return None
+    if '/search/' in url:
+        return 'search'
+    if url.endswith('/graphql'):
+        return 'graphql'
+    return 'core'
+
+
+# Class that paces the requests of one rate limit resource
+class ResourceBucket:
+
+    def __init__(self, burst, rate):
+        # Token bucket
+        self.burst = burst
+        self.rate = rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # Primary quota last seen in the response headers
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        return
+
+    # Function to reserve one request and get the seconds to wait before sending it
+    def reserve(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        delay = 0.0
+        if self.tokens < 0:
+            delay = -self.tokens / self.rate
+
+        # Primary quota used up: wait for the reset
+        if self.remaining is not None and self.reset is not None:
+            if self.remaining <= 0 and self.reset > time.time():
+                delay = max(delay, self.reset - time.time() + 1)
+            self.remaining -= 1
+        return delay
+
+    # Function to store the quota sent in the response headers
+    def update(self, limit, remaining, reset):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+        return
+
+
+# Class that schedules requests using the rate limit headers of every response
+class RateLimitScheduler:
+
+    def __init__(self, max_wait=MAX_WAIT_SECONDS, max_retries=MAX_RETRIES, scale=1):
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        # Number of tokens the requests are spread over
+        self.scale = scale
+        self.buckets = dict()
+        for resource, (burst, rate) in BUCKET_SETTINGS.items():
+            self.buckets[resource] = ResourceBucket(burst * scale, rate * scale)
+        self.waits_count = 0
+        self.retries_count = 0
+        self.lock = threading.Lock()
+        return
+
+    # Function to get the bucket of a resource
+    def get_bucket(self, resource):
+        if resource not in self.buckets:
+            burst, rate = BUCKET_SETTINGS['core']
+            self.buckets[resource] = ResourceBucket(burst * self.scale, rate * self.scale)
+        return self.buckets[resource]
+
+    # Function to get the seconds to wait before sending a request to a url
+    def acquire(self, url):
+        resource = get_resource(url)
+        if resource is None:
+            return 0.0
+        with self.lock:
+            delay = self.get_bucket(resource).reserve()
+            if delay > self.max_wait:
+                # Too long to hold the request back, let Github answer it
+                delay = 0.0
+            if delay > 0:
+                self.waits_count += 1
+        return delay
+
+    # Function to store the rate limit headers of a response
+    def record(self, url, response):
+        headers = response.headers
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        resource = headers.get('X-RateLimit-Resource') or get_resource(url)
+        if resource is None:
+            return
+        try:
+            limit = int(headers['X-RateLimit-Limit'])
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset = int(headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+        with self.lock:
+            self.get_bucket(resource).update(limit, remaining, reset)
+        return
+
+    # Function to replace the quota of a resource (eg: with the quota of a whole token pool)
+    def set_quota(self, resource, limit, remaining, reset):
+        with self.lock:
+            self.get_bucket(resource).update(limit, remaining, reset)
+        return
+
+    # Function to get the seconds to wait before retrying a rate limited request, None if no retry
+    def retry_delay(self, url, response, attempt):
+        self.record(url, response)
+        if response.status_code not in (403, 429) or attempt >= self.max_retries:
+            return None
+
+        headers = response.headers
+        delay = None
+        if 'Retry-After' in headers:
+            try:
+                delay = float(headers['Retry-After'])
+            except ValueError:
+                delay = None
+        if delay is None and headers.get('X-RateLimit-Remaining') == '0':
+            try:
+                delay = float(headers['X-RateLimit-Reset']) - time.time() + 1
+            except (KeyError, ValueError):
+                delay = None
+        if delay is None and 'rate limit' in response.text.lower():
+            # Secondary rate limit without a Retry-After header
+            delay = SECONDARY_BACKOFF_SECONDS * (2 ** attempt)
+
+        # Not a rate limit error or too long to wait
+        if delay is None or delay > self.max_wait:
+            return None
+        with self.lock:
+            self.retries_count += 1
+        return max(delay, 0.0)
+
+    # Function to get the last seen limit and remaining count of a resource
+    def last_seen(self, resource='core'):
+        rate_limit = dict()
+        with self.lock:
+            bucket = self.buckets.get(resource)
+            if bucket is not None and bucket.limit is not None:
+                rate_limit["rate_limit"] = bucket.limit
+                rate_limit["rate_remaining"] = max(bucket.remaining, 0)
+                rate_limit["rate_reset"] = bucket.reset
+        return rate_limit
+
+
+# Per-process scheduler shared by all sessions
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+# Function to get (and lazily create) the per-process scheduler
+def get_rate_limiter():
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        with _shared_scheduler_lock:
+            if _shared_scheduler is None:
+                token_pool = get_token_pool()
+                _shared_scheduler = RateLimitScheduler(scale=token_pool.size() if token_pool is not None else 1)
+    return _shared_scheduler
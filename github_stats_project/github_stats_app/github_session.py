@@ -0,0 +1,298 @@
+'''
+Module Description:
+
+Shared HTTP transport for the Github API V3 used by the TopContributors
+class of the Django helper (top_dev_org_contributors.py in this app) and
+by the CLI script in the root of the repository.
+
+All requests go through a single requests.Session whose connection pool
+keeps the TCP + TLS connection to api.github.com alive between calls, so
+paging through search results or contributor lists does not pay a new
+handshake for every page.
+
+A per-process singleton is available through get_session() so that
+concurrent Django views reuse the same warm connections.
+
+The session can revalidate responses with the on-disk ETag cache in
+github_cache.py and pace / retry requests with the header-driven rate
+limit scheduler in github_rate_limit.py (both used by default by
+get_session()).
+
+The views and jobs of the Django app, the CLI script and the batch mode
+all share the one get_session() session from worker threads. An asyncio
+engine on its own async client was tried and dropped: it kept a second
+copy of the fetch code and, under the sync Django views, gained nothing
+over the pooled session used from threads.
+
+With a token pool (token_pool.py, GITHUB_PERSONAL_TOKENS or
+GITHUB_TOKENS_FILE) every request is sent with the token of the pool
+that has the most quota left, and a request refused because its token
+is used up is retried at once with another token.
+
+Every request sent is recorded in the per-endpoint metrics of
+github_metrics.py (counts, latency, bytes, cache hits and rate limit
+use) when the session is given one (get_session() does).
+
+Identical GET requests sent at the same time by several callers (eg:
+concurrent views for the same org) are coalesced into one when the
+session is given the shared coalescer of github_coalescer.py
+(get_session() does).
+
+CountingSession counts the requests one caller sends through a session,
+for callers with a request budget (eg: the contributors prefetch of the
+views).
+
+Header Info included if we have access to a token:
+key: Authorization
+value: Token {Token_Value}
+'''
+
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from .github_cache import get_response_cache
+from .github_rate_limit import get_rate_limiter, get_resource
+from .token_pool import get_token_pool
+from .github_metrics import get_metrics
+from .github_coalescer import get_request_coalescer
+
+# Constants
+# Root of the Github API, GITHUB_API_URL points the requests at a stand-in server (eg: benchmarks/mock_github_server.py)
+BASE_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com/')
+# Number of host pools kept by the adapter and connections kept per host
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+# Seconds to wait for api.github.com before giving up on a request
+REQUEST_TIMEOUT = 30
+if 'GITHUB_PERSONAL_TOKEN' in os.environ:
+    TOKEN = os.environ['GITHUB_PERSONAL_TOKEN']
+else:
+    TOKEN = 'N/A'
+
+
+# Class that wraps a pooled keep-alive session to the Github API
+class GithubSession:
+
+    def __init__(self, token=TOKEN, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, timeout=REQUEST_TIMEOUT, cache=None, rate_limiter=None, token_pool=None, metrics=None, coalescer=None):
+        self.token = token
+        # Conditional-request cache (github_cache.ResponseCache), None if disabled
+        self.cache = cache
+        # Rate limit scheduler (github_rate_limit.RateLimitScheduler), None if disabled
+        self.rate_limiter = rate_limiter
+        # Pool of tokens (token_pool.TokenPool) picked from for each request, None to send the single token
+        self.token_pool = token_pool
+        # Metrics of the requests sent (github_metrics.HttpMetrics), None if disabled
+        self.metrics = metrics
+        # Single-flight coalescer of identical concurrent requests (github_coalescer.RequestCoalescer), None if disabled
+        self.coalescer = coalescer
+        if token_pool is not None:
+            self.token = token_pool.tokens[0].token
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        # Sized connection pool shared by every request of this session
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(self.default_headers())
+        return
+
+    # Function to get the headers sent with every request of this session
+    def default_headers(self):
+        headers = {
+            'Accept': 'application/vnd.github.v3+json',
+            'Connection': 'keep-alive',
+        }
+        # Adding Personal Access Github Token if available (with a pool it is picked for each request)
+        if self.token != 'N/A' and self.token_pool is None:
+            headers['Authorization'] = f'Token {self.token}'
+        return headers
+
+    # Function to pick the token of the pool to send a request with, None without a pool
+    def select_token(self, url):
+        if self.token_pool is None:
+            return None
+        return self.token_pool.acquire(get_resource(url) or 'core')
+
+    # Function to store the quota seen in the response to a request sent with a token of the pool
+    def record_token(self, token, url, response):
+        if self.token_pool is not None and token is not None:
+            self.token_pool.record(token, get_resource(url) or 'core', response)
+        return
+
+    # Function to build the headers of one request
+    def prepare_headers(self, method, url, headers=None, token=None):
+        request_headers = dict(headers) if headers else dict()
+        if token is not None:
+            request_headers['Authorization'] = f'Token {token}'
+        # Only GET requests are cached
+        if self.cache is not None and method == 'GET':
+            request_headers.update(self.cache.conditional_headers(url))
+        return request_headers
+
+    # Function to get the seconds to wait before sending a request
+    def request_delay(self, url):
+        if self.rate_limiter is None:
+            return 0.0
+        delay = self.rate_limiter.acquire(url)
+        if self.metrics is not None and delay > 0:
+            self.metrics.record_wait(url, delay)
+        return delay
+
+    # Function to record a request sent and the seconds its response took
+    def record_response(self, url, response, seconds):
+        if self.metrics is not None:
+            self.metrics.record_request(url, response, seconds)
+        return
+
+    # Function to record a request about to be retried after waiting delay seconds
+    def record_retry(self, url, delay):
+        if self.metrics is not None:
+            self.metrics.record_retry(url)
+            if delay > 0:
+                self.metrics.record_wait(url, delay)
+        return
+
+    # Function to get the seconds to wait before retrying a request, None if no retry
+    def retry_delay(self, url, response, attempt):
+        delay = None
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.retry_delay(url, response, attempt)
+
+        resource = get_resource(url)
+        if self.token_pool is not None and resource is not None:
+            # The scheduler waits on the quota of the whole pool, not the one of the token used
+            quota = self.token_pool.quota(resource)
+            if quota is not None and self.rate_limiter is not None:
+                self.rate_limiter.set_quota(resource, *quota)
+            # Token used up: retried at once with another token of the pool
+            if response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0':
+                if attempt < self.token_pool.size() and self.token_pool.has_available(resource):
+                    print("Github API token used up, retrying with another token")
+                    self.record_retry(url, 0.0)
+                    return 0.0
+
+        if delay is not None:
+            print(f"Github API rate limit hit, retrying in {round(delay, 1)} seconds")
+            self.record_retry(url, delay)
+        return delay
+
+    # Function to get the coalescing key of a request, None if the request is not coalesced
+    def coalesce_key(self, method, url, headers=None):
+        # Requests with their own headers may not get the same response
+        if self.coalescer is None or method != 'GET' or headers:
+            return None
+        token = self.token if self.token_pool is None else id(self.token_pool)
+        return (token, url)
+
+    # Function to record a request answered by a fetch already in flight
+    def record_coalesced(self, url):
+        if self.metrics is not None:
+            self.metrics.record_coalesced(url)
+        return
+
+    # Function to post-process the response of one request
+    def process_response(self, method, url, response):
+        if self.cache is not None and method == 'GET':
+            sent_status_code = response.status_code
+            response = self.cache.handle_response(url, response)
+            # 304 Not Modified answered with the stored body
+            if self.metrics is not None and sent_status_code == 304 and response.status_code == 200:
+                self.metrics.record_cache_hit(url)
+        return response
+
+    # Function to send a request, or to wait on the same request already in flight
+    def request(self, method, url, headers=None, **kwargs):
+        key = self.coalesce_key(method, url, headers)
+        if key is None:
+            return self.send(method, url, headers=headers, **kwargs)
+        future, is_leader = self.coalescer.join(key)
+        if not is_leader:
+            self.record_coalesced(url)
+            return future.result()
+        try:
+            response = self.send(method, url, headers=headers, **kwargs)
+        except BaseException as e:
+            self.coalescer.finish(key, future, error=e)
+            raise
+        self.coalescer.finish(key, future, response)
+        return response
+
+    # Function to send a request over the pooled connections
+    def send(self, method, url, headers=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            delay = self.request_delay(url)
+            if delay > 0:
+                time.sleep(delay)
+            token = self.select_token(url)
+            start_time = time.perf_counter()
+            response = self.session.request(method, url, headers=self.prepare_headers(method, url, headers, token), **kwargs)
+            self.record_response(url, response, time.perf_counter() - start_time)
+            self.record_token(token, url, response)
+            delay = self.retry_delay(url, response, attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+            attempt += 1
+        return self.process_response(method, url, response)
+
+    # Function to send a GET request
+    def get(self, url, headers=None, **kwargs):
+        return self.request('GET', url, headers=headers, **kwargs)
+
+    # Function to send a POST request (eg: Github API V4 GraphQL queries)
+    def post(self, url, headers=None, **kwargs):
+        return self.request('POST', url, headers=headers, **kwargs)
+
+    # Function to release the pooled connections
+    def close(self):
+        self.session.close()
+        return
+
+
+# Class that sends the requests of one caller through a session and counts them (eg: against a request budget)
+class CountingSession:
+
+    def __init__(self, session):
+        self.session = session
+        self.token = session.token
+        self.rate_limiter = session.rate_limiter
+        # Requests sent through this object, the retries made by the session not included
+        self.requests_count = 0
+        self.lock = threading.Lock()
+        return
+
+    # Function to count one request
+    def count_request(self):
+        with self.lock:
+            self.requests_count += 1
+        return
+
+    # Function to send a GET request
+    def get(self, url, headers=None, **kwargs):
+        self.count_request()
+        return self.session.get(url, headers=headers, **kwargs)
+
+    # Function to send a POST request
+    def post(self, url, headers=None, **kwargs):
+        self.count_request()
+        return self.session.post(url, headers=headers, **kwargs)
+
+
+# Per-process session shared by all TopContributors objects
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+# Function to get (and lazily create) the per-process session
+def get_session():
+    global _shared_session
+    if _shared_session is None:
+        with _shared_session_lock:
+            if _shared_session is None:
+                _shared_session = GithubSession(cache=get_response_cache(), rate_limiter=get_rate_limiter(), token_pool=get_token_pool(), metrics=get_metrics(), coalescer=get_request_coalescer())
+    return _shared_session
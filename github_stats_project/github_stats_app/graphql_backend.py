@@ -0,0 +1,192 @@
+'''
+Module Description:
+
+Github API V4 (GraphQL) backend for the repository retrieval of
+TopContributors (top_dev_org_contributors.py).
+
+The REST search returns full repository objects when only the name, the
+forks count and the last push time are kept. The GraphQL queries below
+ask for those fields only.
+
+The top repos are found with search(... sort:forks) rather than with
+organization.repositories, as the repositories connection can only be
+ordered by creation, update or push time, name or stars, not by forks
+count.
+
+The incremental refresh (snapshots.py) reuses the contributors of the
+repos not pushed to since the snapshot. As the last push times in the
+search results come from the search index, which can lag behind the
+pushes, the repos about to be reused have their last push time looked
+up live. Those lookups are batched into one request per
+REPOS_BATCH_SIZE repos by giving each of them an alias (repo_0, repo_1,
+...).
+
+The backend is selected with the backend argument of the classes or with
+the environment variable GITHUB_API_BACKEND=graphql (default: rest).
+The GraphQL API needs a Personal Access Token, without one the classes
+fall back to the REST backend.
+
+Results have the same shape as the ones of the REST backend.
+
+Requests:
+
+1. To get the repositories of an organization sorted by forks count:
+POST https://api.github.com/graphql
+query($search_query: String!, $first: Int!, $after: String) {
+  search(query: $search_query, type: REPOSITORY, first: $first, after: $after) {
+    repositoryCount
+    pageInfo { hasNextPage endCursor }
+    nodes { ... on Repository { name forkCount pushedAt } }
+  }
+}
+with search_query = "user:{org_name} sort:forks"
+
+2. To get the details of several repositories in one request:
+POST https://api.github.com/graphql
+query($owner: String!, $name_0: String!, $name_1: String!) {
+  repo_0: repository(owner: $owner, name: $name_0) { name forkCount pushedAt }
+  repo_1: repository(owner: $owner, name: $name_1) { name forkCount pushedAt }
+}
+'''
+
+import os
+import json
+from collections import OrderedDict
+from .github_session import BASE_URL
+from .page_planner import plan_pages, SEARCH_RESULTS_LIMIT
+from .result_types import RepoStat, RepoResults
+
+# Constants
+GRAPHQL_URL = BASE_URL + 'graphql'
+if 'GITHUB_API_BACKEND' in os.environ:
+    API_BACKEND = os.environ['GITHUB_API_BACKEND']
+else:
+    API_BACKEND = 'rest'
+# Max number of aliased repository lookups sent in one request
+REPOS_BATCH_SIZE = 50
+
+SEARCH_REPOS_QUERY = '''
+query($search_query: String!, $first: Int!, $after: String) {
+  search(query: $search_query, type: REPOSITORY, first: $first, after: $after) {
+    repositoryCount
+    pageInfo { hasNextPage endCursor }
+    nodes { ... on Repository { name forkCount pushedAt } }
+  }
+}
+'''
+
+
+# Function to check if the GraphQL backend can be used by a session
+def use_graphql(backend, session):
+    if backend != 'graphql':
+        return False
+    if session.token == 'N/A':
+        print("The Github GraphQL API needs a Personal Access Token, using the REST API instead")
+        return False
+    return True
+
+
+# Function to build the query (and its variables) that looks up several repos at once
+def build_repos_details_query(org, repo_names):
+    variables = {'owner': org}
+    arguments = ['$owner: String!']
+    lookups = list()
+    for index, repo_name in enumerate(repo_names):
+        variables[f'name_{index}'] = repo_name
+        arguments.append(f'$name_{index}: String!')
+        lookups.append(f'  repo_{index}: repository(owner: $owner, name: $name_{index}) {{ name forkCount pushedAt }}')
+    query = 'query(' + ', '.join(arguments) + ') {\n' + '\n'.join(lookups) + '\n}'
+    return query, variables
+
+
+# Function to load the data of a GraphQL response, None if the request failed
+def load_graphql_response(response):
+    if response.status_code != 200:
+        print("Something wrong with GraphQL Request")
+        print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+        return None
+    json_data = json.loads(response.text)
+    if json_data.get('errors') and not json_data.get('data'):
+        print("Something wrong with GraphQL Request")
+        print(f"ERROR: Error in request\nStatus Message: {json_data['errors']}")
+        return None
+    return json_data['data']
+
+
+# Function to store a page of search results, returns the updated count of results
+def store_search_page(search_data, forked_repos_data, n, retrieved_results_count):
+    target_count = min(n, SEARCH_RESULTS_LIMIT)
+    # Check if total results are more than 'n'
+    if search_data['repositoryCount'] < n:
+        forked_repos_data.add_message(f"n= {n} too large! There are only {search_data['repositoryCount']} forked repos belonging to this org")
+    for node in search_data['nodes']:
+        if retrieved_results_count >= target_count:
+            break
+        # Store the fork count and name of repo
+        forked_repos_data.append(node['name'], node['forkCount'], node.get('pushedAt'))
+        retrieved_results_count = retrieved_results_count + 1
+    return retrieved_results_count
+
+
+# Function to store the aliased repository lookups of a response
+def store_repos_details(data, repos_details):
+    for key in sorted(data.keys(), key=lambda alias: int(alias.split('_')[1])):
+        repo = data[key]
+        # Repository not found
+        if repo is None:
+            continue
+        repos_details[repo['name']] = RepoStat(repo['name'], repo['forkCount'], repo['pushedAt'])
+    return repos_details
+
+
+# Class that retrieves repositories with the Github GraphQL API
+class GraphQLBackend:
+
+    def __init__(self, session):
+        self.session = session
+        return
+
+    # Function to send a GraphQL query
+    def execute(self, query, variables):
+        response = self.session.post(GRAPHQL_URL, json={'query': query, 'variables': variables})
+        return load_graphql_response(response)
+
+    # Function to get top n most forked repos
+    def get_n_repos(self, org, n, page_stats=None):
+        # Results stored here
+        forked_repos_data = RepoResults()
+
+        # Github API allows a max of 1000 results for this API
+        if n > SEARCH_RESULTS_LIMIT:
+            forked_repos_data.add_message(f"N={n} is too large. A Maximum of the top 1000 repositories can be retrieved using the API")
+        target_count = min(n, SEARCH_RESULTS_LIMIT)
+        per_page, pages_count = plan_pages(target_count)
+        variables = {'search_query': f"user:{org} sort:forks", 'first': per_page, 'after': None}
+        retrieved_results_count = 0
+        requests_count = 0
+        while retrieved_results_count < target_count and requests_count < pages_count:
+            data = self.execute(SEARCH_REPOS_QUERY, variables)
+            requests_count += 1
+            if data is None:
+                forked_repos_data.add_message("Unable to retrieve all the repos (GraphQL request failed)")
+                break
+            retrieved_results_count = store_search_page(data['search'], forked_repos_data, n, retrieved_results_count)
+            # Last page of results
+            if not data['search']['pageInfo']['hasNextPage']:
+                break
+            variables['after'] = data['search']['pageInfo']['endCursor']
+        if page_stats is not None:
+            page_stats.record(requests_count, retrieved_results_count, target_count)
+        return forked_repos_data
+
+    # Function to get the name, forks count and last push time of several repos, batched with aliases
+    # Repos that could not be looked up are left out
+    def get_repos_details(self, org, repo_names):
+        # Results stored here by repo name
+        repos_details = OrderedDict()
+        for start in range(0, len(repo_names), REPOS_BATCH_SIZE):
+            query, variables = build_repos_details_query(org, repo_names[start:start + REPOS_BATCH_SIZE])
+            data = self.execute(query, variables)
+            if data is not None:
+                store_repos_details(data, repos_details)
+        return repos_details
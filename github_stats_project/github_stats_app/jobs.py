@@ -0,0 +1,156 @@
+'''
+Module Description:
+
+Background jobs of the repos view, run on a local pool of worker threads
+(no external broker needed).
+
+The repos view submits the Github requests of a query as a job and
+redirects to the job page straight away instead of holding the request
+until every page of results is retrieved. The job page polls the job
+status (JSON) with the repos retrieved so far and shows the results
+once the job is done.
+
+Jobs are kept in memory by id, so they are only visible to the process
+that runs them. The last GITHUB_JOBS_KEPT finished jobs are kept.
+
+Jobs submitted with a key (eg: the (org, n, m) of a repos query) are
+coalesced: while a job of the same key is queued or running, submitting
+it again returns that job instead of starting a duplicate, so concurrent
+views for the same query share one fetch and its result. The number of
+coalesced jobs is counted in the metrics (github_metrics.py).
+
+Job statuses: queued -> running -> done / failed
+'''
+
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .github_metrics import get_metrics
+
+# Constants
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+# Class that holds the state of one background job
+class Job:
+
+    def __init__(self, total, context=None):
+        self.id = uuid.uuid4().hex
+        # Values shown on the job page (eg: the inputs of the query)
+        self.context = context if context is not None else dict()
+        self.status = QUEUED
+        # Items retrieved so far out of the total expected
+        self.progress = 0
+        self.total = total
+        # Value returned by the job function once done
+        self.result = None
+        self.error = None
+        self.created_at = timezone.now()
+        self.finished_at = None
+        return
+
+    # Function to store the number of items retrieved so far
+    def set_progress(self, progress):
+        self.progress = min(progress, self.total)
+        return
+
+    # Function to check if the job is over (done or failed)
+    def is_finished(self):
+        return self.status in (DONE, FAILED)
+
+    # Function to get the status of the job as a dict (for the JSON status endpoint)
+    def status_data(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'error': self.error,
+        }
+
+
+# Class that runs jobs on a pool of worker threads and keeps them by id
+class JobQueue:
+
+    def __init__(self, max_workers, max_jobs):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='github-job')
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        # Jobs queued or running by key: {key: job}
+        self.active_jobs = dict()
+        self.coalesced_count = 0
+        self.lock = threading.Lock()
+        return
+
+    # Function to queue func(job, *args), returns the job
+    # With a key, the job of the same key already queued or running is returned instead (key[0] names the kind of job)
+    def submit(self, total, context, func, *args, key=None):
+        with self.lock:
+            if key is not None and key in self.active_jobs:
+                self.coalesced_count += 1
+                get_metrics().record_coalesced(None, endpoint=f'{key[0]}_job')
+                return self.active_jobs[key]
+            job = Job(total, context)
+            self.jobs[job.id] = job
+            if key is not None:
+                self.active_jobs[key] = job
+            self.drop_old_jobs()
+        self.executor.submit(self.run, job, func, key, *args)
+        return job
+
+    # Function to get a job by id, None if unknown
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    # Function to drop the oldest finished jobs above max_jobs (lock held by the caller)
+    def drop_old_jobs(self):
+        finished_ids = [job_id for job_id, job in self.jobs.items() if job.is_finished()]
+        for job_id in finished_ids[:max(0, len(finished_ids) - self.max_jobs)]:
+            del self.jobs[job_id]
+        return
+
+    # Function run by the worker threads
+    def run(self, job, func, key, *args):
+        job.status = RUNNING
+        try:
+            job.result = func(job, *args)
+            job.status = DONE
+        except Exception as e:
+            print(f"ERROR:\n{e}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = timezone.now()
+            if key is not None:
+                with self.lock:
+                    if self.active_jobs.get(key) is job:
+                        del self.active_jobs[key]
+            # Worker threads are not request threads, their database connection is closed here
+            connection.close()
+        return
+
+
+# Per-process job queue
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+# Function to get (and lazily create) the per-process job queue
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(
+                    getattr(settings, 'GITHUB_JOB_WORKERS', 4),
+                    getattr(settings, 'GITHUB_JOBS_KEPT', 100),
+                )
+    return _job_queue
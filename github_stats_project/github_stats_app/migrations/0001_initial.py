@@ -0,0 +1,62 @@
+# Generated by Django 3.0.4 on 2026-10-18 09:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Organization',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('login', models.CharField(max_length=100, unique=True)),
+                ('repos_requested', models.PositiveIntegerField(default=0)),
+                ('repos_retrieved', models.PositiveIntegerField(default=0)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Repository',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('forks_count', models.PositiveIntegerField(default=0)),
+                ('pushed_at', models.DateTimeField(blank=True, null=True)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('contributors_requested', models.PositiveIntegerField(default=0)),
+                ('contributors_retrieved', models.PositiveIntegerField(default=0)),
+                ('contributors_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='repositories', to='github_stats_app.Organization')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContributorStat',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('login_id', models.CharField(max_length=255)),
+                ('commit_count', models.PositiveIntegerField(default=0)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributors', to='github_stats_app.Repository')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='repository',
+            index=models.Index(fields=['organization', '-forks_count'], name='repo_org_forks_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='repository',
+            constraint=models.UniqueConstraint(fields=('organization', 'name'), name='unique_org_repo_name'),
+        ),
+        migrations.AddIndex(
+            model_name='contributorstat',
+            index=models.Index(fields=['repository', '-commit_count'], name='contrib_repo_commits_idx'),
+        ),
+    ]
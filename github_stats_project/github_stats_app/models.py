@@ -1,3 +1,61 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+# Models storing the results of each run of the repos and contributors views
+
+
+# Github organization and the top 'n' repos last retrieved for it
+class Organization(models.Model):
+    # Organization name in lower case (Github names are case insensitive)
+    login = models.CharField(max_length=100, unique=True)
+    # 'n' asked for in the last retrieval of the repos
+    repos_requested = models.PositiveIntegerField(default=0)
+    # Number of repos actually retrieved (less than 'n' if the org has fewer repos)
+    repos_retrieved = models.PositiveIntegerField(default=0)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.login
+
+
+# Repository of an organization and the top 'm' contributors last retrieved for it
+class Repository(models.Model):
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='repositories')
+    name = models.CharField(max_length=255)
+    forks_count = models.PositiveIntegerField(default=0)
+    pushed_at = models.DateTimeField(null=True, blank=True)
+    fetched_at = models.DateTimeField(default=timezone.now)
+    # 'm' asked for in the last retrieval of the contributors
+    contributors_requested = models.PositiveIntegerField(default=0)
+    # Number of contributors actually retrieved (less than 'm' if the repo has fewer contributors)
+    contributors_retrieved = models.PositiveIntegerField(default=0)
+    contributors_fetched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'name'], name='unique_org_repo_name'),
+        ]
+        indexes = [
+            # Top 'n' repos of an org by forks count
+            models.Index(fields=['organization', '-forks_count'], name='repo_org_forks_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.organization.login}/{self.name}"
+
+
+# Commit count of a contributor on a repository
+class ContributorStat(models.Model):
+    repository = models.ForeignKey(Repository, on_delete=models.CASCADE, related_name='contributors')
+    login_id = models.CharField(max_length=255)
+    commit_count = models.PositiveIntegerField(default=0)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Top 'm' contributors of a repo by commit count
+            models.Index(fields=['repository', '-commit_count'], name='contrib_repo_commits_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.login_id} ({self.commit_count})"
@@ -0,0 +1,111 @@
+'''
+Module Description:
+
+Org repository listing strategy for the retrieval of the top 'n' most
+forked repos, used instead of the search API when it is the cheaper one.
+
+The search API has a much tighter rate limit (30 requests a minute) than
+the core API (5000 requests an hour). The listing path streams the pages
+of the org repositories (core API, 100 repos per page) and keeps only the
+current top n by forks count in a bounded heap, so memory stays O(n)
+however big the org is. Forks of other repos are skipped, as the search
+API does not return them either.
+
+The strategy is picked for each query (choose_repos_strategy()) from the
+size of the org (public_repos of the org check) and the search and core
+quota left as seen in the last responses. The listing is used when:
+1. It needs no more requests than the search (small orgs, or n above the
+1000 results of one search and close to the size of the org, where the
+sharded search of search_shards.py would page through most of the org
+anyway)
+2. The search quota left cannot cover the search pages
+and only if the core quota left covers the listing pages plus the
+contributors requests of the query.
+
+Configuration (environment variables):
+GITHUB_REPOS_STRATEGY - auto (default), search or list
+
+Request:
+https://api.github.com/orgs/{org_name}/repos?per_page=100&page={page_num}
+Eg:
+https://api.github.com/orgs/microsoft/repos?per_page=100&page=3
+'''
+
+import os
+import math
+import heapq
+from .page_planner import plan_pages, MAX_RESULTS_PER_PAGE, SEARCH_RESULTS_LIMIT
+from .search_shards import estimate_requests
+from .result_types import RepoResults
+
+# Constants
+if 'GITHUB_REPOS_STRATEGY' in os.environ:
+    REPOS_STRATEGY = os.environ['GITHUB_REPOS_STRATEGY']
+else:
+    REPOS_STRATEGY = 'auto'
+SEARCH_STRATEGY = 'search'
+LIST_STRATEGY = 'list'
+
+
+# Function to get the url format of the pages of the org repositories
+def org_repos_url_format(base_url, org):
+    return base_url + f"orgs/{org}/repos?per_page={MAX_RESULTS_PER_PAGE}&page={{page_num}}"
+
+
+# Function to pick how the top n repos of an org are retrieved: search or list
+# public_repos is None when the org size is not known, the quotas are the rate_limit dicts of last_rate_limit()
+def choose_repos_strategy(n, m, public_repos, search_quota, core_quota, strategy=REPOS_STRATEGY):
+    if strategy in (SEARCH_STRATEGY, LIST_STRATEGY):
+        return strategy
+    if public_repos is None:
+        return SEARCH_STRATEGY
+
+    list_pages = max(1, math.ceil(public_repos / MAX_RESULTS_PER_PAGE))
+    if n > SEARCH_RESULTS_LIMIT and public_repos > SEARCH_RESULTS_LIMIT:
+        # One search per range of forks counts (search_shards.py)
+        search_pages = estimate_requests(n, public_repos)
+    else:
+        search_pages = plan_pages(min(n, SEARCH_RESULTS_LIMIT))[1]
+    # The contributors of every repo are retrieved with the same core quota
+    contributors_requests = min(n, public_repos) * plan_pages(m)[1]
+    if 'rate_remaining' in core_quota and core_quota['rate_remaining'] < list_pages + contributors_requests:
+        return SEARCH_STRATEGY
+
+    if list_pages <= search_pages:
+        return LIST_STRATEGY
+    if 'rate_remaining' in search_quota and search_quota['rate_remaining'] < search_pages:
+        return LIST_STRATEGY
+    return SEARCH_STRATEGY
+
+
+# Class that keeps the top n repos by forks count of a stream of repos
+class TopReposHeap:
+
+    def __init__(self, n):
+        self.n = n
+        # Min-heap of (forks_count, -position, name, pushed_at), the least forked of the top n first
+        self.heap = list()
+        self.seen_count = 0
+        return
+
+    # Function to add the repos of one page of the org repositories
+    def push_page(self, repos):
+        for repo in repos:
+            # Forks of other repos are not returned by the search either
+            if repo.get('fork'):
+                continue
+            self.seen_count += 1
+            # Earlier repos win the ties
+            entry = (repo['forks_count'], -self.seen_count, repo['name'], repo.get('pushed_at'))
+            if len(self.heap) < self.n:
+                heapq.heappush(self.heap, entry)
+            elif entry > self.heap[0]:
+                heapq.heapreplace(self.heap, entry)
+        return
+
+    # Function to get the top n repos, most forked first
+    def results(self):
+        forked_repos_data = RepoResults()
+        for forks_count, position, name, pushed_at in sorted(self.heap, reverse=True):
+            forked_repos_data.append(name, forks_count, pushed_at)
+        return forked_repos_data
@@ -0,0 +1,82 @@
+'''
+Module Description:
+
+Page planner for the paginated Github API V3 requests.
+
+Instead of a fixed number of results per page, the page size is picked
+from the number of results wanted so that each query uses the fewest
+requests possible (Github allows at most 100 results per page):
+n = 100 -> 1 page of 100 results instead of 10 pages of 10
+n = 101 -> 2 pages of 51 results
+
+The first response of a paginated request tells how many pages there are
+(the rel="last" url of its Link header, which Github derives from the
+total_count of the results), so get_last_page() lets the callers fetch
+the remaining pages concurrently.
+
+PageStats keeps count of the requests made and of the requests the same
+queries would have needed with the old fixed page size, so the number of
+requests saved can be reported.
+'''
+
+import re
+import math
+import threading
+
+# Constants
+MAX_RESULTS_PER_PAGE = 100
+# Github API allows a max of 1000 results for the search API
+SEARCH_RESULTS_LIMIT = 1000
+# Matches the page number of the rel="last" url of a Link header
+LAST_PAGE_PATTERN = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+# Function to get the page size and the number of pages needed for target_count results
+def plan_pages(target_count, max_per_page=MAX_RESULTS_PER_PAGE):
+    if target_count <= 0:
+        return 1, 1
+    pages_count = math.ceil(target_count / max_per_page)
+    # Smallest page size that still needs only pages_count pages
+    per_page = math.ceil(target_count / pages_count)
+    return per_page, pages_count
+
+
+# Class that counts the requests made by the planned queries
+class PageStats:
+
+    def __init__(self, baseline_per_page):
+        # Fixed page size the requests saved are measured against
+        self.baseline_per_page = baseline_per_page
+        self.requests = 0
+        self.baseline_requests = 0
+        self.lock = threading.Lock()
+        return
+
+    # Function to record one query
+    def record(self, requests_count, retrieved_count, target_count):
+        # The fixed page size loop requests one extra (empty) page when results run out
+        baseline_count = math.ceil(retrieved_count / self.baseline_per_page)
+        if retrieved_count < target_count:
+            baseline_count += 1
+        with self.lock:
+            self.requests += requests_count
+            self.baseline_requests += max(baseline_count, requests_count)
+        return
+
+    # Function to get the number of requests saved
+    def requests_saved(self):
+        with self.lock:
+            return self.baseline_requests - self.requests
+
+
+# Function to get the last page number from the Link header of a paginated response
+def get_last_page(response):
+    link = response.headers.get('Link')
+    if not link:
+        # No Link header means there is a single page
+        return 1
+    match = LAST_PAGE_PATTERN.search(link)
+    if match is None:
+        # On the last page already
+        return 1
+    return int(match.group(1))
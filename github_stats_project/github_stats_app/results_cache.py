@@ -0,0 +1,75 @@
+'''
+Module Description:
+
+Cache of the results shown by the repos and contributors views, built on
+the Django cache framework ('github_results' cache in settings.py).
+
+Results are keyed on (org, n, m) for the repos page and on
+(org, n, m, repo_name) for the contributors page, and expire after
+GITHUB_RESULTS_CACHE_TTL seconds.
+
+Every key also holds a version number per organization, so all the
+cached results of an organization can be invalidated at once with
+invalidate_org() without knowing every (n, m, repo_name) cached. The
+repos view does so on a refresh and whenever a new repos list of the
+organization is stored.
+'''
+
+from urllib.parse import quote
+from django.core.cache import caches
+from django.utils import timezone
+
+# Constants
+RESULTS_CACHE_ALIAS = 'github_results'
+
+
+# Function to get the cache used for the results
+def get_results_cache():
+    return caches[RESULTS_CACHE_ALIAS]
+
+
+# Function to get the current version of the cached results of an org
+def get_org_version(org):
+    version_key = f"version:{quote(org.lower())}"
+    version = get_results_cache().get(version_key)
+    if version is None:
+        version = 1
+        # Versions do not expire with the results
+        get_results_cache().set(version_key, version, None)
+    return version
+
+
+# Function to build the cache key of a result
+def make_key(org, n, m, repo_name=None):
+    key = f"v{get_org_version(org)}:{quote(org.lower())}:{n}:{m}"
+    if repo_name is not None:
+        key += f":{quote(repo_name)}"
+    return key
+
+
+# Function to get a cached result, None if not cached
+def get_result(org, n, m, repo_name=None):
+    return get_results_cache().get(make_key(org, n, m, repo_name))
+
+
+# Function to cache a result along with the time it was fetched
+def set_result(org, n, m, result_data, repo_name=None, fetched_at=None):
+    cached_result = {
+        "result_data": result_data,
+        "fetched_at": fetched_at if fetched_at is not None else timezone.now(),
+    }
+    get_results_cache().set(make_key(org, n, m, repo_name), cached_result)
+    return cached_result
+
+
+# Function to remove a single cached result
+def delete_result(org, n, m, repo_name=None):
+    get_results_cache().delete(make_key(org, n, m, repo_name))
+    return
+
+
+# Function to invalidate every cached result of an org
+def invalidate_org(org):
+    version_key = f"version:{quote(org.lower())}"
+    get_results_cache().set(version_key, get_org_version(org) + 1, None)
+    return
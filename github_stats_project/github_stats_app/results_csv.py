@@ -0,0 +1,53 @@
+'''
+Module Description:
+
+Streaming CSV output of the results, shared by the command line program
+(top_dev_org_contributors.py) and the CSV download of the Django app.
+
+The results flow through a chain of generators instead of being held in
+memory until every repo is done:
+repos -> contributors of each repo (iter_all_contributors) -> CSV rows
+
+The rows of a repo are produced as soon as its contributors are
+retrieved, so the command line program can write and flush them to the
+results file and the Django app can send them to the browser while the
+remaining repos are still being fetched.
+
+Result file format:
+'Repo_Rank', 'Repo_Name', 'Repo_Forks_Count', 'Contributor_Rank', 'Contributor_Login_ID', 'Contributor_Commit_Count'
+'''
+
+import csv
+
+# Constants
+RESULTS_CSV_HEADER = ['Repo_Rank', 'Repo_Name', 'Repo_Forks_Count', 'Contributor_Rank', 'Contributor_Login_ID', 'Contributor_Commit_Count']
+
+
+# Function to get the name of the results file of a query
+def results_file_name(org, n, m):
+    return f"Results_{org}_{n}_forks_{m}_contributors.csv"
+
+
+# Generator that yields the CSV rows of each repo, one list of rows per repo
+def iter_result_rows(repos_contributors):
+    for repo_rank, repo_stat, contributors_data in repos_contributors:
+        repo_rows = list()
+        for contributor_rank, contributor in contributors_data.items():
+            repo_rows.append([repo_rank, repo_stat.name, repo_stat.forks_count, contributor_rank, contributor.login_id, contributor.commit_count])
+        yield repo_rows
+
+
+# Class that hands back what the csv writer writes instead of storing it
+class Echo:
+
+    # Function called by the csv writer for each row
+    def write(self, value):
+        return value
+
+
+# Generator that yields the CSV text of the results, the header first and then the rows of each repo
+def iter_csv_lines(repos_contributors):
+    result_writer = csv.writer(Echo(), delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    yield result_writer.writerow(RESULTS_CSV_HEADER)
+    for repo_rows in iter_result_rows(repos_contributors):
+        yield ''.join(result_writer.writerow(row) for row in repo_rows)
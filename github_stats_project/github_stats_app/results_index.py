@@ -0,0 +1,196 @@
+'''
+Module Description:
+
+Index over the results files written by the command line program
+(Results/Results_{org}_{n}_forks_{m}_contributors.csv), used to answer a
+query from a stored file instead of the Github API.
+
+The top 'n' repos stored for an org hold the top n' repos for any
+n' <= n and the top 'm' contributors stored for each repo hold the top
+m' for any m' <= m. A query (org, n', m') is answered by slicing a
+stored file of the org with n >= n' and m >= m' that was fetched less
+than GITHUB_RESULTS_FILE_MAX_AGE seconds ago (default: 3600). Of the
+files that cover a query the smallest one is read.
+
+The index is keyed by org and holds the (n, m, fetched_at) of every
+file, fetched_at being the modification time of the file. It is kept in
+Results/index/results_index.json along with the modification time of
+the Results directory, so loading it is a single small file read. The
+directory is only scanned again (file names and modification times, no
+results file is opened) when it was changed since, eg: by a results
+file copied in by hand.
+
+Results files are written under a temporary name and renamed once
+complete, and runs where the top n repos or the contributors of a repo
+could not all be retrieved are marked incomplete in the index, so a
+partial file is never used to answer a query. Files the command line
+program did not add to the index itself (copied in, shipped with the
+repository, or changed since) are indexed as incomplete too, as nothing
+tells if or when they were fetched in full.
+
+Index file format (JSON):
+{
+    "directory_mtime": 1584000000000000000,
+    "files": {"{file_name}": ["{org}", n, m, fetched_at, complete], ...}
+}
+'''
+
+import os
+import re
+import csv
+import json
+import time
+from typing import NamedTuple
+from .results_csv import RESULTS_CSV_HEADER
+from .result_types import RepoResults, ContributorResults
+
+# Constants
+RESULTS_DIR = 'Results'
+INDEX_DIR_NAME = 'index'
+INDEX_FILE_NAME = 'results_index.json'
+RESULTS_FILE_MAX_AGE = int(os.environ.get('GITHUB_RESULTS_FILE_MAX_AGE', 3600))
+RESULTS_FILE_PATTERN = re.compile(r'^Results_(?P<org>.+)_(?P<n>\d+)_forks_(?P<m>\d+)_contributors\.csv$')
+
+
+# Record of one results file
+class ResultsFile(NamedTuple):
+    file_name: str
+    org: str
+    n: int
+    m: int
+    fetched_at: float
+    complete: bool = True
+
+
+# Class that indexes the results files of a directory by org
+class ResultsIndex:
+
+    def __init__(self, directory=RESULTS_DIR, max_age=RESULTS_FILE_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        # Kept in a sub-directory so that saving it does not change the modification time of the directory
+        self.index_path = os.path.join(directory, INDEX_DIR_NAME, INDEX_FILE_NAME)
+        # {file_name: ResultsFile}
+        self.files = dict()
+        # {org (lower case): [ResultsFile, ...]}
+        self.orgs = dict()
+        self.load()
+        return
+
+    # Function to get the modification time of the results directory, None if it does not exist
+    def directory_mtime(self):
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    # Function to load the index, the directory is scanned again only if it was changed since the index was saved
+    def load(self):
+        index_data = dict()
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path) as index_file:
+                    index_data = json.load(index_file)
+            except ValueError:
+                print(f"ERROR: Unable to read {self.index_path}, scanning the results files again")
+        self.files = {file_name: ResultsFile(file_name, *entry) for file_name, entry in index_data.get('files', dict()).items()}
+
+        directory_mtime = self.directory_mtime()
+        if directory_mtime is not None and directory_mtime != index_data.get('directory_mtime'):
+            self.scan()
+            self.save()
+        self.group_by_org()
+        return
+
+    # Function to rebuild the entries from the file names and modification times of the directory
+    def scan(self):
+        files = dict()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                match = RESULTS_FILE_PATTERN.match(entry.name)
+                if match is None or not entry.is_file():
+                    continue
+                fetched_at = entry.stat().st_mtime
+                known_file = self.files.get(entry.name)
+                # The completeness is only known for the files added by the command line program and not changed since
+                complete = known_file.complete if known_file is not None and known_file.fetched_at == fetched_at else False
+                files[entry.name] = ResultsFile(entry.name, match.group('org'), int(match.group('n')), int(match.group('m')), fetched_at, complete)
+        self.files = files
+        return
+
+    # Function to group the entries by org
+    def group_by_org(self):
+        self.orgs = dict()
+        for results_file in self.files.values():
+            self.orgs.setdefault(results_file.org.lower(), list()).append(results_file)
+        return
+
+    # Function to write the index to its file
+    def save(self):
+        index_dir = os.path.dirname(self.index_path)
+        if not os.path.exists(index_dir):
+            os.makedirs(index_dir)
+        index_data = {
+            # Read after creating the sub-directory, which changes it
+            'directory_mtime': self.directory_mtime(),
+            'files': {file_name: list(results_file[1:]) for file_name, results_file in self.files.items()},
+        }
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, mode='w') as index_file:
+            json.dump(index_data, index_file)
+        os.replace(temp_path, self.index_path)
+        return
+
+    # Function to add (or replace) the entry of a results file written to the directory
+    def add(self, file_name, org, n, m, complete=True):
+        fetched_at = os.path.getmtime(os.path.join(self.directory, file_name))
+        self.files[file_name] = ResultsFile(file_name, org, n, m, fetched_at, complete)
+        self.group_by_org()
+        self.save()
+        return
+
+    # Function to get the smallest fresh and complete results file that covers a query, None if there is none
+    def find(self, org, n, m):
+        oldest = time.time() - self.max_age
+        covering_files = [
+            results_file for results_file in self.orgs.get(org.lower(), list())
+            if results_file.n >= n and results_file.m >= m and results_file.complete and results_file.fetched_at >= oldest
+        ]
+        if len(covering_files) == 0:
+            return None
+        return min(covering_files, key=lambda results_file: (results_file.n * results_file.m, -results_file.fetched_at))
+
+    # Function to read the top n repos and top m contributors of a results file
+    # Returns a list of (repo_rank, repo_stat, contributors_data), None if the file does not hold them
+    def read_results(self, results_file, n, m):
+        repos_data = RepoResults()
+        repos_contributors = list()
+        with open(os.path.join(self.directory, results_file.file_name), newline='') as result_file:
+            result_reader = csv.reader(result_file)
+            if next(result_reader, None) != RESULTS_CSV_HEADER:
+                return None
+            for row in result_reader:
+                repo_rank, contributor_rank = int(row[0]), int(row[3])
+                # Rows are written in rank order
+                if repo_rank > n:
+                    break
+                if repo_rank != len(repos_data):
+                    # A repo without any contributor row cannot be rebuilt from the file
+                    if repo_rank != len(repos_data) + 1:
+                        return None
+                    repos_data.append(row[1], int(row[2]), None)
+                    repos_contributors.append((repo_rank, repos_data[-1], ContributorResults()))
+                if contributor_rank <= m:
+                    repos_contributors[-1][2].append(row[4], int(row[5]))
+        return repos_contributors
+
+    # Function to get the results of a query from a stored file
+    # Returns (results_file, repos_contributors), None if no stored file covers the query
+    def get_results(self, org, n, m):
+        results_file = self.find(org, n, m)
+        if results_file is None:
+            return None
+        repos_contributors = self.read_results(results_file, n, m)
+        if repos_contributors is None:
+            return None
+        return results_file, repos_contributors
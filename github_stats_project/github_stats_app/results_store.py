@@ -0,0 +1,124 @@
+'''
+Module Description:
+
+Persistent store of the results of each run of the repos and
+contributors views, backed by the models in models.py (SQLite database
+configured in settings.py).
+
+The views answer from the store when the stored data is fresh enough
+(fetched less than GITHUB_RESULTS_STORE_MAX_AGE seconds ago) and covers
+the query: the top 'n' repos stored for an org answer any n' <= n and
+the top 'm' contributors stored for a repo answer any m' <= m.
+
+Stored contributors older than that are still used when the latest repos
+list shows that the repo was not pushed to since they were retrieved.
+Contributors are only stored for the repos of a stored repos list.
+
+Top 'n' / top 'm' queries are answered with the (organization, -forks_count)
+and (repository, -commit_count) indexes.
+'''
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Organization, Repository, ContributorStat
+
+
+# Function to get the max age of stored results in seconds
+def get_max_age():
+    return getattr(settings, 'GITHUB_RESULTS_STORE_MAX_AGE', 3600)
+
+
+# Function to check if a stored retrieval is fresh enough and covers the query
+def covers(fetched_at, requested, wanted):
+    if fetched_at is None or fetched_at < timezone.now() - timedelta(seconds=get_max_age()):
+        return False
+    return requested >= wanted
+
+
+# Function to check if a repo was not pushed to since its contributors were retrieved
+def not_pushed_since(repository):
+    if repository.pushed_at is None or repository.contributors_fetched_at is None:
+        return False
+    if repository.fetched_at < timezone.now() - timedelta(seconds=get_max_age()):
+        return False
+    return repository.pushed_at <= repository.contributors_fetched_at
+
+
+# Function to store the top n repos retrieved for an org
+@transaction.atomic
+def store_repos(org, n, n_repos):
+    fetched_at = timezone.now()
+    organization, created = Organization.objects.get_or_create(login=org.lower())
+    for repo_stat in n_repos:
+        Repository.objects.update_or_create(
+            organization=organization,
+            name=repo_stat.name,
+            defaults={
+                'forks_count': repo_stat.forks_count,
+                'pushed_at': parse_datetime(repo_stat.pushed_at) if repo_stat.pushed_at else None,
+                'fetched_at': fetched_at,
+            },
+        )
+    organization.repos_requested = n
+    organization.repos_retrieved = len(n_repos)
+    organization.fetched_at = fetched_at
+    organization.save()
+    return organization
+
+
+# Function to get the stored top n repos of an org as ((name, forks_count) rows, fetched_at), None if not stored
+def get_top_repos(org, n):
+    organization = Organization.objects.filter(login=org.lower()).first()
+    if organization is None:
+        return None
+    if not covers(organization.fetched_at, organization.repos_requested, n):
+        return None
+    repos = (organization.repositories
+             .filter(fetched_at__gte=organization.fetched_at)
+             .order_by('-forks_count')
+             .values_list('name', 'forks_count')[:n])
+    return list(repos), organization.fetched_at
+
+
+# Function to store the top m contributors retrieved for a repo, None if the repo is not stored
+# A repo missing from the stored repos list is not created here: without its forks count and fetched_at it would be
+# listed among the top repos of its org
+@transaction.atomic
+def store_contributors(org, repo_name, m, contributors_data):
+    fetched_at = timezone.now()
+    repository = Repository.objects.filter(organization__login=org.lower(), name=repo_name).first()
+    if repository is None:
+        return None
+    repository.contributors.all().delete()
+    ContributorStat.objects.bulk_create([
+        ContributorStat(
+            repository=repository,
+            login_id=contributor.login_id,
+            commit_count=contributor.commit_count,
+            fetched_at=fetched_at,
+        )
+        for contributor in contributors_data
+    ])
+    repository.contributors_requested = m
+    repository.contributors_retrieved = len(contributors_data)
+    repository.contributors_fetched_at = fetched_at
+    repository.save()
+    return repository
+
+
+# Function to get the stored top m contributors of a repo as ((login_id, commit_count) rows, fetched_at), None if not stored
+def get_top_contributors(org, repo_name, m):
+    repository = Repository.objects.filter(organization__login=org.lower(), name=repo_name).first()
+    if repository is None:
+        return None
+    if not covers(repository.contributors_fetched_at, repository.contributors_requested, m):
+        # Older contributors are still valid if a fresh repos list shows no push since they were retrieved
+        if not (repository.contributors_requested >= m and not_pushed_since(repository)):
+            return None
+    contributors = (repository.contributors
+                    .order_by('-commit_count')
+                    .values_list('login_id', 'commit_count')[:m])
+    return list(contributors), repository.contributors_fetched_at
@@ -0,0 +1,144 @@
+'''
+Module Description:
+
+Sharded repo search for the queries that need more than the 1000
+results the Github search API returns for a single query.
+
+The q=user:{org} query is split into disjoint forks:{low}..{high} ranges
+(shards) that each match at most 1000 repos, so that every shard can be
+paged through in full:
+1. The range 0..{forks count of the most forked repo} is probed for its
+total_count (requests with a single result per page)
+2. A range over the limit is split into ceil(total_count / 1000) + 1 sub
+ranges, narrower towards the low fork counts where most repos are
+(geometric split), and the sub ranges are probed in turn
+3. Ranges below the ones already holding the top n repos are dropped
+without being probed any further
+
+The shards are then fetched concurrently, each one sorted by forks, and
+merged with a heap into the top n repos by forks.
+
+estimate_requests() gives the number of requests of a sharded search
+before any range is probed, so that it can be weighed against listing
+every repo of the org (org_repos.py).
+
+A single fork count matched by more than 1000 repos (eg: thousands of
+repos with 0 forks) cannot be split any further, only 1000 of its repos
+are retrieved.
+
+Eg: https://api.github.com/search/repositories?q=user:microsoft+forks:15..223+sort:forks&per_page=100&page=1
+'''
+
+import math
+import heapq
+import itertools
+from typing import NamedTuple
+from .page_planner import MAX_RESULTS_PER_PAGE, SEARCH_RESULTS_LIMIT
+
+
+# Record of a range of fork counts and the number of repos in it (None until probed)
+class ForksRange(NamedTuple):
+    low: int
+    high: int
+    count: int = None
+
+
+# Function to get the search query of the repos of an org in a range of fork counts
+def shard_query(org, forks_range):
+    return f"user:{org}+forks:{forks_range.low}..{forks_range.high}+sort:forks"
+
+
+# Function to split a range with more repos than the limit into sub ranges
+def split_range(forks_range, limit=SEARCH_RESULTS_LIMIT):
+    low, high = forks_range.low, forks_range.high
+    parts_count = math.ceil(forks_range.count / limit) + 1
+    span = high - low + 1
+    sub_ranges = list()
+    start = low
+    # Geometric bounds: most repos have few forks, so the low ranges are the narrow ones
+    for part_num in range(1, parts_count):
+        bound = low + round(span ** (part_num / parts_count)) - 1
+        if start <= bound < high:
+            sub_ranges.append(ForksRange(start, bound))
+            start = bound + 1
+    sub_ranges.append(ForksRange(start, high))
+    # Bounds too close together: split in halves
+    if len(sub_ranges) == 1:
+        middle = (low + high) // 2
+        sub_ranges = [ForksRange(low, middle), ForksRange(middle + 1, high)]
+    return sub_ranges
+
+
+# Class that splits the fork counts of an org into shards of at most limit repos
+# The caller probes the pending ranges for their count and adds them back until is_done()
+class ShardPlanner:
+
+    def __init__(self, max_forks, target_count, limit=SEARCH_RESULTS_LIMIT):
+        self.target_count = target_count
+        self.limit = limit
+        # Ranges of at most limit repos (or of a single fork count)
+        self.shards = list()
+        # Ranges to probe for their count
+        self.pending = [ForksRange(0, max_forks)]
+        # Single fork counts with more repos than the limit
+        self.truncated = list()
+        return
+
+    # Function to check if every shard is known
+    def is_done(self):
+        return len(self.pending) == 0
+
+    # Function to add the probed pending ranges, the ones over the limit are split
+    def add_counts(self, counted_ranges):
+        over_limit = list()
+        for forks_range in counted_ranges:
+            if forks_range.count == 0:
+                continue
+            if forks_range.count <= self.limit or forks_range.low == forks_range.high:
+                self.shards.append(forks_range)
+            else:
+                over_limit.append(forks_range)
+
+        # Keeping the ranges with the most forks until they hold the top n repos
+        needed = list()
+        covered_count = 0
+        for forks_range in sorted(self.shards + over_limit, key=lambda forks_range: -forks_range.high):
+            if covered_count >= self.target_count:
+                break
+            needed.append(forks_range)
+            covered_count += forks_range.count if forks_range in over_limit else min(forks_range.count, self.limit)
+
+        self.shards = [forks_range for forks_range in needed if forks_range not in over_limit]
+        self.truncated = [forks_range for forks_range in self.shards if forks_range.count > self.limit]
+        self.pending = list(itertools.chain.from_iterable(split_range(forks_range, self.limit) for forks_range in needed if forks_range in over_limit))
+        return
+
+    # Function to get the messages about the repos that could not be retrieved
+    def messages(self):
+        return [f"{forks_range.count} repos have {forks_range.low} forks, only {self.limit} of them can be retrieved using the API" for forks_range in self.truncated]
+
+
+# Function to estimate the requests of a sharded search for the top target_count of total_count repos
+# The ranges actually probed depend on how the fork counts are spread, this is the count of a long tailed spread
+def estimate_requests(target_count, total_count, limit=SEARCH_RESULTS_LIMIT):
+    target_count = min(target_count, total_count)
+    # Total count of the org, then the first range and its sub ranges probed
+    probes_count = 2 + math.ceil(total_count / limit) + 1
+    # The geometric split leaves about two shards per limit repos wanted, the last page of each one partly filled
+    shards_count = 2 * math.ceil(target_count / limit) + 1
+    return probes_count + math.ceil(target_count / MAX_RESULTS_PER_PAGE) + shards_count
+
+
+# Function to merge the repos of the shards (each sorted by forks, most forked first) into the top target_count
+def merge_shards(shards_results, target_count):
+    merged_results = list()
+    names = set()
+    for result in heapq.merge(*shards_results, key=lambda result: -result['forks_count']):
+        if len(merged_results) >= target_count:
+            break
+        # A repo forked while the shards are fetched can move into the next range
+        if result['name'] in names:
+            continue
+        names.add(result['name'])
+        merged_results.append(result)
+    return merged_results
@@ -0,0 +1,95 @@
+'''
+Module Description:
+
+Per-organization snapshot of the contributors retrieved for each repo,
+used by the incremental refresh mode of get_all_contributors().
+
+The search results used by get_n_repos() carry the time of the last
+push to each repo (pushed_at). The snapshot keeps, for every repo, the
+pushed_at seen when its contributors were retrieved. On a re-run, repos
+that were not pushed to since then reuse their stored contributors
+instead of being re-queried.
+
+With the GraphQL backend, the last push time of the repos about to be
+reused is first looked up live (graphql_backend.py), as the search index
+the pushed_at of the search results come from can lag behind the pushes.
+
+Snapshot file format (JSON):
+Results/snapshots/{org}.json
+{
+    "{repo_name}": {
+        "pushed_at": "2020-03-01T10:00:00Z",
+        "m": 10,
+        "contributors": [["login_id", commit_count], ...]
+    }
+}
+'''
+
+import os
+import json
+import threading
+from .result_types import ContributorResults
+
+# Constants
+if 'GITHUB_SNAPSHOTS_DIR' in os.environ:
+    SNAPSHOTS_DIR = os.environ['GITHUB_SNAPSHOTS_DIR']
+else:
+    SNAPSHOTS_DIR = os.path.join('Results', 'snapshots')
+
+
+# Class that stores the contributors retrieved for the repos of an org
+class ContributorsSnapshot:
+
+    def __init__(self, org, directory=SNAPSHOTS_DIR):
+        self.org = org
+        self.path = os.path.join(directory, f"{org.lower()}.json")
+        # Number of repos whose contributors were reused
+        self.skipped_count = 0
+        self.lock = threading.Lock()
+        self.repos = dict()
+        if os.path.exists(self.path):
+            with open(self.path) as snapshot_file:
+                self.repos = json.load(snapshot_file)
+        return
+
+    # Function to check if the stored contributors of a repo can be reused for its last push time and m
+    def covers(self, repo_name, pushed_at, m):
+        repo_snapshot = self.repos.get(repo_name)
+        if repo_snapshot is None or pushed_at is None or repo_snapshot['pushed_at'] is None:
+            return False
+        # Not pushed to since the snapshot and enough contributors stored
+        return pushed_at <= repo_snapshot['pushed_at'] and repo_snapshot['m'] >= m
+
+    # Function to get the stored top m contributors of a repo, None if it has to be re-queried
+    def get_contributors(self, repo_name, pushed_at, m):
+        if not self.covers(repo_name, pushed_at, m):
+            return None
+        repo_snapshot = self.repos[repo_name]
+
+        contributors_data = ContributorResults()
+        for login_id, commit_count in repo_snapshot['contributors'][:m]:
+            contributors_data.append(login_id, commit_count)
+        with self.lock:
+            self.skipped_count += 1
+        return contributors_data
+
+    # Function to store the contributors retrieved for a repo
+    def set_contributors(self, repo_name, pushed_at, m, contributors_data):
+        contributors = [[contributor.login_id, contributor.commit_count] for contributor in contributors_data]
+        with self.lock:
+            self.repos[repo_name] = {
+                "pushed_at": pushed_at,
+                "m": m,
+                "contributors": contributors,
+            }
+        return
+
+    # Function to write the snapshot to its file
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self.lock:
+            with open(self.path, mode='w') as snapshot_file:
+                json.dump(self.repos, snapshot_file)
+        return
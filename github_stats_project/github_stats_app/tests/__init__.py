@@ -0,0 +1,44 @@
+'''
+Module Description:
+
+Tests of the github_stats_app helpers, one module per helper.
+
+The tests of the request helpers run against the mock Github API of the
+benchmarks (benchmarks/mock_github_server.py), started on a free local
+port when the tests are loaded. Like the benchmarks, the app is pointed
+at it with GITHUB_API_URL before its request modules are imported, as
+they read the root of the Github API at import time.
+
+Run with:
+python manage.py test github_stats_app
+'''
+
+import os
+import sys
+from django.conf import settings
+from django.test import SimpleTestCase
+
+sys.path.append(os.path.join(os.path.dirname(settings.BASE_DIR), 'benchmarks'))
+from mock_github_server import MockGithubConfig, start_server, server_url
+
+if 'github_stats_app.github_session' in sys.modules:
+    raise ImportError("github_stats_app.github_session was imported before the tests, its requests would not reach the mock Github API")
+mock_server = start_server()
+os.environ['GITHUB_API_URL'] = server_url(mock_server)
+
+
+# Class that runs its tests against the mock Github API
+# The counters of the server are reset before each test, with the mock_config of the class
+class MockGithubTestCase(SimpleTestCase):
+    mock_config = MockGithubConfig()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = mock_server
+        cls.base_url = server_url(mock_server)
+        return
+
+    def setUp(self):
+        self.server.state.reset(self.mock_config)
+        return
@@ -0,0 +1,90 @@
+import io
+import time
+from contextlib import redirect_stdout
+from unittest import mock
+from .. import top_dev_org_contributors
+from ..github_session import GithubSession
+from ..github_rate_limit import RateLimitScheduler
+from ..contributor_stats import StatsPollSchedule, StatsCache
+from ..top_dev_org_contributors import TopContributors
+from . import MockGithubTestCase, MockGithubConfig
+
+# Constants
+TOO_LARGE_REPOS = ('vscode', 'TypeScript', 'terminal')
+STATS_CACHE_TTL = 60
+
+
+# Class that tests the contributors statistics fallback of the repos too large to list (contributor_stats.py)
+class ContributorStatsTests(MockGithubTestCase):
+    # The statistics answer 202 twice before they are ready
+    mock_config = MockGithubConfig(too_large_repos=TOO_LARGE_REPOS, stats_pending_polls=2)
+
+    def setUp(self):
+        super().setUp()
+        self.session = GithubSession(token='N/A', rate_limiter=RateLimitScheduler())
+        self.stats_cache = StatsCache(ttl=STATS_CACHE_TTL)
+        # Schedules created by the helper, with a short poll delay and their own cache
+        self.schedules = list()
+        patcher = mock.patch.object(top_dev_org_contributors, 'StatsPollSchedule', self.new_schedule)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return
+
+    def tearDown(self):
+        self.session.close()
+        return
+
+    # Function to create and record the schedule of the helper
+    def new_schedule(self, org, repo_names):
+        schedule = StatsPollSchedule(org, repo_names, cache=self.stats_cache, poll_delay=0.01)
+        self.schedules.append(schedule)
+        return schedule
+
+    # Function to get the fixture top m contributors of a repo
+    def fixture_contributors(self, repo_name, m):
+        for repo in self.server.state.fixtures['microsoft']['repos']:
+            if repo['name'] == repo_name:
+                return [tuple(contributor) for contributor in repo['contributors'][:m]]
+        return None
+
+    # Function to get the contributors of each repo of the statistics results
+    def contributors_lists(self, stats_results):
+        return {repo_name: list(contributors_data) for repo_name, contributors_data in stats_results.items()}
+
+    # Function to test that the repos answering 202 are polled together by one schedule, not one loop per repo
+    def test_too_large_repos_polled_together(self):
+        obj = TopContributors('microsoft', 5, 3, session=self.session)
+        with redirect_stdout(io.StringIO()):
+            results = list(obj.iter_all_contributors(obj.get_n_repos()))
+
+        self.assertEqual(len(self.schedules), 1)
+        schedule = self.schedules[0]
+        # Two rounds answered 202 for every repo, each followed by one growing delay
+        self.assertEqual(schedule.rounds, 3)
+        self.assertAlmostEqual(schedule.waited, 0.03)
+        self.assertEqual(self.server.state.stats_polls, {repo_name: 3 for repo_name in TOO_LARGE_REPOS})
+        self.assertEqual(len(results), 5)
+        for repo_rank, repo_stat, contributors_data in results:
+            self.assertEqual(contributors_data.messages, [])
+            self.assertEqual([tuple(contributor) for contributor in contributors_data], self.fixture_contributors(repo_stat.name, 3))
+
+    # Function to test that the statistics are reused from the cache until its TTL is spent
+    def test_stats_cache_ttl(self):
+        obj = TopContributors('microsoft', 5, 3, session=self.session)
+        repo_names = ['vscode', 'TypeScript']
+        with redirect_stdout(io.StringIO()):
+            first_results = self.contributors_lists(obj.get_stats_contributors(repo_names))
+            self.assertEqual(self.server.state.stats_polls, {'vscode': 3, 'TypeScript': 3})
+
+            # Within the TTL: no request at all
+            self.server.state.reset(self.mock_config)
+            self.assertEqual(self.contributors_lists(obj.get_stats_contributors(repo_names)), first_results)
+            self.assertEqual(self.server.state.stats_polls, dict())
+            self.assertEqual(self.schedules[-1].rounds, 0)
+
+            # TTL spent for vscode: only its statistics are polled again
+            fetched_at, contributors = self.stats_cache.entries[('microsoft', 'vscode')]
+            self.stats_cache.entries[('microsoft', 'vscode')] = (time.time() - STATS_CACHE_TTL - 1, contributors)
+            self.server.state.reset(self.mock_config)
+            self.assertEqual(self.contributors_lists(obj.get_stats_contributors(repo_names)), first_results)
+            self.assertEqual(self.server.state.stats_polls, {'vscode': 3})
@@ -0,0 +1,37 @@
+import shutil
+import tempfile
+from ..github_cache import ResponseCache
+from ..github_session import GithubSession
+from . import MockGithubTestCase
+
+
+# Class that tests the conditional-request cache (github_cache.py)
+class ResponseCacheTests(MockGithubTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        return
+
+    # Function to test that the least recently used responses are evicted first
+    def test_response_cache_eviction(self):
+        cache = ResponseCache(self.cache_dir, max_entries=2)
+        session = GithubSession(token='N/A', cache=cache)
+        org_url = self.base_url + 'orgs/microsoft'
+        repos_url = self.base_url + 'orgs/microsoft/repos?per_page=100&page=1'
+        other_org_url = self.base_url + 'orgs/google'
+
+        session.get(org_url)
+        session.get(repos_url)
+        # Revalidated (304), so the org becomes the most recently used
+        self.assertEqual(session.get(org_url).status_code, 200)
+        session.get(other_org_url)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 3, 'evictions': 1, 'entries': 2})
+        self.assertEqual(cache.conditional_headers(repos_url), dict())
+        self.assertIn('If-None-Match', cache.conditional_headers(org_url))
+        self.assertIn('If-None-Match', cache.conditional_headers(other_org_url))
+        session.close()
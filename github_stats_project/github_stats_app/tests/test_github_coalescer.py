@@ -0,0 +1,36 @@
+import threading
+from ..github_coalescer import RequestCoalescer
+from ..github_session import GithubSession
+from . import MockGithubTestCase, MockGithubConfig
+
+
+# Class that tests the coalescing of identical concurrent requests (github_coalescer.py)
+class RequestCoalescerTests(MockGithubTestCase):
+    # Slow responses, so that every caller joins the request in flight
+    mock_config = MockGithubConfig(latency=0.3)
+
+    # Function to test that identical concurrent GET requests are sent once
+    def test_concurrent_requests_coalesced(self):
+        coalescer = RequestCoalescer()
+        session = GithubSession(token='N/A', coalescer=coalescer)
+        url = self.base_url + 'orgs/microsoft'
+        callers_count = 5
+        barrier = threading.Barrier(callers_count)
+        responses = list()
+
+        # Function run by each caller
+        def get_org():
+            barrier.wait()
+            responses.append(session.get(url))
+            return
+
+        threads = [threading.Thread(target=get_org) for caller_num in range(callers_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        session.close()
+
+        self.assertEqual(self.server.state.requests_count, 1)
+        self.assertEqual([response.status_code for response in responses], [200] * callers_count)
+        self.assertEqual(coalescer.stats(), {'requests': callers_count, 'coalesced': callers_count - 1, 'in_flight': 0})
@@ -0,0 +1,118 @@
+import io
+import re
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from django.urls import reverse
+from ..github_cache import ResponseCache
+from ..github_metrics import HttpMetrics, LATENCY_BUCKETS, get_metrics
+from ..github_session import GithubSession
+from ..github_rate_limit import RateLimitScheduler
+from . import MockGithubTestCase, MockGithubConfig
+
+# Constants
+# Sample line of the Prometheus text format: name{label="value",...} value
+SAMPLE_PATTERN = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{((?:[a-zA-Z_][a-zA-Z0-9_]*="[^"]*",?)*)\} (\S+)$')
+LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="([^"]*)"')
+HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+
+
+# Function to parse a Prometheus text exposition, returns ({family: type}, {(name, labels): value})
+# Fails on a sample line that is not well formed or whose family was not declared first
+def parse_exposition(text):
+    types = dict()
+    helps = set()
+    samples = dict()
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            helps.add(line.split(' ')[2])
+            continue
+        if line.startswith('# TYPE '):
+            family, metric_type = line.split(' ')[2:4]
+            if family not in helps or family in types:
+                raise ValueError(f"TYPE without HELP or declared twice: {line}")
+            types[family] = metric_type
+            continue
+        match = SAMPLE_PATTERN.match(line)
+        if match is None:
+            raise ValueError(f"Malformed sample line: {line}")
+        name, labels, value = match.groups()
+        family = name
+        for suffix in HISTOGRAM_SUFFIXES:
+            if name.endswith(suffix) and types.get(name[:-len(suffix)]) == 'histogram':
+                family = name[:-len(suffix)]
+        if family not in types:
+            raise ValueError(f"Sample of an undeclared family: {line}")
+        samples[(name, tuple(sorted(LABEL_PATTERN.findall(labels))))] = float(value)
+    return types, samples
+
+
+# Class that tests the metrics of the HTTP layer (github_metrics.py) and their Prometheus text format
+class HttpMetricsTests(MockGithubTestCase):
+    # A secondary rate limit error on the third request, retried at once
+    mock_config = MockGithubConfig(secondary_every=3, retry_after=0)
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        return
+
+    # Function to test the metrics of a few requests in the Prometheus text format
+    def test_render_prometheus(self):
+        metrics = HttpMetrics()
+        session = GithubSession(token='N/A', cache=ResponseCache(self.cache_dir), rate_limiter=RateLimitScheduler(), metrics=metrics)
+        with redirect_stdout(io.StringIO()):
+            session.get(self.base_url + 'orgs/microsoft')
+            # Revalidated: 304 served from the cache
+            session.get(self.base_url + 'orgs/microsoft')
+            # Refused once, then retried
+            session.get(self.base_url + 'search/repositories?q=user:microsoft+sort:forks&per_page=3&page=1')
+            last_response = session.get(self.base_url + 'repos/microsoft/vscode/contributors?&per_page=3&page=1')
+        session.close()
+
+        types, samples = parse_exposition(metrics.render_prometheus())
+        self.assertEqual(types, {
+            'github_requests_total': 'counter',
+            'github_request_duration_seconds': 'histogram',
+            'github_response_bytes_total': 'counter',
+            'github_cache_hits_total': 'counter',
+            'github_retries_total': 'counter',
+            'github_coalesced_total': 'counter',
+            'github_rate_limit_used_total': 'counter',
+            'github_rate_limit_wait_seconds_total': 'counter',
+            'github_rate_limit_remaining': 'gauge',
+        })
+        requests_samples = {labels: value for (name, labels), value in samples.items() if name == 'github_requests_total'}
+        self.assertEqual(requests_samples, {
+            (('endpoint', 'orgs'), ('status', '200')): 1,
+            (('endpoint', 'orgs'), ('status', '304')): 1,
+            (('endpoint', 'repos_contributors'), ('status', '200')): 1,
+            (('endpoint', 'search_repositories'), ('status', '200')): 1,
+            (('endpoint', 'search_repositories'), ('status', '403')): 1,
+        })
+        self.assertEqual(samples[('github_cache_hits_total', (('endpoint', 'orgs'),))], 1)
+        self.assertEqual(samples[('github_retries_total', (('endpoint', 'search_repositories'),))], 1)
+        # The 304 is not counted against the quota
+        self.assertEqual(samples[('github_rate_limit_used_total', (('resource', 'core'),))], 2)
+        self.assertEqual(samples[('github_rate_limit_used_total', (('resource', 'search'),))], 2)
+        self.assertEqual(samples[('github_rate_limit_remaining', (('resource', 'core'),))], int(last_response.headers['X-RateLimit-Remaining']))
+
+        # Cumulative buckets ending with +Inf, which counts every request of the endpoint
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+        for endpoint, requests_count in (('orgs', 2), ('search_repositories', 2), ('repos_contributors', 1)):
+            bucket_counts = [samples[('github_request_duration_seconds_bucket', (('endpoint', endpoint), ('le', bound)))] for bound in bounds]
+            self.assertEqual(bucket_counts, sorted(bucket_counts))
+            self.assertEqual(bucket_counts[-1], requests_count)
+            self.assertEqual(samples[('github_request_duration_seconds_count', (('endpoint', endpoint),))], requests_count)
+
+    # Function to test the /metrics view
+    def test_metrics_view(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        types, samples = parse_exposition(response.content.decode())
+        self.assertIn('github_requests_total', types)
+        self.assertEqual(response.content.decode(), get_metrics().render_prometheus())
@@ -0,0 +1,79 @@
+import io
+import time
+import requests
+from contextlib import redirect_stdout
+from ..github_session import GithubSession
+from ..github_rate_limit import RateLimitScheduler, BUCKET_SETTINGS
+from . import MockGithubTestCase, MockGithubConfig
+
+
+# Class that tests the pacing and the retries of the rate limit scheduler (github_rate_limit.py)
+class RateLimitSchedulerTests(MockGithubTestCase):
+    # A secondary rate limit error on every other request
+    mock_config = MockGithubConfig(secondary_every=2, retry_after=7)
+
+    # Function to test that the token bucket lets a burst through and then paces each resource separately
+    def test_token_bucket_pacing(self):
+        scheduler = RateLimitScheduler()
+        search_url = self.base_url + 'search/repositories?q=user:microsoft+sort:forks&per_page=100&page=1'
+        burst, rate = BUCKET_SETTINGS['search']
+
+        delays = [scheduler.acquire(search_url) for index in range(burst)]
+        self.assertEqual(delays, [0.0] * burst)
+        # One request per 1 / rate seconds once the burst is used
+        self.assertAlmostEqual(scheduler.acquire(search_url), 1 / rate, delta=0.1)
+        self.assertAlmostEqual(scheduler.acquire(search_url), 2 / rate, delta=0.1)
+        self.assertEqual(scheduler.waits_count, 2)
+        # The core requests are not held back by the search requests
+        self.assertEqual(scheduler.acquire(self.base_url + 'orgs/microsoft'), 0.0)
+        self.assertEqual(scheduler.acquire(self.base_url + 'rate_limit'), 0.0)
+
+    # Function to test the delay before retrying a secondary rate limit error sent with Retry-After
+    def test_retry_delay_retry_after(self):
+        scheduler = RateLimitScheduler()
+        url = self.base_url + 'orgs/microsoft'
+        self.assertEqual(requests.get(url).status_code, 200)
+        response = requests.get(url)
+        self.assertEqual(response.status_code, 403)
+
+        self.assertEqual(scheduler.retry_delay(url, response, 0), 7.0)
+        # No retry past the max retries or the max wait
+        self.assertIsNone(scheduler.retry_delay(url, response, scheduler.max_retries))
+        self.assertIsNone(RateLimitScheduler(max_wait=5).retry_delay(url, response, 0))
+        self.assertEqual(scheduler.retries_count, 1)
+
+        # Same for a 429 reply
+        response.status_code = 429
+        self.assertEqual(scheduler.retry_delay(url, response, 1), 7.0)
+        # Not a rate limit error
+        response.status_code = 404
+        self.assertIsNone(scheduler.retry_delay(url, response, 0))
+
+    # Function to test the delay before retrying a request refused because the primary quota is used up
+    def test_retry_delay_rate_limit_reset(self):
+        self.server.state.reset(MockGithubConfig(core_limit=2, reset_seconds=30))
+        scheduler = RateLimitScheduler()
+        url = self.base_url + 'orgs/microsoft'
+        responses = [requests.get(url) for index in range(3)]
+        self.assertEqual([response.status_code for response in responses], [200, 200, 403])
+        response = responses[-1]
+        self.assertEqual(response.headers['X-RateLimit-Remaining'], '0')
+        self.assertNotIn('Retry-After', response.headers)
+
+        reset = int(response.headers['X-RateLimit-Reset'])
+        self.assertAlmostEqual(scheduler.retry_delay(url, response, 0), reset - time.time() + 1, delta=1)
+        # The next requests wait for the reset instead of being refused
+        self.assertAlmostEqual(scheduler.acquire(url), reset - time.time() + 1, delta=1)
+        self.assertEqual(scheduler.last_seen('core'), {'rate_limit': 2, 'rate_remaining': 0, 'rate_reset': reset})
+
+    # Function to test that a session retries the secondary rate limit errors instead of returning them
+    def test_session_retries_secondary_rate_limit(self):
+        self.server.state.reset(MockGithubConfig(secondary_every=2, retry_after=0))
+        scheduler = RateLimitScheduler()
+        session = GithubSession(token='N/A', rate_limiter=scheduler)
+        with redirect_stdout(io.StringIO()):
+            status_codes = [session.get(self.base_url + 'orgs/microsoft').status_code for index in range(3)]
+        session.close()
+        self.assertEqual(status_codes, [200, 200, 200])
+        self.assertEqual(self.server.state.status_counts, {200: 3, 403: 2})
+        self.assertEqual(scheduler.retries_count, 2)
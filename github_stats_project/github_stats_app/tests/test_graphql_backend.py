@@ -0,0 +1,79 @@
+import io
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from ..github_session import GithubSession
+from ..github_rate_limit import RateLimitScheduler
+from ..top_dev_org_contributors import TopContributors
+from ..snapshots import ContributorsSnapshot
+from . import MockGithubTestCase, MockGithubConfig
+from mock_github_server import LATER_PUSHED_AT
+
+
+# Class that tests the GraphQL backend (graphql_backend.py) and its live push time lookups
+class GraphQLBackendTests(MockGithubTestCase):
+    # TypeScript was pushed to after the search index was last updated
+    mock_config = MockGithubConfig(pushed_repos=('TypeScript',))
+
+    def setUp(self):
+        super().setUp()
+        self.snapshots_dir = tempfile.mkdtemp()
+        # The GraphQL API needs a token
+        self.session = GithubSession(token='test-token', rate_limiter=RateLimitScheduler())
+        return
+
+    def tearDown(self):
+        self.session.close()
+        shutil.rmtree(self.snapshots_dir)
+        return
+
+    # Function to get a TopContributors of the microsoft org sending its requests through the test session
+    def top_contributors(self, n, m, backend='graphql'):
+        return TopContributors('microsoft', n, m, session=self.session, backend=backend)
+
+    # Function to run an incremental refresh of the top n repos, returns the snapshot
+    def refresh(self, obj):
+        snapshot = ContributorsSnapshot('microsoft', directory=self.snapshots_dir)
+        with redirect_stdout(io.StringIO()):
+            repos = obj.get_n_repos()
+            obj.get_all_contributors(repos, snapshot=snapshot)
+        return snapshot
+
+    # Function to test that the top repos found by the GraphQL search are the ones of the REST search
+    def test_get_n_repos_matches_rest(self):
+        with redirect_stdout(io.StringIO()):
+            graphql_repos = self.top_contributors(120, 1).get_n_repos()
+            rest_repos = self.top_contributors(120, 1, backend='rest').get_n_repos()
+        self.assertEqual([repo_stat[:2] for repo_stat in graphql_repos], [repo_stat[:2] for repo_stat in rest_repos])
+        self.assertEqual(len(graphql_repos), 101)
+        self.assertEqual(graphql_repos.messages, ["n= 120 too large! There are only 101 forked repos belonging to this org"])
+
+    # Function to test that the repo lookups are batched with aliases and that unknown repos are left out
+    def test_repos_details_batched(self):
+        obj = self.top_contributors(101, 1)
+        with redirect_stdout(io.StringIO()):
+            repo_names = [repo_stat.name for repo_stat in obj.get_n_repos()]
+        self.server.state.reset(self.mock_config)
+
+        repos_details = obj.graphql.get_repos_details('microsoft', repo_names + ['not-a-repo'])
+        # 102 lookups in batches of 50
+        self.assertEqual(self.server.state.resource_counts, {'graphql': 3})
+        self.assertEqual(list(repos_details.keys()), repo_names)
+        self.assertEqual(repos_details['TypeScript'].pushed_at, LATER_PUSHED_AT)
+
+    # Function to test that a repo pushed to since the snapshot is re-queried even though the search index lags
+    def test_incremental_refresh_checks_live_push(self):
+        first_snapshot = self.refresh(self.top_contributors(5, 3))
+        self.assertEqual(first_snapshot.skipped_count, 0)
+
+        # REST backend: the search index shows no push, every repo is reused
+        self.server.state.reset(self.mock_config)
+        rest_snapshot = self.refresh(self.top_contributors(5, 3, backend='rest'))
+        self.assertEqual(rest_snapshot.skipped_count, 5)
+
+        # GraphQL backend: one search and one batched lookup, then only TypeScript is re-queried
+        self.server.state.reset(self.mock_config)
+        graphql_snapshot = self.refresh(self.top_contributors(5, 3))
+        self.assertEqual(graphql_snapshot.skipped_count, 4)
+        self.assertEqual(self.server.state.resource_counts, {'graphql': 2, 'core': 1})
+        self.assertEqual(ContributorsSnapshot('microsoft', directory=self.snapshots_dir).repos['TypeScript']['pushed_at'], LATER_PUSHED_AT)
@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+from ..org_repos import TopReposHeap, choose_repos_strategy, SEARCH_STRATEGY, LIST_STRATEGY
+
+
+# Class that tests the retrieval of the top repos from the org listing (org_repos.py)
+class OrgReposTests(SimpleTestCase):
+
+    # Function to test that the repos listed first win the ties, across pages
+    def test_top_repos_heap_ties(self):
+        top_repos = TopReposHeap(3)
+        top_repos.push_page([
+            {'name': 'a', 'forks_count': 5, 'pushed_at': None},
+            {'name': 'b', 'forks_count': 7, 'pushed_at': None},
+            {'name': 'fork', 'forks_count': 50, 'pushed_at': None, 'fork': True},
+        ])
+        top_repos.push_page([
+            {'name': 'c', 'forks_count': 5, 'pushed_at': None},
+            {'name': 'd', 'forks_count': 5, 'pushed_at': None},
+            {'name': 'e', 'forks_count': 1, 'pushed_at': None},
+        ])
+        self.assertEqual([repo_stat.name for repo_stat in top_repos.results()], ['b', 'a', 'c'])
+        self.assertEqual(top_repos.seen_count, 5)
+
+    # Function to test the choice between the search and the listing of the org repos
+    def test_choose_repos_strategy(self):
+        # Forced by the configuration
+        self.assertEqual(choose_repos_strategy(5, 5, 101, dict(), dict(), strategy=LIST_STRATEGY), LIST_STRATEGY)
+        # Org size not known
+        self.assertEqual(choose_repos_strategy(5, 5, None, dict(), dict(), strategy='auto'), SEARCH_STRATEGY)
+        # 1 search page against 2 listing pages
+        self.assertEqual(choose_repos_strategy(5, 5, 101, dict(), dict(), strategy='auto'), SEARCH_STRATEGY)
+        # As many listing pages as search pages
+        self.assertEqual(choose_repos_strategy(150, 5, 101, dict(), dict(), strategy='auto'), LIST_STRATEGY)
+        # More than one search can return: sharded search for a part of a big org (26 requests against 30 listing pages)
+        self.assertEqual(choose_repos_strategy(1500, 5, 3000, dict(), dict(), strategy='auto'), SEARCH_STRATEGY)
+        self.assertEqual(choose_repos_strategy(2000, 5, 20000, dict(), dict(), strategy='auto'), SEARCH_STRATEGY)
+        # Listing when most of the org is wanted anyway (43 requests against 30 listing pages)
+        self.assertEqual(choose_repos_strategy(3000, 5, 3000, dict(), dict(), strategy='auto'), LIST_STRATEGY)
+        # Listing when the search quota left cannot cover the sharded search
+        self.assertEqual(choose_repos_strategy(1500, 5, 3000, {'rate_remaining': 20}, dict(), strategy='auto'), LIST_STRATEGY)
+        # Search quota used up
+        self.assertEqual(choose_repos_strategy(5, 5, 101, {'rate_remaining': 0}, dict(), strategy='auto'), LIST_STRATEGY)
+        # Not enough core quota left to list the repos and get their contributors
+        self.assertEqual(choose_repos_strategy(150, 5, 101, dict(), {'rate_remaining': 50}, strategy='auto'), SEARCH_STRATEGY)
@@ -0,0 +1,48 @@
+import requests
+from ..page_planner import plan_pages, get_last_page, PageStats
+from . import MockGithubTestCase
+
+
+# Class that tests the planning of the pages of the paginated requests (page_planner.py)
+class PagePlannerTests(MockGithubTestCase):
+
+    # Function to test the page size and number of pages planned at the page boundaries
+    def test_plan_pages(self):
+        # Nothing wanted: still one page to learn there is nothing
+        self.assertEqual(plan_pages(0), (1, 1))
+        self.assertEqual(plan_pages(1), (1, 1))
+        self.assertEqual(plan_pages(100), (100, 1))
+        # One over a full page: two even pages instead of a full one and a single result
+        self.assertEqual(plan_pages(101), (51, 2))
+        self.assertEqual(plan_pages(250), (84, 3))
+        self.assertEqual(plan_pages(1000), (100, 10))
+        self.assertEqual(plan_pages(25, max_per_page=10), (9, 3))
+        # The pages planned always hold the results wanted
+        for target_count in range(1, 1001):
+            per_page, pages_count = plan_pages(target_count)
+            self.assertLessEqual(per_page, 100)
+            self.assertGreaterEqual(per_page * pages_count, target_count)
+            self.assertLess(per_page * (pages_count - 1), target_count)
+
+    # Function to test the last page number read from the Link header of the mock Github API
+    def test_get_last_page(self):
+        url_format = self.base_url + 'orgs/microsoft/repos?per_page={per_page}&page={page_num}'
+        # 101 repos
+        self.assertEqual(get_last_page(requests.get(url_format.format(per_page=51, page_num=1))), 2)
+        self.assertEqual(get_last_page(requests.get(url_format.format(per_page=10, page_num=3))), 11)
+        # Response without a Link header
+        self.assertEqual(get_last_page(requests.get(self.base_url + 'orgs/microsoft')), 1)
+        # Last page of the Github API: only rel="prev" and rel="first"
+        last_response = requests.models.Response()
+        last_response.headers['Link'] = '<https://api.github.com/organizations/6154722/repos?page=10>; rel="prev", <https://api.github.com/organizations/6154722/repos?page=1>; rel="first"'
+        self.assertEqual(get_last_page(last_response), 1)
+
+    # Function to test the requests saved against the fixed page size
+    def test_page_stats(self):
+        page_stats = PageStats(10)
+        # 101 results in 2 pages instead of 11
+        page_stats.record(2, 101, 101)
+        self.assertEqual(page_stats.requests_saved(), 9)
+        # 3 results out of 5 wanted: 1 page, where the fixed page size also asks for an empty second one
+        page_stats.record(1, 3, 5)
+        self.assertEqual((page_stats.requests, page_stats.baseline_requests), (3, 13))
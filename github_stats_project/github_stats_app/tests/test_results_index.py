@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from django.test import SimpleTestCase
+from ..results_csv import results_file_name, iter_csv_lines
+from ..results_index import ResultsIndex
+from ..result_types import RepoResults, ContributorResults
+
+
+# Class that tests answering queries from the stored results files (results_index.py)
+class ResultsIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        return
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        return
+
+    # Function to write a results file of n repos with m contributors each, returns its name
+    def write_results_file(self, org, n, m):
+        repos_contributors = list()
+        repos_data = RepoResults()
+        for repo_num in range(1, n + 1):
+            repos_data.append(f"repo{repo_num}", 1000 - repo_num, None)
+            contributors_data = ContributorResults()
+            for contributor_num in range(1, m + 1):
+                contributors_data.append(f"dev{repo_num}_{contributor_num}", 100 - contributor_num)
+            repos_contributors.append((repo_num, repos_data[-1], contributors_data))
+        file_name = results_file_name(org, n, m)
+        with open(os.path.join(self.directory, file_name), mode='w', newline='') as result_file:
+            result_file.write(''.join(iter_csv_lines(repos_contributors)))
+        return file_name
+
+    # Function to test that a smaller query is answered by slicing the smallest covering file
+    def test_read_results_slices_file(self):
+        results_index = ResultsIndex(self.directory)
+        results_index.add(self.write_results_file('microsoft', 5, 4), 'microsoft', 5, 4)
+        results_index.add(self.write_results_file('microsoft', 10, 10), 'microsoft', 10, 10)
+
+        results_file, repos_contributors = ResultsIndex(self.directory).get_results('Microsoft', 3, 2)
+        self.assertEqual((results_file.n, results_file.m), (5, 4))
+        self.assertEqual([(repo_rank, repo_stat.name, repo_stat.forks_count) for repo_rank, repo_stat, contributors_data in repos_contributors],
+                         [(1, 'repo1', 999), (2, 'repo2', 998), (3, 'repo3', 997)])
+        for repo_rank, repo_stat, contributors_data in repos_contributors:
+            self.assertEqual(list(contributors_data), [(f"dev{repo_rank}_1", 99), (f"dev{repo_rank}_2", 98)])
+        # Not covered by any file
+        self.assertIsNone(results_index.get_results('microsoft', 5, 11))
+        self.assertIsNone(results_index.get_results('google', 1, 1))
+
+    # Function to test that a truncated run is never used to answer a query
+    def test_truncated_file_rejected(self):
+        results_index = ResultsIndex(self.directory)
+        results_index.add(self.write_results_file('microsoft', 10, 2), 'microsoft', 10, 2, complete=False)
+        self.assertIsNone(results_index.get_results('microsoft', 5, 2))
+        # Still marked incomplete once the index is loaded again
+        self.assertIsNone(ResultsIndex(self.directory).get_results('microsoft', 5, 2))
+
+    # Function to test that a file the command line program did not write is not trusted
+    def test_unknown_file_rejected(self):
+        ResultsIndex(self.directory)
+        self.write_results_file('microsoft', 10, 2)
+        results_index = ResultsIndex(self.directory)
+        self.assertIn(results_file_name('microsoft', 10, 2), results_index.files)
+        self.assertIsNone(results_index.get_results('microsoft', 5, 2))
@@ -0,0 +1,69 @@
+from django.test import SimpleTestCase
+from ..page_planner import plan_pages, SEARCH_RESULTS_LIMIT
+from ..search_shards import ForksRange, ShardPlanner, split_range, estimate_requests
+
+
+# Function to count the repos of a list of fork counts that fall in a range
+def count_in_range(forks_counts, forks_range):
+    return ForksRange(forks_range.low, forks_range.high, sum(forks_range.low <= forks <= forks_range.high for forks in forks_counts))
+
+
+# Function to run a ShardPlanner to completion over a list of fork counts
+def plan_shards(forks_counts, target_count, limit):
+    planner = ShardPlanner(max(forks_counts), target_count, limit)
+    while not planner.is_done():
+        planner.add_counts([count_in_range(forks_counts, forks_range) for forks_range in planner.pending])
+    return planner
+
+
+# Class that tests the planning of the search shards (search_shards.py)
+class SearchShardsTests(SimpleTestCase):
+
+    # Function to test that the sub ranges of a split are contiguous and cover the range
+    def test_split_range_covers_range(self):
+        for forks_range in (ForksRange(0, 50000, 4321), ForksRange(0, 3, 2500), ForksRange(10, 11, 1500)):
+            sub_ranges = split_range(forks_range, limit=1000)
+            self.assertGreater(len(sub_ranges), 1)
+            self.assertEqual(sub_ranges[0].low, forks_range.low)
+            self.assertEqual(sub_ranges[-1].high, forks_range.high)
+            for previous, following in zip(sub_ranges, sub_ranges[1:]):
+                self.assertLessEqual(previous.low, previous.high)
+                self.assertEqual(following.low, previous.high + 1)
+
+    # Function to test that the shards do not overlap and hold the top n repos
+    def test_shards_cover_top_n(self):
+        forks_counts = [forks % 40 for forks in range(300)] + [100, 250, 250, 900, 4000]
+        target_count = 120
+        planner = plan_shards(forks_counts, target_count, limit=25)
+        shards = sorted(planner.shards)
+        self.assertEqual(planner.truncated, list())
+        for shard in shards:
+            self.assertLessEqual(shard.count, 25)
+        for previous, following in zip(shards, shards[1:]):
+            self.assertLess(previous.high, following.low)
+        # Every repo of the top n falls in a shard
+        top_forks = sorted(forks_counts, reverse=True)[:target_count]
+        for forks in top_forks:
+            self.assertTrue(any(shard.low <= forks <= shard.high for shard in shards), forks)
+        self.assertGreaterEqual(sum(shard.count for shard in shards), target_count)
+
+    # Function to test that a single fork count with more repos than the limit is reported
+    def test_single_fork_count_over_limit(self):
+        forks_counts = [0] * 40 + [1, 2, 3]
+        planner = plan_shards(forks_counts, 43, limit=10)
+        self.assertEqual(planner.truncated, [ForksRange(0, 0, 40)])
+        self.assertEqual(planner.messages(), ["40 repos have 0 forks, only 10 of them can be retrieved using the API"])
+
+    # Function to test the estimate of the requests of a sharded search against the requests of its plan
+    def test_estimate_requests(self):
+        for total_count, target_count in ((3000, 1500), (20000, 2000), (50000, 5000)):
+            # Long tailed spread: few repos with many forks
+            forks_counts = [50000 // (index + 1) for index in range(total_count)]
+            planner = ShardPlanner(max(forks_counts), target_count)
+            # Total count of the org, the probes of the ranges, then the pages of the shards
+            requests_count = 1
+            while not planner.is_done():
+                requests_count += len(planner.pending)
+                planner.add_counts([count_in_range(forks_counts, forks_range) for forks_range in planner.pending])
+            requests_count += sum(plan_pages(min(shard.count, SEARCH_RESULTS_LIMIT))[1] for shard in planner.shards)
+            self.assertAlmostEqual(estimate_requests(target_count, total_count), requests_count, delta=requests_count * 0.25)
@@ -0,0 +1,81 @@
+import io
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from ..github_session import GithubSession
+from ..github_rate_limit import RateLimitScheduler
+from ..top_dev_org_contributors import TopContributors
+from ..snapshots import ContributorsSnapshot
+from . import MockGithubTestCase
+from mock_github_server import INDEXED_PUSHED_AT, LATER_PUSHED_AT
+
+
+# Class that tests the contributors snapshots of the incremental refresh (snapshots.py)
+class ContributorsSnapshotTests(MockGithubTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.snapshots_dir = tempfile.mkdtemp()
+        self.session = GithubSession(token='N/A', rate_limiter=RateLimitScheduler())
+        return
+
+    def tearDown(self):
+        self.session.close()
+        shutil.rmtree(self.snapshots_dir)
+        return
+
+    # Function to get the top m contributors of the top n repos of microsoft with a snapshot loaded from its file
+    # Returns the snapshot and the contributors of each repo
+    def refresh(self, n, m):
+        obj = TopContributors('microsoft', n, m, session=self.session)
+        snapshot = ContributorsSnapshot('microsoft', directory=self.snapshots_dir)
+        with redirect_stdout(io.StringIO()):
+            results = [(repo_stat.name, list(contributors_data)) for repo_rank, repo_stat, contributors_data in obj.iter_all_contributors(obj.get_n_repos(), snapshot=snapshot)]
+        return snapshot, results
+
+    # Function to test that the snapshot written by a run lets the next run skip the repos not pushed to since
+    def test_round_trip_skips_unchanged_repos(self):
+        first_snapshot, first_results = self.refresh(5, 3)
+        self.assertEqual(first_snapshot.skipped_count, 0)
+        # One search and one page of contributors per repo
+        self.assertEqual(self.server.state.resource_counts, {'search': 1, 'core': 5})
+
+        stored_snapshot = ContributorsSnapshot('microsoft', directory=self.snapshots_dir)
+        self.assertEqual(len(stored_snapshot.repos), 5)
+        for repo_name, contributors in first_results:
+            self.assertEqual(stored_snapshot.repos[repo_name], {
+                "pushed_at": INDEXED_PUSHED_AT,
+                "m": 3,
+                "contributors": [list(contributor) for contributor in contributors],
+            })
+
+        # Nothing pushed to: only the search is sent, the contributors come from the snapshot
+        self.server.state.reset(self.mock_config)
+        second_snapshot, second_results = self.refresh(5, 3)
+        self.assertEqual(second_snapshot.skipped_count, 5)
+        self.assertEqual(self.server.state.resource_counts, {'search': 1})
+        self.assertEqual(second_results, first_results)
+
+        # Fewer contributors are taken from the snapshot, more are re-queried
+        self.server.state.reset(self.mock_config)
+        smaller_snapshot, smaller_results = self.refresh(5, 2)
+        self.assertEqual(smaller_snapshot.skipped_count, 5)
+        self.assertEqual(smaller_results, [(repo_name, contributors[:2]) for repo_name, contributors in first_results])
+        self.server.state.reset(self.mock_config)
+        larger_snapshot, larger_results = self.refresh(5, 4)
+        self.assertEqual(larger_snapshot.skipped_count, 0)
+        self.assertEqual(self.server.state.resource_counts, {'search': 1, 'core': 5})
+
+    # Function to test which push times and m the stored contributors of a repo cover
+    def test_covers(self):
+        self.refresh(1, 3)
+        snapshot = ContributorsSnapshot('microsoft', directory=self.snapshots_dir)
+        self.assertTrue(snapshot.covers('vscode', INDEXED_PUSHED_AT, 3))
+        self.assertTrue(snapshot.covers('vscode', INDEXED_PUSHED_AT, 1))
+        self.assertFalse(snapshot.covers('vscode', LATER_PUSHED_AT, 3))
+        self.assertFalse(snapshot.covers('vscode', INDEXED_PUSHED_AT, 4))
+        # Push time not known, or repo not in the snapshot
+        self.assertFalse(snapshot.covers('vscode', None, 3))
+        self.assertFalse(snapshot.covers('TypeScript', INDEXED_PUSHED_AT, 3))
+        self.assertIsNone(snapshot.get_contributors('vscode', LATER_PUSHED_AT, 3))
+        self.assertEqual(snapshot.skipped_count, 0)
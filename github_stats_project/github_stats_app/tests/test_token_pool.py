@@ -0,0 +1,56 @@
+import io
+import requests
+from contextlib import redirect_stdout
+from ..github_session import GithubSession
+from ..github_rate_limit import RateLimitScheduler
+from ..token_pool import TokenPool
+from . import MockGithubTestCase, MockGithubConfig
+
+
+# Class that tests the pool of tokens (token_pool.py) against the per token quotas of the mock Github API
+class TokenPoolTests(MockGithubTestCase):
+    mock_config = MockGithubConfig(core_limit=2)
+
+    def setUp(self):
+        super().setUp()
+        self.pool = TokenPool(['token-a', 'token-b'])
+        self.session = GithubSession(token='N/A', rate_limiter=RateLimitScheduler(scale=self.pool.size()), token_pool=self.pool)
+        self.url = self.base_url + 'orgs/microsoft'
+        return
+
+    def tearDown(self):
+        self.session.close()
+        return
+
+    # Function to test that the requests are spread over the tokens of the pool
+    def test_requests_spread_over_tokens(self):
+        for index in range(4):
+            self.assertEqual(self.session.get(self.url).status_code, 200)
+        self.assertEqual(self.server.state.token_counts, {'token-a': 2, 'token-b': 2})
+        self.assertEqual(self.pool.quota('core')[:2], (4, 0))
+
+    # Function to test that a used up token is parked and the request is retried with the next token
+    def test_used_up_token_parked(self):
+        # token-a used up outside of the pool
+        for index in range(2):
+            requests.get(self.url, headers={'Authorization': 'Token token-a'})
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            response = self.session.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Github API token used up, retrying with another token", output.getvalue())
+        self.assertEqual(self.server.state.token_counts, {'token-a': 3, 'token-b': 1})
+        self.assertEqual(self.server.state.status_counts, {200: 3, 403: 1})
+        token_a_stats, token_b_stats = self.pool.stats()
+        self.assertEqual((token_a_stats['parked'], token_a_stats['parked_resources']), (1, ['core']))
+        self.assertEqual((token_b_stats['parked'], token_b_stats['remaining']), (0, {'core': 1}))
+
+        # Parked tokens are not handed out again before their reset
+        self.assertEqual(self.session.get(self.url).status_code, 200)
+        self.assertEqual(self.server.state.token_counts, {'token-a': 3, 'token-b': 2})
+
+        # Every token used up: the reset is too far away to wait for, the refusal is returned
+        self.assertFalse(self.pool.has_available('core'))
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(self.session.get(self.url).status_code, 403)
@@ -0,0 +1,242 @@
+import io
+import os
+import sys
+import time
+import tempfile
+from contextlib import redirect_stdout
+from unittest import mock
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from .. import github_session, contributor_stats, results_cache, results_store, views, top_dev_org_contributors
+from ..github_session import GithubSession
+from ..github_rate_limit import RateLimitScheduler
+from ..jobs import Job, get_job_queue, QUEUED, RUNNING, DONE
+from ..contributor_stats import StatsPollSchedule, StatsCache
+from ..models import Repository
+from ..results_csv import results_file_name
+from ..result_types import RepoResults, ContributorResults
+from . import MockGithubTestCase, MockGithubConfig
+
+
+# Class that runs the views against the mock Github API, with a session and a results cache of their own for each test
+# The background jobs write to the database from their worker threads, so the tests are not run in a transaction
+class MockGithubViewTestCase(MockGithubTestCase, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        results_cache.get_results_cache().clear()
+        # The views send their requests through the shared session and keep the statistics in the shared cache
+        self.session = GithubSession(token='N/A', rate_limiter=RateLimitScheduler())
+        for patcher in (mock.patch.object(github_session, '_shared_session', self.session), mock.patch.object(contributor_stats, '_shared_stats_cache', StatsCache())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return
+
+    def tearDown(self):
+        self.session.close()
+        return
+
+
+# Class that tests the results cached and stored by the views (results_cache.py, results_store.py)
+class ResultsViewsTests(MockGithubViewTestCase):
+
+    # Function to run the repos job of a query in the test thread
+    def run_repos_job(self, org, n, m):
+        with redirect_stdout(io.StringIO()):
+            return views.run_repos_job(Job(n), org, n, m)
+
+    # Function to test that a truncated list of repos is shown but neither cached nor stored
+    def test_incomplete_repos_not_cached_or_stored(self):
+        # The org check and one page of repos, then a refusal too long to wait for
+        self.server.state.reset(MockGithubConfig(secondary_every=3, retry_after=600))
+        job_result = self.run_repos_job('microsoft', 101, 3)
+        self.assertLess(len(job_result["result_data"]), 101)
+        self.assertIsNone(results_cache.get_result('microsoft', 101, 3))
+        self.assertIsNone(results_store.get_top_repos('microsoft', 101))
+
+        self.server.state.reset(self.mock_config)
+        job_result = self.run_repos_job('microsoft', 101, 3)
+        self.assertEqual(len(job_result["result_data"]), 101)
+        self.assertEqual(results_cache.get_result('microsoft', 101, 3)["result_data"], job_result["result_data"])
+        repos_rows, fetched_at = results_store.get_top_repos('microsoft', 101)
+        self.assertEqual([list(repo_row) for repo_row in repos_rows], [row[1:] for row in job_result["result_data"]])
+
+    # Function to test that a truncated list of contributors is shown but neither cached nor stored
+    def test_incomplete_contributors_not_cached_or_stored(self):
+        self.run_repos_job('microsoft', 5, 150)
+        url = reverse('contributors', args=['microsoft', 5, 150, 'vscode'])
+
+        # One page of contributors, then a refusal too long to wait for
+        self.server.state.reset(MockGithubConfig(secondary_every=2, retry_after=600, pad_contributors=150))
+        with redirect_stdout(io.StringIO()):
+            response = self.client.get(url, HTTP_REFERER='/repos')
+        self.assertLess(len(response.context["result_data"]), 150)
+        self.assertIsNone(results_cache.get_result('microsoft', 5, 150, 'vscode'))
+        self.assertIsNone(results_store.get_top_contributors('microsoft', 'vscode', 150))
+
+        self.server.state.reset(MockGithubConfig(pad_contributors=150))
+        with redirect_stdout(io.StringIO()):
+            response = self.client.get(url, HTTP_REFERER='/repos')
+        self.assertEqual(len(response.context["result_data"]), 150)
+        self.assertEqual(results_cache.get_result('microsoft', 5, 150, 'vscode')["result_data"], response.context["result_data"])
+        contributors_rows, fetched_at = results_store.get_top_contributors('microsoft', 'vscode', 150)
+        self.assertEqual(len(contributors_rows), 150)
+
+    # Function to test that the contributors of a repo missing from the stored repos list are not stored
+    def test_contributors_of_unstored_repo_not_stored(self):
+        n_repos = RepoResults()
+        n_repos.append('vscode', 100, None)
+        results_store.store_repos('microsoft', 1, n_repos)
+        contributors_data = ContributorResults()
+        contributors_data.append('octocat', 10)
+
+        self.assertIsNone(results_store.store_contributors('microsoft', 'TypeScript', 1, contributors_data))
+        self.assertIsNone(results_store.store_contributors('google', 'guava', 1, contributors_data))
+        self.assertEqual(list(Repository.objects.values_list('name', flat=True)), ['vscode'])
+        self.assertIsNotNone(results_store.store_contributors('microsoft', 'vscode', 1, contributors_data))
+        self.assertEqual(results_store.get_top_contributors('microsoft', 'vscode', 1)[0], [('octocat', 10)])
+
+    # Function to test that storing a new repos list invalidates the other cached results of the org
+    def test_new_repos_store_bumps_org_version(self):
+        version = results_cache.get_org_version('microsoft')
+        results_cache.set_result('microsoft', 5, 3, [['1/1', 'octocat', 10]], 'vscode')
+        self.run_repos_job('Microsoft', 5, 3)
+        self.assertEqual(results_cache.get_org_version('microsoft'), version + 1)
+        self.assertIsNone(results_cache.get_result('microsoft', 5, 3, 'vscode'))
+        self.assertIsNotNone(results_cache.get_result('microsoft', 5, 3))
+        self.assertEqual(results_cache.get_org_version('google'), 1)
+
+        # A truncated list is not stored and leaves the cached results alone
+        self.server.state.reset(MockGithubConfig(secondary_every=3, retry_after=600))
+        self.run_repos_job('microsoft', 101, 3)
+        self.assertEqual(results_cache.get_org_version('microsoft'), version + 1)
+        self.assertIsNotNone(results_cache.get_result('microsoft', 5, 3))
+
+
+# Class that tests the background jobs of the repos view and their status endpoint (jobs.py)
+class RepoJobsViewsTests(MockGithubViewTestCase):
+    # Slow enough responses for the job to be seen running
+    mock_config = MockGithubConfig(latency=0.1)
+
+    # Function to wait for a job to finish, returns the statuses seen by polling its status endpoint
+    def poll_job(self, job_id, timeout=10):
+        statuses = list()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            status_data = self.client.get(reverse('repos_job_status', args=[job_id])).json()
+            if not statuses or statuses[-1]['status'] != status_data['status']:
+                statuses.append(status_data)
+            if status_data['status'] not in (QUEUED, RUNNING):
+                break
+            time.sleep(0.02)
+        return statuses
+
+    # Function to test the queued -> running -> done flow of a repos job, then the results served from the cache
+    def test_repos_job_status_flow(self):
+        inputs = {'organization': 'microsoft', 'n': 101, 'm': 3}
+        with redirect_stdout(io.StringIO()):
+            response = self.client.post(reverse('repos'), inputs)
+            job = get_job_queue().get(response.url.rstrip('/').split('/')[-1])
+            self.assertRedirects(response, reverse('repos_job', args=[job.id]), fetch_redirect_response=False)
+            self.assertTemplateUsed(self.client.get(response.url), 'pages/job.html')
+            # The same query while the job runs joins it
+            self.assertEqual(self.client.post(reverse('repos'), inputs).url, response.url)
+
+            statuses = self.poll_job(job.id)
+        self.assertIn(statuses[0]['status'], (QUEUED, RUNNING))
+        self.assertEqual(statuses[-1], {'id': job.id, 'status': DONE, 'progress': 101, 'total': 101, 'error': None})
+
+        # Done: the job page shows the results, the next query is answered from the cache
+        response = self.client.get(reverse('repos_job', args=[job.id]))
+        self.assertTemplateUsed(response, 'pages/repos.html')
+        self.assertEqual(len(response.context['result_data']), 101)
+        requests_count = self.server.state.requests_count
+        response = self.client.post(reverse('repos'), inputs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result_data'], job.result['result_data'])
+        self.assertIsNotNone(response.context['cached_at'])
+        self.assertEqual(self.server.state.requests_count, requests_count)
+
+    # Function to test the status endpoint of an unknown job
+    def test_unknown_job_status(self):
+        response = self.client.get(reverse('repos_job_status', args=['unknown-job']))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'id': 'unknown-job', 'status': 'unknown'})
+
+
+# Class that tests the streamed CSV download against the results file of the command line batch mode
+class ResultsCsvViewTests(MockGithubViewTestCase):
+    # vscode goes through the contributors statistics
+    mock_config = MockGithubConfig(too_large_repos=('vscode',), stats_pending_polls=0)
+
+    # Function to get the results file written by the batch mode of the command line program for one job
+    def batch_results_file(self, org, n, m):
+        sys.path.append(os.path.dirname(settings.BASE_DIR))
+        import top_dev_org_contributors as cli
+        working_dir = os.getcwd()
+        with tempfile.TemporaryDirectory() as results_dir:
+            os.chdir(results_dir)
+            try:
+                with redirect_stdout(io.StringIO()):
+                    cli.run_batch([(org, n, m)])
+                with open(os.path.join('Results', results_file_name(org, n, m)), mode='rb') as results_file:
+                    return results_file.read()
+            finally:
+                os.chdir(working_dir)
+
+    # Function to test that the streamed CSV is byte for byte the results file of the batch mode
+    def test_streamed_csv_matches_batch_file(self):
+        with redirect_stdout(io.StringIO()):
+            response = self.client.get(reverse('results_csv', args=['microsoft', 5, 3]))
+            streamed_csv = b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{results_file_name("microsoft", 5, 3)}"')
+        self.assertEqual(self.server.state.stats_polls, {'vscode': 1})
+
+        batch_csv = self.batch_results_file('microsoft', 5, 3)
+        self.assertEqual(streamed_csv, batch_csv)
+        self.assertEqual(len(batch_csv.splitlines()), 1 + 5 * 3)
+
+
+# Class that tests the speculative prefetch of the contributors of the top repos and its request budget
+class PrefetchViewsTests(MockGithubViewTestCase):
+    # vscode goes through the contributors statistics, answered after two polls
+    mock_config = MockGithubConfig(too_large_repos=('vscode',), stats_pending_polls=2)
+    top_repo_names = ['vscode', 'TypeScript', 'Windows-universal-samples', 'terminal', 'sql-server-samples']
+
+    def setUp(self):
+        super().setUp()
+        # Statistics polled with a short delay
+        patcher = mock.patch.object(top_dev_org_contributors, 'StatsPollSchedule', lambda org, repo_names: StatsPollSchedule(org, repo_names, poll_delay=0.01))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return
+
+    # Function to get the repos whose contributors are cached
+    def cached_repo_names(self, n, m):
+        return [repo_name for repo_name in self.top_repo_names if results_cache.get_result('microsoft', n, m, repo_name) is not None]
+
+    # Function to test that the pages and the statistics polls are counted against the budget of a prefetch job
+    def test_prefetch_request_budget(self):
+        with redirect_stdout(io.StringIO()):
+            job_result = views.run_prefetch_job(Job(5), 'microsoft', 5, 3, self.top_repo_names, 0, 5)
+        # vscode: its page of contributors and 3 statistics polls, TypeScript: 1 page, then the budget is spent
+        self.assertEqual(job_result, {"prefetched_count": 2, "requests_count": 5})
+        self.assertEqual(self.server.state.requests_count, 5)
+        self.assertEqual(self.server.state.stats_polls, {'vscode': 3})
+        self.assertEqual(self.cached_repo_names(5, 3), ['vscode', 'TypeScript'])
+
+    # Function to test the prefetch job started with the budget of the settings
+    @override_settings(GITHUB_PREFETCH_TOP_K=4, GITHUB_PREFETCH_MIN_REMAINING=0, GITHUB_PREFETCH_MAX_REQUESTS=2)
+    def test_start_prefetch(self):
+        results_cache.set_result('microsoft', 5, 3, [['1/1', 'octocat', 10]], 'vscode')
+        with redirect_stdout(io.StringIO()):
+            job = views.start_prefetch('microsoft', 5, 3, self.top_repo_names)
+            # Cached repos are skipped
+            self.assertEqual(job.total, 3)
+            deadline = time.time() + 10
+            while not job.is_finished() and time.time() < deadline:
+                time.sleep(0.02)
+        self.assertEqual(job.status, DONE)
+        self.assertEqual(job.result, {"prefetched_count": 2, "requests_count": 2})
+        self.assertEqual(self.cached_repo_names(5, 3), ['vscode', 'TypeScript', 'Windows-universal-samples'])
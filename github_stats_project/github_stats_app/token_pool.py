@@ -0,0 +1,182 @@
+'''
+Module Description:
+
+Pool of Github Personal Access Tokens for the sessions of
+github_session.py.
+
+Each token has its own rate limit quota (5000 core requests an hour, 30
+search requests a minute, ...). With a pool, each request is sent with
+the token that has the most quota left for the resource of the request,
+as seen in the X-RateLimit-* headers of the responses sent with that
+token. A token whose quota is used up is parked until its reset time and
+is not handed out again before then.
+
+The pool keeps per-token usage stats (requests sent, times parked and
+the quota last seen for every resource).
+
+Configuration (environment variables):
+GITHUB_PERSONAL_TOKENS - Comma separated list of tokens
+GITHUB_TOKENS_FILE - File with one token per line (lines starting with #
+are skipped)
+Without either of them no pool is used and the sessions send the single
+GITHUB_PERSONAL_TOKEN.
+'''
+
+import os
+import time
+import threading
+
+# Constants
+# Number of characters of a token shown in the usage stats
+TOKEN_SUFFIX_LENGTH = 4
+
+
+# Function to read the tokens of the pool from the environment, empty list if no pool is configured
+def load_tokens():
+    tokens = list()
+    if 'GITHUB_PERSONAL_TOKENS' in os.environ:
+        tokens.extend(os.environ['GITHUB_PERSONAL_TOKENS'].split(','))
+    if 'GITHUB_TOKENS_FILE' in os.environ:
+        with open(os.environ['GITHUB_TOKENS_FILE']) as tokens_file:
+            tokens.extend(line for line in tokens_file if not line.strip().startswith('#'))
+    # Dropping blanks and repeated tokens, keeping the order
+    unique_tokens = list()
+    for token in tokens:
+        token = token.strip()
+        if token and token not in unique_tokens:
+            unique_tokens.append(token)
+    return unique_tokens
+
+
+# Class that keeps the quota and usage of one token
+class TokenState:
+
+    def __init__(self, token):
+        self.token = token
+        # Quota last seen for each resource: {resource: [limit, remaining, reset]}
+        self.quotas = dict()
+        # Epoch seconds until which the token is not used (per resource)
+        self.parked_until = dict()
+        self.requests_count = 0
+        self.parked_count = 0
+        return
+
+    # Function to get the requests left for a resource, None if not known yet
+    def remaining(self, resource):
+        if resource not in self.quotas:
+            return None
+        return self.quotas[resource][1]
+
+    # Function to check if the token is parked for a resource
+    def is_parked(self, resource, now):
+        return self.parked_until.get(resource, 0) > now
+
+
+# Class that hands out the token with the most quota left for each request
+class TokenPool:
+
+    def __init__(self, tokens):
+        self.tokens = [TokenState(token) for token in tokens]
+        self.lock = threading.Lock()
+        return
+
+    # Function to get the number of tokens in the pool
+    def size(self):
+        return len(self.tokens)
+
+    # Function to pick the token to send a request to a resource with
+    def acquire(self, resource):
+        now = time.time()
+        with self.lock:
+            available = [state for state in self.tokens if not state.is_parked(resource, now)]
+            if len(available) == 0:
+                # Every token is parked: the one that resets first
+                state = min(self.tokens, key=lambda state: state.parked_until.get(resource, 0))
+            else:
+                # Tokens not used yet for the resource are tried first, then the most quota left
+                state = max(available, key=lambda state: (
+                    float('inf') if state.remaining(resource) is None else state.remaining(resource),
+                    -state.requests_count,
+                ))
+            state.requests_count += 1
+            # Counted right away so that concurrent requests spread over the tokens
+            if resource in state.quotas:
+                state.quotas[resource][1] -= 1
+        return state.token
+
+    # Function to store the quota sent in the headers of a response to a request sent with a token
+    def record(self, token, resource, response):
+        headers = response.headers
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        resource = headers.get('X-RateLimit-Resource') or resource
+        try:
+            limit = int(headers['X-RateLimit-Limit'])
+            remaining = int(headers['X-RateLimit-Remaining'])
+            reset = int(headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+        with self.lock:
+            for state in self.tokens:
+                if state.token == token:
+                    state.quotas[resource] = [limit, remaining, reset]
+                    # Quota used up: parked until the reset
+                    if remaining <= 0 and not state.is_parked(resource, time.time()):
+                        state.parked_until[resource] = reset
+                        state.parked_count += 1
+                    break
+        return
+
+    # Function to check if a token that is not parked is left for a resource
+    def has_available(self, resource):
+        now = time.time()
+        with self.lock:
+            return any(not state.is_parked(resource, now) for state in self.tokens)
+
+    # Function to get the (limit, remaining, reset) of the whole pool for a resource, None if not known yet
+    def quota(self, resource):
+        with self.lock:
+            known = [state.quotas[resource] for state in self.tokens if resource in state.quotas]
+            if len(known) == 0:
+                return None
+            # Tokens not used yet are counted with a full quota
+            unknown_count = len(self.tokens) - len(known)
+            max_limit = max(limit for limit, remaining, reset in known)
+            limit = sum(limit for limit, remaining, reset in known) + unknown_count * max_limit
+            remaining = sum(max(remaining, 0) for limit, remaining, reset in known) + unknown_count * max_limit
+            reset = min(reset for limit, remaining, reset in known)
+        return limit, remaining, reset
+
+    # Function to get the usage stats of every token (only the end of each token is shown)
+    def stats(self):
+        tokens_stats = list()
+        now = time.time()
+        with self.lock:
+            for state in self.tokens:
+                token_stats = dict()
+                token_stats['token'] = '...' + state.token[-TOKEN_SUFFIX_LENGTH:]
+                token_stats['requests'] = state.requests_count
+                token_stats['parked'] = state.parked_count
+                token_stats['parked_resources'] = [resource for resource in state.parked_until if state.is_parked(resource, now)]
+                token_stats['remaining'] = {resource: max(quota[1], 0) for resource, quota in state.quotas.items()}
+                tokens_stats.append(token_stats)
+        return tokens_stats
+
+
+# Per-process pool shared by all sessions
+_shared_pool = None
+_shared_pool_loaded = False
+_shared_pool_lock = threading.Lock()
+
+
+# Function to get (and lazily create) the per-process pool, None if no pool is configured
+def get_token_pool():
+    global _shared_pool, _shared_pool_loaded
+    if not _shared_pool_loaded:
+        with _shared_pool_lock:
+            if not _shared_pool_loaded:
+                tokens = load_tokens()
+                if len(tokens) > 0:
+                    _shared_pool = TokenPool(tokens)
+                _shared_pool_loaded = True
+    return _shared_pool
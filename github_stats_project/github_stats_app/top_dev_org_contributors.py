@@ -21,6 +21,9 @@ has made
 
 API Information:
 
+All requests are sent through the pooled keep-alive session in
+github_session.py
+
 Header Info included if we have access to a token:
 key: Authorization
 value: Token {Token_Value}
@@ -48,24 +51,28 @@ Format:
 https://api.github.com/repos/{org_name}/{repo_name}/contributors?&per_page={results_per_page}&page={page_num}
 Eg:
 https://api.github.com/repos/facebook/react/contributors?&per_page=10&page=2
+Repos too large for this endpoint (403 "too large to list") fall back
+to their contributors statistics (contributor_stats.py):
+https://api.github.com/repos/{org_name}/{repo_name}/stats/contributors
 '''
 
 import json
-import requests
-import os
+import time
 from collections import OrderedDict
-import itertools
-from collections import Counter
-import csv
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from .github_session import get_session, BASE_URL
+from .page_planner import plan_pages, get_last_page, PageStats, SEARCH_RESULTS_LIMIT
+from .search_shards import ShardPlanner, shard_query, merge_shards
+from .org_repos import choose_repos_strategy, org_repos_url_format, TopReposHeap, LIST_STRATEGY
+from .contributor_stats import StatsPollSchedule, stats_contributors_url, is_too_large, TOO_LARGE_MESSAGE
+from .graphql_backend import GraphQLBackend, API_BACKEND, use_graphql
+from .result_types import RepoResults, ContributorResults
 
 # Constants
+# Fixed page size of the original fetch loops, the requests saved are measured against it
 RESULTS_PER_PAGE = 30
-BASE_URL = 'https://api.github.com/'
-if 'GITHUB_PERSONAL_TOKEN' in os.environ:
-    TOKEN = os.environ['GITHUB_PERSONAL_TOKEN']
-else:
-    TOKEN = 'N/A'
+# Max number of repos whose contributors are fetched at the same time
+MAX_WORKERS = 8
 
 
 # Class that will take in org name, 'n' and 'm' and print out the results
@@ -74,10 +81,20 @@ class TopContributors:
     m = 0
     org = ''
 
-    def __init__(self, org, n, m): 
+    def __init__(self, org, n, m, session=None, backend=API_BACKEND, progress=None): 
         self.org = org
         self.n = n
         self.m = m
+        # Number of public repos of the org, known once the org is checked
+        self.public_repos = None
+        # Requests made by the paginated queries of this object
+        self.page_stats = PageStats(RESULTS_PER_PAGE)
+        # Pooled keep-alive session shared by every object in the process
+        self.session = session if session is not None else get_session()
+        # GraphQL backend for the repository retrieval, None to use the REST API
+        self.graphql = GraphQLBackend(self.session) if use_graphql(backend, self.session) else None
+        # Called with the number of repos retrieved so far (progress of the background jobs)
+        self.progress = progress
         return
 
     # Function to check rate limit of access to API
@@ -87,12 +104,7 @@ class TopContributors:
 
         url = BASE_URL + f"rate_limit"
 
-        # Adding Personal Acess Github Token if available
-        headers = dict()
-        if TOKEN != 'N/A':
-            headers = {'Authorization': f'Token {TOKEN}'}
-
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url)
 
         # Checking status code of response
         if response.status_code == 200:
@@ -110,17 +122,18 @@ class TopContributors:
             return
 
         return rate_limit
-    
+
+    # Function to get the rate limit figures last seen in the response headers (no extra request)
+    def last_rate_limit(self, resource='core'):
+        if self.session.rate_limiter is None:
+            return dict()
+        return self.session.rate_limiter.last_seen(resource)
+
     # Function to check if organization is valid or not
     def check_org(self):
         url = BASE_URL + f"orgs/{self.org}"
 
-        # Adding Personal Acess Github Token if available
-        headers = dict()
-        if TOKEN != 'N/A':
-            headers = {'Authorization': f'Token {TOKEN}'}
-
-        response = requests.get(url, headers=headers)
+        response = self.session.get(url)
         
         # Checking status code of response
         if response.status_code == 200:
@@ -130,6 +143,8 @@ class TopContributors:
                 return False
             elif "name" in json_data:
                 print(f"Valid Organization name retrieved from API:\n{json_data['name']}\n")
+                # Size of the org, used to pick how its top n repos are retrieved
+                self.public_repos = json_data.get('public_repos')
             else:
                 return False
         
@@ -139,99 +154,377 @@ class TopContributors:
         
         return True
 
+    # Function to get the pages of a paginated request, the pages after the first one are fetched concurrently
+    def get_pages(self, url_format, pages_count):
+        # First page tells how many pages there are
+        first_response = self.session.get(url_format.format(page_num=1))
+        if first_response.status_code != 200:
+            return [first_response]
+        last_page_num = min(pages_count, get_last_page(first_response))
+        if last_page_num <= 1:
+            return [first_response]
+
+        # Remaining pages fetched at the same time and kept in page order
+        urls = [url_format.format(page_num=page_num) for page_num in range(2, last_page_num + 1)]
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(urls))) as executor:
+            responses = list(executor.map(self.session.get, urls))
+        return [first_response] + responses
+
+    # Function to get the number of repos of the org in a range of forks counts (sharded search)
+    def count_repos(self, forks_range):
+        url = BASE_URL + f"search/repositories?q={shard_query(self.org, forks_range)}&per_page=1"
+        response = self.session.get(url)
+        if response.status_code != 200:
+            print("Something wrong with Forked Repos Request")
+            print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+            return None
+        return forks_range._replace(count=json.loads(response.text)['total_count'])
+
+    # Function to get the repos of one shard (range of forks counts), most forked first
+    def get_shard_repos(self, forks_range, forked_repos_data):
+        target_count = min(forks_range.count, SEARCH_RESULTS_LIMIT)
+        per_page, pages_count = plan_pages(target_count)
+        url_format = BASE_URL + f"search/repositories?q={shard_query(self.org, forks_range)}&per_page={per_page}&page={{page_num}}"
+        responses = self.get_pages(url_format, pages_count)
+        result_list = list()
+        for response in responses:
+            if response.status_code != 200:
+                print("Something wrong with Forked Repos Request")
+                print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+                forked_repos_data.add_message(f"Unable to retrieve all the repos (Status Code: {response.status_code})")
+                break
+            result_list.extend(json.loads(response.text)["items"])
+        self.page_stats.record(len(responses), len(result_list), target_count)
+        return result_list
+
+    # Function to get the top n most forked repos of an org with more than 1000 repos, one search per range of forks counts
+    # Returns False if a single search is enough or the ranges could not be planned
+    def get_sharded_repos(self, forked_repos_data):
+        # Number of repos and most forked repo of the org
+        response = self.session.get(BASE_URL + f"search/repositories?q=user:{self.org}+sort:forks&per_page=1")
+        if response.status_code != 200:
+            return False
+        json_data = json.loads(response.text)
+        if json_data['total_count'] <= SEARCH_RESULTS_LIMIT or len(json_data['items']) == 0:
+            return False
+        if json_data['total_count'] < self.n:
+            forked_repos_data.add_message(f"n= {self.n} too large! There are only {json_data['total_count']} forked repos belonging to this org")
+
+        planner = ShardPlanner(json_data['items'][0]['forks_count'], self.n)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            # Ranges over the limit are split until every shard fits in one search
+            while not planner.is_done():
+                counted_ranges = list(executor.map(self.count_repos, planner.pending))
+                if None in counted_ranges:
+                    return False
+                planner.add_counts(counted_ranges)
+            print(f"Searching {len(planner.shards)} ranges of forks counts")
+            shards_results = list(executor.map(lambda forks_range: self.get_shard_repos(forks_range, forked_repos_data), planner.shards))
+
+        for result in merge_shards(shards_results, self.n):
+            forked_repos_data.append(result['name'], result['forks_count'], result.get('pushed_at'))
+        for message in planner.messages():
+            forked_repos_data.add_message(message)
+        if self.progress is not None:
+            self.progress(len(forked_repos_data))
+        return True
+
+    # Generator that yields the pages of a paginated request in page order, a window of pages fetched concurrently at a time
+    # pages_count caps the number of pages, None for every page
+    def iter_pages(self, url_format, pages_count=None):
+        # First page tells how many pages there are
+        first_response = self.session.get(url_format.format(page_num=1))
+        yield first_response
+        if first_response.status_code != 200:
+            return
+        last_page_num = get_last_page(first_response)
+        if pages_count is not None:
+            last_page_num = min(pages_count, last_page_num)
+        if last_page_num <= 1:
+            return
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for window_start in range(2, last_page_num + 1, MAX_WORKERS):
+                urls = [url_format.format(page_num=page_num) for page_num in range(window_start, min(window_start + MAX_WORKERS, last_page_num + 1))]
+                for response in executor.map(self.session.get, urls):
+                    yield response
+                    if response.status_code != 200:
+                        return
+
+    # Function to get the strategy used to retrieve the top n repos (search or list)
+    def repos_strategy(self):
+        return choose_repos_strategy(self.n, self.m, self.public_repos, self.last_rate_limit('search'), self.last_rate_limit('core'))
+
+    # Function to get top n most forked repos from the pages of the org repositories, only the top n are kept
+    def get_n_repos_from_listing(self):
+        top_repos = TopReposHeap(self.n)
+        failed_response = None
+        for response in self.iter_pages(org_repos_url_format(BASE_URL, self.org)):
+            # Checking status code of response
+            if response.status_code != 200:
+                print("Something wrong with Org Repos Request")
+                print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+                failed_response = response
+                break
+            top_repos.push_page(json.loads(response.text))
+            if self.progress is not None:
+                self.progress(len(top_repos.heap))
+
+        forked_repos_data = top_repos.results()
+        if failed_response is not None:
+            forked_repos_data.add_message(f"Unable to retrieve all the repos (Status Code: {failed_response.status_code})")
+        elif top_repos.seen_count < self.n:
+            forked_repos_data.add_message(f"n= {self.n} too large! There are only {top_repos.seen_count} forked repos belonging to this org")
+        return forked_repos_data
+
     # Function to get top n most forked repos
     def get_n_repos(self):
+        if self.graphql is not None:
+            forked_repos_data = self.graphql.get_n_repos(self.org, self.n, self.page_stats)
+            if self.progress is not None:
+                self.progress(len(forked_repos_data))
+            return forked_repos_data
+        # Org repositories listing instead of the search when it is the cheaper path
+        if self.repos_strategy() == LIST_STRATEGY:
+            print("Retrieving the repos from the org repositories listing")
+            return self.get_n_repos_from_listing()
         # Results stored here
-        forked_repos_data = OrderedDict()
-        # In case of multiple pages in API results
-        page_num = 1
-        # Adding Personal Access Github Token if available
-        headers = dict()
-        if TOKEN != 'N/A':
-            headers = {'Authorization': f'Token {TOKEN}'}
+        forked_repos_data = RepoResults()
         
-        # Github API allows a max of 1000 results for this API
-        if self.n > 1000:
-            forked_repos_data['Results_Message'] = f"N={self.n} is too large. A Maximum of the top 1000 repositories can be retrieved using the API"
+        # Github API allows a max of 1000 results for this API, more are retrieved with one search per range of forks counts
+        if self.n > SEARCH_RESULTS_LIMIT and self.get_sharded_repos(forked_repos_data):
+            return forked_repos_data
+        if self.n > SEARCH_RESULTS_LIMIT:
+            forked_repos_data.add_message(f"N={self.n} is too large. A Maximum of the top 1000 repositories can be retrieved using the API")
+        # Repos added to forked_repos_data page by page
+        for repo_stat in self.iter_search_repos(forked_repos_data):
+            pass
+        # Return data
+        return forked_repos_data
+
+    # Generator that yields the top n most forked repos (up to 1000) of the search as each page arrives
+    # The repos and the messages about them are added to forked_repos_data
+    def iter_search_repos(self, forked_repos_data):
+        target_count = min(self.n, SEARCH_RESULTS_LIMIT)
+        # Fewest pages needed for the n results
+        per_page, pages_count = plan_pages(target_count)
+        url_format = BASE_URL + f"search/repositories?q=user:{self.org}+sort:forks&per_page={per_page}&page={{page_num}}"
+        requests_count = 0
         retrieved_results_count = 0
-        while retrieved_results_count <= 1000 and retrieved_results_count < self.n:
-            url = BASE_URL + f"search/repositories?q=user:{self.org}+sort:forks&per_page={RESULTS_PER_PAGE}&page={page_num}"
-            page_num = page_num + 1
-            response = requests.get(url, headers=headers)
-            # Checking status code of response
-            if response.status_code == 200:
-                if retrieved_results_count >= self.n:
-                    break
-                # Loading the response in a dict
-                json_data = json.loads(response.text)
-                # Check if total results are more than 'n'
-                if json_data['total_count'] < self.n:
-                    forked_repos_data['Results_Message'] = f"n= {self.n} too large! There are only {json_data['total_count']} forked repos belonging to this org"
-                result_list = json_data["items"]
-                # Check if there are results
-                if len(result_list) > 0:
+        try:
+            for response in self.iter_pages(url_format, pages_count):
+                requests_count += 1
+                # Checking status code of response
+                if response.status_code == 200:
+                    # Loading the response in a dict
+                    json_data = json.loads(response.text)
+                    # Check if total results are more than 'n'
+                    if json_data['total_count'] < self.n:
+                        forked_repos_data.add_message(f"n= {self.n} too large! There are only {json_data['total_count']} forked repos belonging to this org")
+                    result_list = json_data["items"]
                     for result in result_list:
-                        if retrieved_results_count >= self.n:
+                        if retrieved_results_count >= target_count:
                             break
-                        else:
-                            # Store the fork count and name of repo
-                            individual_repo_details = OrderedDict()
-                            individual_repo_details['Name'] = result['name']
-                            individual_repo_details['Forks_Count'] = result['forks_count']
-                            retrieved_results_count = retrieved_results_count + 1
-                            forked_repos_data[retrieved_results_count] = individual_repo_details
+                        # Store the fork count and name of repo
+                        forked_repos_data.append(result['name'], result['forks_count'], result.get('pushed_at'))
+                        retrieved_results_count = retrieved_results_count + 1
+                        yield forked_repos_data[-1]
+                    if self.progress is not None:
+                        self.progress(retrieved_results_count)
+                    # Last page of results
+                    if len(result_list) < per_page:
+                        break
+                # Invalid status code in response
                 else:
+                    print("Something wrong with Forked Repos Request")
+                    print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+                    forked_repos_data.add_message(f"Unable to retrieve all the repos (Status Code: {response.status_code})")
                     break
-            # Invalid status code in response
-            else:
-                print("Something wrong with Forked Repos Request")
-                print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
-                return forked_repos_data
-        # No errors and return data
-        return forked_repos_data
+        finally:
+            # Also recorded when the consumer stops early
+            self.page_stats.record(requests_count, retrieved_results_count, target_count)
+        return
+
+    # Generator that yields the top n most forked repos (RepoStat) in rank order, the searched ones as each page arrives
+    # The repos and the messages about them are also added to forked_repos_data when one is given
+    def iter_repos(self, forked_repos_data=None):
+        if forked_repos_data is None:
+            forked_repos_data = RepoResults()
+        # The GraphQL, listing and sharded paths only know the top n once every page is in
+        if self.graphql is not None or self.n > SEARCH_RESULTS_LIMIT or self.repos_strategy() == LIST_STRATEGY:
+            n_repos = self.get_n_repos()
+            for message in n_repos.messages:
+                forked_repos_data.add_message(message)
+            for repo_stat in n_repos:
+                forked_repos_data.append(*repo_stat)
+                yield repo_stat
+            return
+        yield from self.iter_search_repos(forked_repos_data)
+        return
 
     # Function to retrieve top m contributors by commit count in each repo
-    def get_m_contributors(self, repo_name):
+    # Repos too large for the contributors endpoint use their contributors statistics, unless stats_fallback is False
+    # (the caller then gets the TOO_LARGE_MESSAGE results and polls the statistics of several repos at once)
+    def get_m_contributors(self, repo_name, stats_fallback=True):
         # Commits count by each author stored here
-        contributors_data = OrderedDict()
-        # In case of multiple pages in API results
-        page_num = 1
-        # Adding Personal Access Github Token if available
-        headers = dict()
-        if TOKEN != 'N/A':
-            headers = {'Authorization': f'Token {TOKEN}'}
+        contributors_data = ContributorResults()
+        # Contributors added to contributors_data page by page
+        for contributor_stat in self.iter_contributors(repo_name, contributors_data, stats_fallback):
+            pass
+        # Returning commit data 
+        return contributors_data
+
+    # Generator that yields the top m contributors (ContributorStat) of a repo as each page arrives
+    # The contributors and the messages about them are also added to contributors_data when one is given
+    def iter_contributors(self, repo_name, contributors_data=None, stats_fallback=True):
+        if contributors_data is None:
+            contributors_data = ContributorResults()
+        # Fewest pages needed for the m results
+        per_page, pages_count = plan_pages(self.m)
+        url_format = BASE_URL + f"repos/{self.org}/{repo_name}/contributors?&per_page={per_page}&page={{page_num}}"
+        requests_count = 0
         retrieved_results_count = 0
-        page_num = 1
-        while retrieved_results_count < self.m:
-            url = BASE_URL + f"repos/{self.org}/{repo_name}/contributors?&per_page={RESULTS_PER_PAGE}&page={page_num}"
-            page_num = page_num + 1
-            response = requests.get(url, headers=headers)
-            # Checking status code of response
-            if response.status_code == 200:
-                # Making sure to not store more than m values
-                if retrieved_results_count >= self.m:
-                    break
-                
-                # Loading the response in a dict
-                json_data = json.loads(response.text)
-                if len(json_data) > 0:
+        try:
+            for response in self.iter_pages(url_format, pages_count):
+                requests_count += 1
+                # Checking status code of response
+                if response.status_code == 200:
+                    # Loading the response in a dict
+                    json_data = json.loads(response.text)
                     # Iterating through each contributor
                     for contributor in json_data:
-                        each_contributor = dict()
                         # Making sure to not store more than m values
                         if retrieved_results_count >= self.m:
                             break
                         # Storing the login_id and commit count
-                        each_contributor["login_id"] = contributor["login"]
-                        each_contributor["commit_count"] = contributor["contributions"]
+                        contributors_data.append(contributor["login"], contributor["contributions"])
+                        retrieved_results_count += 1
+                        yield contributors_data[-1]
+                    # Last page of contributors
+                    if len(json_data) < per_page:
+                        break
+                # Repo too large for the contributors endpoint: its contributors statistics are used instead
+                elif is_too_large(response):
+                    if not stats_fallback:
+                        contributors_data.add_message(TOO_LARGE_MESSAGE)
+                        break
+                    print(f"Contributor list of {repo_name} too large to list, using the contributors statistics")
+                    stats_data = self.get_stats_contributors([repo_name])[repo_name]
+                    for message in stats_data.messages:
+                        contributors_data.add_message(message)
+                    for contributor_stat in stats_data:
+                        contributors_data.append(*contributor_stat)
                         retrieved_results_count += 1
-                        contributors_data[retrieved_results_count] = each_contributor
+                        yield contributor_stat
+                    break
+                # Invalid status code in response
                 else:
-                    break      
-            # Invalid status code in response
-            else:
-                print("Something wrong with Get Contributors Request")
-                print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+                    print("Something wrong with Get Contributors Request")
+                    print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+                    contributors_data.add_message(f"Unable to retrieve all the contributors (Status Code: {response.status_code})")
+                    break
+        finally:
+            # Also recorded when the consumer stops early
+            self.page_stats.record(requests_count, retrieved_results_count, self.m)
+        return
+
+    # Function to get the top m contributors of repos too large for the contributors endpoint from their statistics
+    # Every repo is requested at once, the ones still being computed by Github again after a growing delay
+    def get_stats_contributors(self, repo_names):
+        schedule = StatsPollSchedule(self.org, repo_names)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            while not schedule.is_done():
+                urls = [stats_contributors_url(BASE_URL, self.org, repo_name) for repo_name in schedule.pending]
+                schedule.add_responses(list(executor.map(self.session.get, urls)))
+                if not schedule.is_done():
+                    time.sleep(schedule.next_delay())
+        return {repo_name: schedule.results(repo_name, self.m) for repo_name in repo_names}
+
+    # Generator that yields (repo_rank, repo_stat, contributors_data) for every repo in rank order
+    # The contributors are fetched concurrently and each repo is yielded as soon as it is ready
+    # A shared executor (batch mode) can be passed in, it is left running for the next jobs
+    # Repos too large for the contributors endpoint have their statistics polled all at once, with a single schedule
+    def iter_all_contributors(self, repos, max_workers=MAX_WORKERS, snapshot=None, executor=None):
+        repo_stats = list(repos.items())
+
+        # Incremental mode: repos not pushed to since the snapshot reuse their contributors
+        reused_contributors = dict()
+        pushed_at_by_rank = {repo_rank: repo_stat.pushed_at for repo_rank, repo_stat in repo_stats}
+        if snapshot is not None:
+            # The search index can lag behind the pushes: with the GraphQL backend the repos about to be reused
+            # have their last push time looked up live, in batches of aliased lookups
+            reusable_stats = [(repo_rank, repo_stat) for repo_rank, repo_stat in repo_stats if snapshot.covers(repo_stat.name, repo_stat.pushed_at, self.m)]
+            if self.graphql is not None and len(reusable_stats) > 0:
+                repos_details = self.graphql.get_repos_details(self.org, [repo_stat.name for repo_rank, repo_stat in reusable_stats])
+                for repo_rank, repo_stat in reusable_stats:
+                    # Re-queried if the lookup failed
+                    repo_details = repos_details.get(repo_stat.name)
+                    pushed_at_by_rank[repo_rank] = repo_details.pushed_at if repo_details is not None else None
+            for repo_rank, repo_stat in repo_stats:
+                contributors_data = snapshot.get_contributors(repo_stat.name, pushed_at_by_rank[repo_rank], self.m)
+                if contributors_data is not None:
+                    reused_contributors[repo_rank] = contributors_data
+
+        futures = dict()
+        own_executor = None
+        if len(reused_contributors) < len(repo_stats):
+            if executor is None:
+                executor = own_executor = ThreadPoolExecutor(max_workers=max_workers)
+            for repo_rank, repo_stat in repo_stats:
+                if repo_rank not in reused_contributors:
+                    futures[repo_rank] = executor.submit(self.get_m_contributors, repo_stat.name, False)
+
+        # Function to get the contributors fetched for a repo, a failing repo should not abort the rest
+        failed_contributors = dict()
+        def fetched_contributors(repo_rank, repo_stat):
+            if repo_rank in failed_contributors:
+                return failed_contributors[repo_rank]
+            try:
+                return futures[repo_rank].result()
+            except Exception as e:
+                print(f"Something wrong with Get Contributors Request for repo: {repo_stat.name}")
+                print(f"ERROR:\n{e}")
+                contributors_data = failed_contributors[repo_rank] = ContributorResults()
+                contributors_data.add_message(f"Unable to retrieve contributors: {e}")
                 return contributors_data
-        # No errors and returning commit data 
-        return contributors_data
\ No newline at end of file
+
+        # {repo_name: contributors_data} of the repos too large to list, polled once the first one is reached
+        stats_contributors = None
+        try:
+            for repo_rank, repo_stat in repo_stats:
+                if repo_rank in reused_contributors:
+                    yield repo_rank, repo_stat, reused_contributors[repo_rank]
+                    continue
+                contributors_data = fetched_contributors(repo_rank, repo_stat)
+                # Repo too large for the contributors endpoint: waiting for the other repos still being fetched,
+                # then the statistics of every repo too large to list are polled together
+                if TOO_LARGE_MESSAGE in contributors_data.messages:
+                    if stats_contributors is None:
+                        too_large_names = [
+                            other_stat.name for other_rank, other_stat in repo_stats
+                            if other_rank in futures and TOO_LARGE_MESSAGE in fetched_contributors(other_rank, other_stat).messages
+                        ]
+                        print(f"Contributor lists of {len(too_large_names)} repos too large to list, using the contributors statistics")
+                        stats_contributors = self.get_stats_contributors(too_large_names)
+                    contributors_data = stats_contributors[repo_stat.name]
+                # Only complete results are kept for the next run
+                if snapshot is not None and contributors_data.is_complete():
+                    snapshot.set_contributors(repo_stat.name, pushed_at_by_rank[repo_rank], self.m, contributors_data)
+                yield repo_rank, repo_stat, contributors_data
+        finally:
+            # Consumer stopped early: the repos not started yet are dropped
+            for future in futures.values():
+                future.cancel()
+            if own_executor is not None:
+                own_executor.shutdown(wait=True)
+
+        if snapshot is not None:
+            snapshot.save()
+        return
+
+    # Function to retrieve the top m contributors of every repo concurrently
+    def get_all_contributors(self, repos, max_workers=MAX_WORKERS, snapshot=None):
+        # Results stored here in the same rank order as repos
+        all_contributors_data = OrderedDict()
+        for repo_rank, repo_stat, contributors_data in self.iter_all_contributors(repos, max_workers, snapshot):
+            all_contributors_data[repo_rank] = contributors_data
+        return all_contributors_data
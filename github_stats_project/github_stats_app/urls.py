@@ -5,5 +5,9 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('repos', views.repos, name='repos'),
+    path('repos/job/<str:job_id>', views.repos_job, name='repos_job'),
+    path('repos/job/<str:job_id>/status', views.repos_job_status, name='repos_job_status'),
     path('contributors/<str:org>/<int:n>/<int:m>/<str:repo_name>', views.contributors, name='contributors'),
+    path('csv/<str:org>/<int:n>/<int:m>', views.results_csv, name='results_csv'),
+    path('metrics', views.metrics, name='metrics'),
 ]
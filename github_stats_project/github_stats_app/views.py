@@ -1,11 +1,20 @@
 from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse, JsonResponse
 from django.contrib import messages
+from django.conf import settings
 import json, requests, os, itertools, csv, io
 from collections import OrderedDict
 from collections import Counter
 from datetime import datetime
+from .github_rate_limit import get_rate_limiter
+from .github_session import get_session, CountingSession
+from .page_planner import plan_pages
 from .top_dev_org_contributors import TopContributors
+from .results_csv import results_file_name, iter_csv_lines
+from .result_types import RepoResults
+from . import results_cache, results_store
+from .jobs import get_job_queue, DONE, FAILED
+from .github_metrics import get_metrics
 
 # Constants
 BASE_URL = 'https://api.github.com/'
@@ -15,6 +24,119 @@ else:
     TOKEN = 'N/A'
 
 
+# Function that checks the org and retrieves its top n most forked repos
+# Every view and job sends its requests through the shared keep-alive session (get_session()), so the connections stay warm
+def fetch_repos(org_name, n, m, progress=None):
+    obj = TopContributors(org_name, n, m, progress=progress)
+    # Checking for valid org name
+    org_check = obj.check_org()
+    if org_check == False:
+        return org_check, RepoResults(), dict()
+    # Get top n most forked repos
+    n_repos = obj.get_n_repos()
+    # Github API Access Rate Limit and Rate Remaining seen in the responses
+    rate_limit = obj.last_rate_limit()
+    return org_check, n_repos, rate_limit
+
+
+# Function that retrieves the top m contributors of a repo
+def fetch_contributors(org, n, m, repo_name):
+    obj = TopContributors(org, n, m)
+    contributors_dict = obj.get_m_contributors(repo_name)
+    # Github API Access Rate Limit and Rate Remaining seen in the responses
+    rate_limit = obj.last_rate_limit()
+    return contributors_dict, rate_limit
+
+
+# Function to build the rows shown on the contributors page
+def contributors_result_list(contributors_dict):
+    # Results stored in a list
+    result_list = list()
+
+    # Iterating through and storing results
+    for rank, contributor in contributors_dict.items():
+        row = list()
+        row.append(str(rank) + "/" + str(len(contributors_dict)))
+        row.append(contributor.login_id)
+        row.append(contributor.commit_count)
+        result_list.append(row)
+    return result_list
+
+
+# Function run by a background job: warms the results cache with the top m contributors of repos, in rank order
+# Stops once fewer than min_remaining core requests are left or once the next repo would go over max_requests
+# (every page of contributors and every statistics poll counts against it)
+def run_prefetch_job(job, org, n, m, repo_names, min_remaining, max_requests):
+    print(f"Prefetching the {m} most active contributors of the top {len(repo_names)} repos")
+    session = CountingSession(get_session())
+    obj = TopContributors(org, n, m, session=session)
+    # Pages of contributors of one repo (a repo too large to list also polls its statistics)
+    repo_requests = plan_pages(m)[1]
+    prefetched_count = 0
+    for repo_name in repo_names:
+        rate_limit = obj.last_rate_limit()
+        if rate_limit.get("rate_remaining", min_remaining) < min_remaining:
+            print(f"Contributors prefetch stopped, less than {min_remaining} requests left")
+            break
+        if session.requests_count + repo_requests > max_requests:
+            print(f"Contributors prefetch stopped, budget of {max_requests} requests spent")
+            break
+        # Not fetched again if the contributors page was opened in the meantime
+        if results_cache.get_result(org, n, m, repo_name) is None:
+            contributors_dict = obj.get_m_contributors(repo_name)
+            if contributors_dict.is_complete():
+                results_cache.set_result(org, n, m, contributors_result_list(contributors_dict), repo_name)
+                results_store.store_contributors(org, repo_name, m, contributors_dict)
+                prefetched_count += 1
+        job.set_progress(job.progress + 1)
+    return {"prefetched_count": prefetched_count, "requests_count": session.requests_count}
+
+
+# Function to start prefetching the contributors of the top K repos (GITHUB_PREFETCH_TOP_K, 0 to disable)
+def start_prefetch(org, n, m, repo_names):
+    top_k = getattr(settings, 'GITHUB_PREFETCH_TOP_K', 0)
+    min_remaining = getattr(settings, 'GITHUB_PREFETCH_MIN_REMAINING', 1000)
+    max_requests = getattr(settings, 'GITHUB_PREFETCH_MAX_REQUESTS', 100)
+    # Repos whose contributors are already cached are skipped
+    repo_names = [repo_name for repo_name in repo_names[:top_k] if results_cache.get_result(org, n, m, repo_name) is None]
+    if len(repo_names) == 0:
+        return None
+    context = {"org": org, "n": n, "m": m, "prefetch": True}
+    return get_job_queue().submit(len(repo_names), context, run_prefetch_job, org, n, m, repo_names, min_remaining, max_requests, key=('prefetch', org.lower(), n, m))
+
+
+# Function run by a background job of the repos view: retrieves the top n repos of an org
+def run_repos_job(job, org_name, n, m):
+    # Checking for valid org name and getting the top n most forked repos
+    print(f"Retrieving the {n} most forked repos")
+    org_check, n_repos, rate_limit = fetch_repos(org_name, n, m, progress=job.set_progress)
+    if org_check == False:
+        # Invalid org entered
+        return {"error_messages": [f"Unable to retrieve organization '{org_name}' using the Github API"]}
+
+    result_list = list()
+    for rank, repo_stat in n_repos.items():
+        row = list()
+        row.append(str(rank) + "/" + str(len(n_repos)))
+        row.append(repo_stat.name)
+        row.append(repo_stat.forks_count)
+        result_list.append(row)
+
+    # Only complete results are cached and stored, a truncated list of repos is retrieved again next time
+    if n_repos.is_complete():
+        results_store.store_repos(org_name, n, n_repos)
+        # The other cached results of the org (other n, contributors pages) are read again from the new store
+        results_cache.invalidate_org(org_name)
+        results_cache.set_result(org_name, n, m, result_list)
+    start_prefetch(org_name, n, m, [repo_stat.name for repo_stat in n_repos])
+    job_result = {"result_data": result_list}
+    # Adding Github API Access Rate Limit and Rate Remaining
+    if "rate_limit" in rate_limit and "rate_remaining" in rate_limit:
+        job_result["rate_limit"] = rate_limit["rate_limit"]
+        job_result["rate_remaining"] = rate_limit["rate_remaining"]
+    return job_result
+
+
 # Function to handle requests to the home page / dashboard
 def index(request):
     return render(request, 'pages/index.html')
@@ -44,37 +166,33 @@ def repos(request):
             context["error_messages"] = error_messages
             return render(request, 'pages/repos.html', context)
 
-        # Calling the class with the values
-        obj = TopContributors(org_name, n, m)
+        # Refresh asked for: dropping every cached result of the org
+        if 'refresh' in request.POST:
+            results_cache.invalidate_org(org_name)
 
-        # Checking for valid org name
-        org_check = obj.check_org()
-        if org_check == False:
-            # Invalid org entered
-            error_messages.append(f"Unable to retrieve organization '{org_name}' using the Github API")
-            # Sending error message
-            context["error_messages"] = error_messages
-            return render(request, 'pages/repos.html', context)
-        
-        result_list = list()
-        # Get top n most forked repos
-        print(f"Retrieving the {n} most forked repos")
-        n_repos = obj.get_n_repos()
-        for key, repo_details in n_repos.items():
-            if type(key) == int:
-                # Get top m contributors for each repo
-                # print(f"Retrieving the {m} most active contributors for repo: {repo_details['Name']}")
-                #repo_details["Commits"] = obj.get_m_commits(repo_details['Name'])
-                row = list()
-                row.append(str(key) + "/" + str(len(n_repos)))
-                row.append(repo_details['Name'])
-                row.append(repo_details['Forks_Count'])
-                result_list.append(row)
-        
-        context["result_data"] = result_list
+        # Results already retrieved for the same org, n and m (cache first, then the database)
+        cached_result = results_cache.get_result(org_name, n, m)
+        if cached_result is None and 'refresh' not in request.POST:
+            stored_repos = results_store.get_top_repos(org_name, n)
+            if stored_repos is not None:
+                repos_rows, fetched_at = stored_repos
+                result_list = list()
+                for rank, (repo_name, forks_count) in enumerate(repos_rows, start=1):
+                    result_list.append([str(rank) + "/" + str(len(repos_rows)), repo_name, forks_count])
+                cached_result = results_cache.set_result(org_name, n, m, result_list, fetched_at=fetched_at)
+
+        if cached_result is None:
+            # Retrieved in the background, the job page polls the job until it is done
+            # Concurrent requests for the same query join the job already running
+            job = get_job_queue().submit(n, context, run_repos_job, org_name, n, m, key=('repos', org_name.lower(), n, m))
+            return redirect('repos_job', job_id=job.id)
+
+        context["result_data"] = cached_result["result_data"]
+        context["cached_at"] = cached_result["fetched_at"]
+        rate_limit = get_rate_limiter().last_seen()
+        start_prefetch(org_name, n, m, [row[1] for row in cached_result["result_data"]])
 
         # Adding Github API Access Rate Limit and Rate Remaining
-        rate_limit = obj.check_rate_limit()
         if "rate_limit" in rate_limit and "rate_remaining" in rate_limit:
             context["rate_limit"] = rate_limit["rate_limit"]
             context["rate_remaining"] = rate_limit["rate_remaining"]
@@ -82,13 +200,40 @@ def repos(request):
         return render(request, 'pages/repos.html', context)
 
 
+# Function to handle displaying a background job of the repos view
+def repos_job(request, job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        messages.error(request, "Job not found, please submit the inputs again")
+        return redirect('index')
+
+    # Creating the context to send to the repos page
+    context = dict(job.context)
+    if job.status == DONE:
+        context.update(job.result)
+        return render(request, 'pages/repos.html', context)
+    if job.status == FAILED:
+        context["error_messages"] = [f"Unable to retrieve the repos: {job.error}"]
+        return render(request, 'pages/repos.html', context)
+
+    # Still running: the job page polls the status until the job is over
+    context["job"] = job
+    return render(request, 'pages/job.html', context)
+
+
+# Function to handle the status requests (JSON) of a background job of the repos view
+def repos_job_status(request, job_id):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return JsonResponse({'id': job_id, 'status': 'unknown'}, status=404)
+    return JsonResponse(job.status_data())
+
+
 # Function to handle displaying the contributors for a repo
 def contributors(request, org, n, m, repo_name):
-    # To ensure requests is from the repo page 
-    if '/repos' in request.META.get('HTTP_REFERER'):
-        # Calling the class with the values
-        obj = TopContributors(org, n, m)
-
+    # To ensure requests is from the repo page (or the contributors page when refreshing)
+    referer = request.META.get('HTTP_REFERER', '')
+    if '/repos' in referer or '/contributors/' in referer:
         # Creating the context to send to the repos page
         context = {
             "org": org,
@@ -97,26 +242,38 @@ def contributors(request, org, n, m, repo_name):
             "repo_name": repo_name
         }
 
-        # Get top n most forked repos
-        print(f"Retrieving the {m} most active contributors")
-        contributors_dict = obj.get_m_contributors(repo_name)
+        # Refresh asked for: dropping the cached result of the repo
+        if 'refresh' in request.GET:
+            results_cache.delete_result(org, n, m, repo_name)
 
-        # Results stored in a list
-        result_list = list()
+        # Results already retrieved for the same org, n, m and repo (cache first, then the database)
+        cached_result = results_cache.get_result(org, n, m, repo_name)
+        if cached_result is None and 'refresh' not in request.GET:
+            stored_contributors = results_store.get_top_contributors(org, repo_name, m)
+            if stored_contributors is not None:
+                contributors_rows, fetched_at = stored_contributors
+                result_list = list()
+                for rank, (login_id, commit_count) in enumerate(contributors_rows, start=1):
+                    result_list.append([str(rank) + "/" + str(len(contributors_rows)), login_id, commit_count])
+                cached_result = results_cache.set_result(org, n, m, result_list, repo_name, fetched_at=fetched_at)
 
-        # Iterating through and storing results
-        for key, contributor_data in contributors_dict.items():
-            if type(key) == int:
-                row = list()
-                row.append(str(key) + "/" + str(len(contributors_dict)))
-                row.append(contributor_data['login_id'])
-                row.append(contributor_data['commit_count'])
-                result_list.append(row)
-        
-        context["result_data"] = result_list
+        if cached_result is not None:
+            context["result_data"] = cached_result["result_data"]
+            context["cached_at"] = cached_result["fetched_at"]
+            rate_limit = get_rate_limiter().last_seen()
+        else:
+            # Get top m most active contributors
+            print(f"Retrieving the {m} most active contributors")
+            contributors_dict, rate_limit = fetch_contributors(org, n, m, repo_name)
+
+            result_list = contributors_result_list(contributors_dict)
+            context["result_data"] = result_list
+            # Only complete results are cached and stored, failed or partial pages are retrieved again next time
+            if contributors_dict.is_complete():
+                results_cache.set_result(org, n, m, result_list, repo_name)
+                results_store.store_contributors(org, repo_name, m, contributors_dict)
 
         # Adding Github API Access Rate Limit and Rate Remaining
-        rate_limit = obj.check_rate_limit()
         if "rate_limit" in rate_limit and "rate_remaining" in rate_limit:
             context["rate_limit"] = rate_limit["rate_limit"]
             context["rate_remaining"] = rate_limit["rate_remaining"]
@@ -125,4 +282,30 @@ def contributors(request, org, n, m, repo_name):
 
     # If prev url is not the repo page then redirect to home page
     else:
-        return redirect('index')
\ No newline at end of file
+        return redirect('index')
+
+
+# Function to handle downloading the results as a CSV
+# The rows of each repo are sent as soon as its contributors are retrieved
+def results_csv(request, org, n, m):
+    if n <= 0 or m <= 0:
+        messages.error(request, "Only positive integer values greater than 0 allowed for N and M")
+        return redirect('index')
+
+    obj = TopContributors(org, n, m)
+    # Checking for valid org name
+    if obj.check_org() == False:
+        messages.error(request, f"Unable to retrieve organization '{org}' using the Github API")
+        return redirect('index')
+
+    # Get top n most forked repos, the contributors of each repo are fetched while the response is streamed
+    print(f"Retrieving the {n} most forked repos and their {m} most active contributors")
+    n_repos = obj.get_n_repos()
+    response = StreamingHttpResponse(iter_csv_lines(obj.iter_all_contributors(n_repos)), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{results_file_name(org, n, m)}"'
+    return response
+
+
+# Function to expose the metrics of the Github API requests in the Prometheus text format
+def metrics(request):
+    return HttpResponse(get_metrics().render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -113,3 +113,39 @@ STATIC_URL = '/static/'
 MESSAGE_TAGS = {
     messages.ERROR: 'danger',
 }
+
+# Caches
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# 'github_results' stores the results shown by the repos and contributors views
+
+GITHUB_RESULTS_CACHE_TTL = int(os.environ.get('GITHUB_RESULTS_CACHE_TTL', 600))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'github_results': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'github-results',
+        'TIMEOUT': GITHUB_RESULTS_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+# Max age in seconds of the results in the database that the views answer from
+GITHUB_RESULTS_STORE_MAX_AGE = int(os.environ.get('GITHUB_RESULTS_STORE_MAX_AGE', 3600))
+
+# Background jobs of the repos view
+# Number of worker threads and number of finished jobs kept for their job page
+GITHUB_JOB_WORKERS = int(os.environ.get('GITHUB_JOB_WORKERS', 4))
+GITHUB_JOBS_KEPT = int(os.environ.get('GITHUB_JOBS_KEPT', 100))
+
+# Speculative prefetch of the contributors of the top K repos once the repo list is known
+# (0 disables it). Prefetching stops while fewer than GITHUB_PREFETCH_MIN_REMAINING core
+# requests are left, so the clicks on the repos page keep that budget, and once a prefetch
+# job has sent GITHUB_PREFETCH_MAX_REQUESTS requests (pages and statistics polls)
+GITHUB_PREFETCH_TOP_K = int(os.environ.get('GITHUB_PREFETCH_TOP_K', 0))
+GITHUB_PREFETCH_MIN_REMAINING = int(os.environ.get('GITHUB_PREFETCH_MIN_REMAINING', 1000))
+GITHUB_PREFETCH_MAX_REQUESTS = int(os.environ.get('GITHUB_PREFETCH_MAX_REQUESTS', 100))
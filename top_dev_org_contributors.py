@@ -13,6 +13,24 @@ Inputs:
 3. m (type: int) - Top 'm' contributors by commit count for each of 
 the repos
 
+Batch Mode:
+python top_dev_org_contributors.py --batch jobs.csv [more_jobs.csv ...]
+Each line of a jobs file is one "org,n,m" job (lines starting with # are
+skipped). Identical jobs are run once, all the jobs share the same
+session, rate limit budget and worker pool.
+
+JSON Lines Mode (non-interactive):
+python top_dev_org_contributors.py --jsonl {org} {n} {m}
+The results are streamed to stdout as they are retrieved, one JSON object
+per line, while everything else the program prints goes to stderr:
+{"type": "repo", "repo_rank": 1, "repo_name": "...", "forks_count": 9000}
+{"type": "contributor", "repo_rank": 1, "repo_name": "...", "contributor_rank": 1, "login_id": "...", "commit_count": 500}
+{"type": "message", "repo_name": null, "message": "n= 500 too large! ..."}
+The repos come as each page of the search arrives, the contributors of
+each repo (in repo rank order) as soon as they are retrieved, fetched
+like in the other modes (GITHUB_INCREMENTAL_REFRESH applies too). The exit
+status is 1 if the query could not be run.
+
 Output:
 A CSV containing all the results
 Result file format:
@@ -20,6 +38,12 @@ Result file format:
 
 File Naming Convention:
 Results/Results_{org}_{n}_forks_{m}_contributors.csv
+A query (org, n', m') covered by a results file of the org with n >= n'
+and m >= m' written less than GITHUB_RESULTS_FILE_MAX_AGE seconds ago
+(default: 3600) is answered by slicing that file instead of using the
+API (index in Results/index/results_index.json)
+Batch Mode Summary (one row per job):
+Results/Batch_Summary.csv
 
 It lists the top 'n' most forked repos along with the top 'm' contributors 
 by commit count along with the number of commits on the repo each contributor 
@@ -27,6 +51,9 @@ has made
 
 API Information:
 
+All requests are sent through the pooled keep-alive session in
+github_stats_project/github_stats_app/github_session.py
+
 Header Info included if we have access to a token:
 key: Authorization
 value: Token {Token_Value}
@@ -48,42 +75,71 @@ Format:
 https://api.github.com/search/repositories?q=user:{org_name}+sort:forks&per_page={results_per_page}&page={page_num}
 Eg:
 https://api.github.com/search/repositories?q=user:microsoft+sort:forks&per_page=10&page=2
+The search API returns at most 1000 results, for n > 1000 the query is
+split into forks:{low}..{high} ranges of at most 1000 repos each that are
+searched concurrently and merged (github_stats_app/search_shards.py)
+Eg:
+https://api.github.com/search/repositories?q=user:microsoft+forks:15..223+sort:forks&per_page=100&page=1
 
 4. API request to get top contributors by commit count of a repo:
 Format:
 https://api.github.com/repos/{org_name}/{repo_name}/contributors?&per_page={results_per_page}&page={page_num}
 Eg:
 https://api.github.com/repos/facebook/react/contributors?&per_page=10&page=2
+Repos too large for this endpoint (403 "too large to list") fall back
+to their contributors statistics (github_stats_app/contributor_stats.py):
+https://api.github.com/repos/{org_name}/{repo_name}/stats/contributors
+
+5. API request to list the repositories of an organization, used instead
+of the search (3.) when it is cheaper for the size of the org and the
+search / core quota left (github_stats_app/org_repos.py), only the top n
+by forks count are kept while the pages are streamed:
+Format:
+https://api.github.com/orgs/{org_name}/repos?per_page=100&page={page_num}
+Eg:
+https://api.github.com/orgs/microsoft/repos?per_page=100&page=3
 '''
 
 import json
-import requests
 import os
+import sys
 from collections import OrderedDict
-import itertools
-from collections import Counter
 import csv
 from datetime import datetime
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+# The HTTP transport and the retrieval of the results are shared with the Django app
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'github_stats_project'))
+from github_stats_app import top_dev_org_contributors as app_helper
+from github_stats_app.github_metrics import get_metrics
+from github_stats_app.page_planner import PageStats
+from github_stats_app.graphql_backend import API_BACKEND
+from github_stats_app.result_types import RepoResults
+from github_stats_app.snapshots import ContributorsSnapshot
+from github_stats_app.results_csv import RESULTS_CSV_HEADER, results_file_name, iter_result_rows
+from github_stats_app.results_index import ResultsIndex
 
 # Constants
+# Fixed page size of the original fetch loops, the requests saved are measured against it
 RESULTS_PER_PAGE = 10
-BASE_URL = 'https://api.github.com/'
-if 'GITHUB_PERSONAL_TOKEN' in os.environ:
-    TOKEN = os.environ['GITHUB_PERSONAL_TOKEN']
-else:
-    TOKEN = 'N/A'
+# Max number of repos whose contributors are fetched at the same time
+MAX_WORKERS = 8
+# Incremental refresh: only re-query the contributors of repos pushed to since the last run
+INCREMENTAL_REFRESH = os.environ.get('GITHUB_INCREMENTAL_REFRESH', '0') == '1'
+# Combined summary written by the batch mode
+BATCH_SUMMARY_FILE = 'Results/Batch_Summary.csv'
+BATCH_SUMMARY_HEADER = ['Org', 'N', 'M', 'Status', 'Repos_Retrieved', 'Contributors_Retrieved', 'Results_File', 'Messages']
 
 
 # Class that will take in org name, 'n' and 'm' and print out the results
-class TopContributors:
-    n = 0
-    m = 0
-    org = ''
-
-    def __init__(self, org, n, m): 
-        self.org = org
-        self.n = n
-        self.m = m
+# The results are retrieved by the TopContributors helper class of the Django app, only the printing and the results files are added here
+class TopContributors(app_helper.TopContributors):
+
+    def __init__(self, org, n, m, session=None, backend=API_BACKEND): 
+        super().__init__(org, n, m, session, backend)
+        # Requests saved measured against the page size of this program
+        self.page_stats = PageStats(RESULTS_PER_PAGE)
         return
 
     # Function to print the values entered by the user
@@ -92,183 +148,257 @@ class TopContributors:
         print(f"Org = {self.org}\nn = {self.n}\nm = {self.m}")
         return
 
-    # Function to check rate limit of access to API
-    def check_rate_limit(self):
-        url = BASE_URL + f"rate_limit"
-
-        # Adding Personal Acess Github Token if available
-        headers = dict()
-        if TOKEN != 'N/A':
-            headers = {'Authorization': f'Token {TOKEN}'}
-
-        response = requests.get(url, headers=headers)
-
-        # Checking status code of response
-        if response.status_code == 200:
-            # Loading the response in a dict
-            json_data = json.loads(response.text)
-            # Loading the response in a dict
-            json_data = json.loads(response.text)
-            print(f"\nRate Limit:{json_data['rate']['limit']}\n")
-            print(f"Rate Remaining:{json_data['rate']['remaining']}\n")
-        
-        # Invalid status code in response
-        else:
-            print("Something wrong in rate limit request")
-            print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
+    # Function to print the usage of each token of the token pool
+    def print_token_stats(self):
+        if self.session.token_pool is None:
             return
-
+        print("\nToken pool usage:")
+        for token_stats in self.session.token_pool.stats():
+            print(f"Token {token_stats['token']} - Requests: {token_stats['requests']}, Times parked: {token_stats['parked']}, Remaining: {token_stats['remaining']}")
         return
-    
-    # Function to check if organization is valid or not
-    def check_org(self):
-        url = BASE_URL + f"orgs/{org}"
 
-        # Adding Personal Acess Github Token if available
-        headers = dict()
-        if TOKEN != 'N/A':
-            headers = {'Authorization': f'Token {TOKEN}'}
+    # Function to print the time, requests, bytes and cache hits of each phase of the run
+    def print_phase_breakdown(self):
+        if self.session.metrics is None or len(self.session.metrics.phases) == 0:
+            return
+        print("\nTime per phase:")
+        for phase, phase_stats in self.session.metrics.phases.items():
+            print(f"{phase} - {round(phase_stats['seconds'], 2)} seconds, Requests: {phase_stats['requests']}, KB received: {round(phase_stats['bytes'] / 1024, 1)}, Cache hits: {phase_stats['cache_hits']}")
+        return
 
-        response = requests.get(url, headers=headers)
-        
-        # Checking status code of response
-        if response.status_code == 200:
-            # Loading the response in a dict
-            json_data = json.loads(response.text)
-            if "message" in json_data and json_data["message"] == 'Not Found':
-                print("Invalid Github Organization entered")
-                return
-            elif "name" in json_data:
-                print("Valid organization entered")
-                print(f"Organization name retrieved from API:\n{json_data['name']}\n")
-            else:
-                print("Invalid Github Organization entered")
-                sys.exit()
-        
-        # Invalid status code in response
-        else:
-            print("Invalid Github Organization entered")
-            print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
-            sys.exit()
-        
+    # Function to check and print the rate limit of access to API
+    def check_rate_limit(self):
+        rate_limit = super().check_rate_limit()
+        if rate_limit is not None:
+            print(f"\nRate Limit:{rate_limit['rate_limit']}\n")
+            print(f"Rate Remaining:{rate_limit['rate_remaining']}\n")
         return
 
-    # Function to get top n most forked repos
-    def get_n_repos(self):
-        # Results stored here
-        forked_repos_data = OrderedDict()
-        # In case of multiple pages in API results
-        page_num = 1
-        # Adding Personal Access Github Token if available
-        headers = dict()
-        if TOKEN != 'N/A':
-            headers = {'Authorization': f'Token {TOKEN}'}
-        
-        # Github API allows a max of 1000 results for this API
-        if n > 1000:
-            forked_repos_data['Results_Message'] = f"N={n} is too large. A Maximum of the top 1000 repositories can be retrieved using the API"
-        retrieved_results_count = 0
-        while retrieved_results_count <= 1000 and retrieved_results_count < n:
-            url = BASE_URL + f"search/repositories?q=user:{org}+sort:forks&per_page={RESULTS_PER_PAGE}&page={page_num}"
-            page_num = page_num + 1
-            response = requests.get(url, headers=headers)
-            # Checking status code of response
-            if response.status_code == 200:
-                # Loading the response in a dict
-                json_data = json.loads(response.text)
-                # Check if total results are more than 'n'
-                if json_data['total_count'] < n:
-                    forked_repos_data['Results_Message'] = f"n= {n} too large! There are only {json_data['total_count']} forked repos belonging to this org"
-                result_list = json_data["items"]
-                # Check if there are results
-                if len(result_list) > 0:
-                    for result in result_list:
-                        if retrieved_results_count >= n:
-                            break
-                        else:
-                            # Store the fork count and name of repo
-                            individual_repo_details = OrderedDict()
-                            individual_repo_details['Name'] = result['name']
-                            individual_repo_details['Forks_Count'] = result['forks_count']
-                            retrieved_results_count = retrieved_results_count + 1
-                            forked_repos_data[retrieved_results_count] = individual_repo_details
-
-            # Invalid status code in response
-            else:
-                print("Something wrong with Forked Repos Request")
-                print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
-                return forked_repos_data
-        # No errors and return data
-        return forked_repos_data
+    # Function to check if organization is valid or not
+    def check_org(self):
+        org_check = super().check_org()
+        if org_check == False:
+            print("Invalid Github Organization entered")
+        return org_check
 
     # Function to retrieve top m contributors by commit count in each repo
     def get_m_commits(self, repo_name):
-        # Commits count by each author stored here
-        commits_data = OrderedDict()
-        # In case of multiple pages in API results
-        page_num = 1
-        # Adding Personal Access Github Token if available
-        headers = dict()
-        if TOKEN != 'N/A':
-            headers = {'Authorization': f'Token {TOKEN}'}
-        retrieved_results_count = 0
-        page_num = 1
-        while retrieved_results_count < m:
-            url = BASE_URL + f"repos/{org}/{repo_name}/contributors?&per_page={RESULTS_PER_PAGE}&page={page_num}"
-            page_num = page_num + 1
-            response = requests.get(url, headers=headers)
-            # Checking status code of response
-            if response.status_code == 200:
-                # Making sure to not store more than m values
-                if retrieved_results_count >= m:
-                    break
-                
-                # Loading the response in a dict
-                json_data = json.loads(response.text)
-                if len(json_data) > 0:
-                    # Iterating through each contributor
-                    for contributor in json_data:
-                        each_contributor = dict()
-                        # Making sure to not store more than m values
-                        if retrieved_results_count >= m:
-                            break
-                        # Storing the login_id and commit count
-                        each_contributor["login_id"] = contributor["login"]
-                        each_contributor["commit_count"] = contributor["contributions"]
-                        retrieved_results_count += 1
-                        commits_data[retrieved_results_count] = each_contributor
-                else:
-                    break      
-            # Invalid status code in response
-            else:
-                print("Something wrong with Get Contributors Request")
-                print(f"ERROR: Error in request\nStatus Code: {response.status_code}\nStatus Message: {response.text}")
-                return commits_data
-        # No errors and returning commit data 
-        return commits_data
-    
-    # Function to write results into a csv
-    def write_results(self, results_dict):
+        return self.get_m_contributors(repo_name)
+
+    # Function to write results into a csv as they are retrieved
+    # repos_contributors yields (repo_rank, repo_stat, commits_data), the rows of each repo are flushed right away
+    # The file is written under a temporary name, then renamed and added to the results index once complete
+    # repos_complete is False when the top n repos could not all be retrieved (n_repos.is_complete())
+    def write_results(self, repos_contributors, results_index=None, fetched_at=None, repos_complete=True):
         if not os.path.exists('Results'):
             os.makedirs('Results')
-        file_name = f"Results_{org}_{n}_forks_{m}_contributors.csv"
-        with open(f'Results/{file_name}', mode='w') as result_file:
+        file_name = results_file_name(self.org, self.n, self.m)
+        # A file missing repos or contributors is never used to answer a query
+        complete = repos_complete
+
+        # Checking that the contributors of each repo were all retrieved on their way to the csv
+        def check_complete(repos_contributors):
+            nonlocal complete
+            for repo_rank, repo_stat, commits_data in repos_contributors:
+                complete = complete and commits_data.is_complete()
+                yield repo_rank, repo_stat, commits_data
+
+        with open(f'Results/{file_name}.part', mode='w') as result_file:
             result_writer = csv.writer(result_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-            result_writer.writerow(['Repo_Rank', 'Repo_Name', 'Repo_Forks_Count', 'Contributor_Rank', 'Contributor_Login_ID', 'Contributor_Commit_Count'])
-            for repo_rank, repo_details in results_dict.items():
-                if type(repo_rank) == int:
-                    for contributor_rank, contributor_details in repo_details["Commits"].items():
-                        if type(contributor_rank) == int:
-                            result_writer.writerow([repo_rank, repo_details['Name'], repo_details['Forks_Count'], contributor_rank, contributor_details['login_id'], contributor_details['commit_count']])
+            result_writer.writerow(RESULTS_CSV_HEADER)
+            for repo_rows in iter_result_rows(check_complete(repos_contributors)):
+                result_writer.writerows(repo_rows)
+                result_file.flush()
+        os.replace(f'Results/{file_name}.part', f'Results/{file_name}')
+
+        # Results taken from a stored file keep the time that file was fetched
+        if fetched_at is not None:
+            os.utime(f'Results/{file_name}', (fetched_at, fetched_at))
+        results_index = results_index if results_index is not None else ResultsIndex()
+        results_index.add(file_name, self.org, self.n, self.m, complete)
 
         print(f"\nResults written into file:\nResults/{file_name}")
-        return
-        
+        return f'Results/{file_name}'
+
+    # Function to get the results of the query from a fresh stored results file that covers it
+    # Returns (results_file, repos_contributors), None if there is none
+    def get_stored_results(self, results_index):
+        stored_results = results_index.get_results(self.org, self.n, self.m)
+        if stored_results is not None:
+            print(f"\nAnswering from the results stored in Results/{stored_results[0].file_name}")
+        return stored_results
+
+    # Function to write the results read from a stored results file
+    def write_stored_results(self, results_file, repos_contributors, results_index):
+        # Same query: the stored file already holds the results
+        if results_file.file_name == results_file_name(self.org, self.n, self.m):
+            print(f"\nResults written into file:\nResults/{results_file.file_name}")
+            return f'Results/{results_file.file_name}'
+        return self.write_results(repos_contributors, results_index, fetched_at=results_file.fetched_at)
+
+
+# Function to read the (org, n, m) jobs of batch files, identical jobs are only kept once
+def read_batch_jobs(paths):
+    jobs = list()
+    for path in paths:
+        with open(path) as jobs_file:
+            for line_num, row in enumerate(csv.reader(jobs_file), start=1):
+                # Skipping blank lines and comments
+                if len(row) == 0 or row[0].strip() == '' or row[0].strip().startswith('#'):
+                    continue
+                try:
+                    org, n, m = row[0].strip(), int(row[1]), int(row[2])
+                except (IndexError, ValueError):
+                    print(f"ERROR: Skipping line {line_num} of {path}, expected: org,n,m")
+                    continue
+                if n <= 0 or m <= 0:
+                    print(f"ERROR: Skipping line {line_num} of {path}, only positive integer values greater than 0 allowed for n and m")
+                    continue
+                jobs.append((org, n, m))
+    return dedupe_batch_jobs(jobs)
+
+
+# Function to drop the repeated jobs of a list of (org, n, m) jobs (org names are not case sensitive)
+def dedupe_batch_jobs(jobs):
+    unique_jobs = OrderedDict()
+    for org, n, m in jobs:
+        key = (org.lower(), n, m)
+        if key in unique_jobs:
+            print(f"Skipping duplicate job: {org}, n = {n}, m = {m}")
+            continue
+        unique_jobs[key] = (org, n, m)
+    return list(unique_jobs.values())
+
+
+# Function to run a list of (org, n, m) jobs over one session, rate limit budget and worker pool
+def run_batch(jobs, max_workers=MAX_WORKERS):
+    jobs = dedupe_batch_jobs(jobs)
+    summary_rows = list()
+    if len(jobs) == 0:
+        print("No jobs to run")
+        return summary_rows
+
+    # Rate limit checked once for the whole batch
+    TopContributors(jobs[0][0], jobs[0][1], jobs[0][2]).check_rate_limit()
+    # Jobs covered by a fresh stored results file (including the ones written by earlier jobs) are not fetched again
+    results_index = ResultsIndex()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for job_num, (org, n, m) in enumerate(jobs, start=1):
+            print(f"\nJob {job_num}/{len(jobs)}:")
+            obj = TopContributors(org, n, m)
+            obj.print_inputs()
+            summary_row = [org, n, m, 'Invalid organization', 0, 0, '', '']
+            summary_rows.append(summary_row)
+            try:
+                messages = list()
+                contributors_count = 0
+
+                # Counting the results of each repo on their way to the csv
+                def tally(repos_contributors):
+                    nonlocal contributors_count
+                    for repo_rank, repo_stat, commits_data in repos_contributors:
+                        contributors_count += len(commits_data)
+                        messages.extend(f"{repo_stat.name}: {message}" for message in commits_data.messages)
+                        yield repo_rank, repo_stat, commits_data
+
+                stored_results = obj.get_stored_results(results_index)
+                if stored_results is not None:
+                    stored_file, repos_contributors = stored_results
+                    results_file = obj.write_stored_results(stored_file, list(tally(repos_contributors)), results_index)
+                    summary_row[3:] = ['Done (stored results)', len(repos_contributors), contributors_count, results_file, '']
+                    continue
+
+                if obj.check_org() == False:
+                    continue
+                n_repos = obj.get_n_repos()
+                snapshot = ContributorsSnapshot(org) if INCREMENTAL_REFRESH else None
+                messages.extend(n_repos.messages)
+                results_file = obj.write_results(tally(obj.iter_all_contributors(n_repos, snapshot=snapshot, executor=executor)), results_index, repos_complete=n_repos.is_complete())
+                summary_row[3:] = ['Done', len(n_repos), contributors_count, results_file, ' | '.join(messages)]
+            except Exception as e:
+                # A failing job should not abort the rest
+                print(f"ERROR:\n{e}")
+                summary_row[3] = 'Failed'
+                summary_row[7] = str(e)
+
+    # Combined summary of the batch
+    if not os.path.exists('Results'):
+        os.makedirs('Results')
+    with open(BATCH_SUMMARY_FILE, mode='w') as summary_file:
+        summary_writer = csv.writer(summary_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        summary_writer.writerow(BATCH_SUMMARY_HEADER)
+        summary_writer.writerows(summary_rows)
+    print(f"\nBatch summary written into file:\n{BATCH_SUMMARY_FILE}")
+
+    # Rate remaining as seen in the last responses
+    rate_limit = obj.last_rate_limit()
+    if "rate_remaining" in rate_limit:
+        print(f"\nRate Remaining:{rate_limit['rate_remaining']}")
+    obj.print_token_stats()
+    return summary_rows
+
+
+# Function to write one JSON object to a JSON Lines stream, flushed right away for the consumer
+def write_jsonl(out, record):
+    out.write(json.dumps(record) + '\n')
+    out.flush()
+    return
+
+
+# Function to run the (org, n, m) query given on the command line and stream its results to out as JSON Lines
+# Everything else the program prints goes to stderr, so that out only holds the results. Returns False on failure
+def run_jsonl(args, out=None, max_workers=MAX_WORKERS):
+    out = out if out is not None else sys.stdout
+    with redirect_stdout(sys.stderr):
+        try:
+            org, n, m = args[0].strip(), int(args[1]), int(args[2])
+        except (IndexError, ValueError):
+            print("ERROR: Expected: --jsonl org n m, with integer values for 'n' and 'm'")
+            return False
+        if n <= 0 or m <= 0:
+            print("Only positive integer values greater than 0 allowed for n and m")
+            return False
+
+        obj = TopContributors(org, n, m)
+        obj.print_inputs()
+        if obj.check_org() == False:
+            return False
+
+        forked_repos_data = RepoResults()
+        # Each repo is written as soon as its page of the search arrives
+        for repo_rank, repo_stat in enumerate(obj.iter_repos(forked_repos_data), start=1):
+            write_jsonl(out, {'type': 'repo', 'repo_rank': repo_rank, 'repo_name': repo_stat.name, 'forks_count': repo_stat.forks_count})
+        for message in forked_repos_data.messages:
+            write_jsonl(out, {'type': 'message', 'repo_name': None, 'message': message})
+
+        # The contributors of each repo are written as soon as they are retrieved, in repo rank order, with the same
+        # fetch as the other modes (failing repos reported, statistics of the repos too large to list polled together)
+        snapshot = ContributorsSnapshot(org) if INCREMENTAL_REFRESH else None
+        for repo_rank, repo_stat, commits_data in obj.iter_all_contributors(forked_repos_data, max_workers=max_workers, snapshot=snapshot):
+            for contributor_rank, contributor_stat in commits_data.items():
+                write_jsonl(out, {'type': 'contributor', 'repo_rank': repo_rank, 'repo_name': repo_stat.name, 'contributor_rank': contributor_rank, 'login_id': contributor_stat.login_id, 'commit_count': contributor_stat.commit_count})
+            for message in commits_data.messages:
+                write_jsonl(out, {'type': 'message', 'repo_name': repo_stat.name, 'message': message})
+    return True
+
+
 if __name__ == "__main__":
     try:
         # Starting timer for calculating time to retrieve result
         start_time = datetime.now()
 
+        # Batch mode: python top_dev_org_contributors.py --batch jobs.csv [more_jobs.csv ...]
+        if len(sys.argv) > 2 and sys.argv[1] == '--batch':
+            run_batch(read_batch_jobs(sys.argv[2:]))
+            print("Program execution time:\n")
+            print(datetime.now() - start_time)
+            sys.exit()
+
+        # JSON Lines mode: python top_dev_org_contributors.py --jsonl org n m
+        if len(sys.argv) > 1 and sys.argv[1] == '--jsonl':
+            sys.exit(0 if run_jsonl(sys.argv[2:]) else 1)
+
         print("Enter the name of the organisation whose github stats you're interested in:")
         org = input().strip()
         print("Enter a value for 'n' which is the n most forked repos you're interested in:")
@@ -282,32 +412,71 @@ if __name__ == "__main__":
             
         # Calling the class with the values
         obj = TopContributors(org, n, m)
+        # Time and requests of each phase of the run
+        metrics = get_metrics()
 
         # Printing the inputs
         obj.print_inputs()
 
+        # Answering from a fresh stored results file when one covers the query
+        results_index = ResultsIndex()
+        stored_results = obj.get_stored_results(results_index)
+        if stored_results is not None:
+            obj.write_stored_results(*stored_results, results_index)
+            print("Program execution time:\n")
+            print(datetime.now() - start_time)
+            sys.exit()
+
         # Check rate limit of API access
-        obj.check_rate_limit()
+        with metrics.phase('Rate limit check'):
+            obj.check_rate_limit()
 
         # Checking if org name entered is valid
-        obj.check_org()
+        with metrics.phase('Org check'):
+            org_check = obj.check_org()
+        if org_check == False:
+            sys.exit()
 
         # Get top n most forked repos
         print(f"Retrieving the {n} most forked repos")
-        n_repos = obj.get_n_repos()
-        for key, repo_details in n_repos.items():
-            if type(key) == int:
-                # Get top m contributors for each repo
-                print(f"Retrieving the {m} most active contributors for repo: {repo_details['Name']}")
-                repo_details["Commits"] = obj.get_m_commits(repo_details['Name'])
-
-        # Writing the results into a csv
-        obj.write_results(n_repos)
+        with metrics.phase('Repo search'):
+            n_repos = obj.get_n_repos()
+        # Get top m contributors for each repo, several repos at a time
+        print(f"Retrieving the {m} most active contributors for each repo")
+        snapshot = ContributorsSnapshot(org) if INCREMENTAL_REFRESH else None
+        repos_contributors = obj.iter_all_contributors(n_repos, snapshot=snapshot)
+
+        # Writing the results into a csv, each repo as soon as its contributors are retrieved
+        with metrics.phase('Contributors'):
+            obj.write_results(repos_contributors, results_index, repos_complete=n_repos.is_complete())
         
         # Time Elapsed
         print("Program execution time:\n")
         end_time = end_time = datetime.now()
         print(end_time - start_time)
+
+        # Repos whose contributors were reused from the last run
+        if snapshot is not None:
+            print(f"\nRepos skipped (not pushed to since the last run): {snapshot.skipped_count}")
+
+        # Requests saved by the page planner
+        print(f"\nPaginated requests made: {obj.page_stats.requests}, saved: {obj.page_stats.requests_saved()}")
+
+        # Rate remaining as seen in the last responses
+        rate_limit = obj.last_rate_limit()
+        if "rate_remaining" in rate_limit:
+            print(f"\nRate Remaining:{rate_limit['rate_remaining']}")
+
+        # Conditional-request cache hits and misses
+        if obj.session.cache is not None:
+            cache_stats = obj.session.cache.stats()
+            print(f"\nResponse cache hits: {cache_stats['hits']}, misses: {cache_stats['misses']}")
+
+        # Requests sent with each token of the pool
+        obj.print_token_stats()
+
+        # Time and requests of each phase
+        obj.print_phase_breakdown()
                         
     except ValueError:
         # Checking if values are in the right format